@@ -4,6 +4,8 @@ Stock Analysis API Endpoints
 from fastapi import APIRouter, HTTPException, Query, Depends
 from datetime import datetime, timezone
 from typing import Dict
+import hashlib
+import json
 import logging
 
 from app.models.schemas.stock import (
@@ -33,6 +35,12 @@ def get_stock_service() -> StockAnalysisService:
     """Get stock analysis service instance"""
     return StockAnalysisService()
 
+def _analysis_inputs_key(request: StockAnalysisRequest) -> str:
+    """分析请求输入的哈希，用于合并并发的相同请求"""
+    payload = json.dumps(request.dict(), sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
 @router.post("/analyze", response_model=ApiResponse[StockAnalysisResponse])
 async def analyze_stock(
     request: StockAnalysisRequest,
@@ -62,25 +70,20 @@ async def analyze_stock(
         #     num_of_news=1,
         # )
 
-        # 将任务提交到线程池
-        future = api_state._executor.submit(
+        # 将任务提交到线程池；相同输入的任务正在运行时直接复用
+        run_id, submitted = api_state.submit_analysis_task(
+            _analysis_inputs_key(request),
+            run_id,
             execute_stock_analysis,
-            request=request,
-            run_id=run_id
+            request=request
         )
 
-        # 注册任务
-        api_state.register_analysis_task(run_id, future)
-
-        # 注册运行
-        api_state.register_run(run_id)
-
         # 创建响应对象
         response = StockAnalysisResponse(
             run_id=run_id,
             ticker=request.stock_code,
             status="running",
-            message="分析任务已启动",
+            message="分析任务已启动" if submitted else "相同的分析任务正在运行，已复用该任务",
             submitted_at=datetime.now(timezone.utc)
         )
 
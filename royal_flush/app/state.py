@@ -6,7 +6,7 @@ API状态管理模块
 
 import threading
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from datetime import datetime, timezone
 from concurrent.futures import ThreadPoolExecutor, Future
 
@@ -25,6 +25,7 @@ class ApiState:
         self._current_run_id: Optional[str] = None
         self._executor = ThreadPoolExecutor(max_workers=5)
         self._analysis_tasks: Dict[str, Future] = {}  # 跟踪分析任务
+        self._inflight_analyses: Dict[str, str] = {}  # 输入哈希 -> 进行中的运行ID
 
     @property
     def current_run_id(self) -> Optional[str]:
@@ -155,6 +156,43 @@ class ApiState:
         with self._lock:
             return self._analysis_tasks.get(run_id)
 
+    def submit_analysis_task(self, inputs_key: str, run_id: str,
+                             fn: Callable[..., Any], **kwargs) -> Tuple[str, bool]:
+        """
+        提交分析任务，输入相同的任务正在运行时不重复提交
+
+        Args:
+            inputs_key: 任务输入的哈希，输入相同的请求共享同一次运行
+            run_id: 新任务使用的运行ID
+            fn: 在线程池中执行的函数，调用方式为 fn(run_id=run_id, **kwargs)
+
+        Returns:
+            (实际的运行ID, 是否新提交)；复用进行中的任务时返回该任务的运行ID
+        """
+        with self._lock:
+            existing_run_id = self._inflight_analyses.get(inputs_key)
+            if existing_run_id is not None:
+                existing = self._analysis_tasks.get(existing_run_id)
+                if existing is not None and not existing.done():
+                    logger.info(
+                        f"Attaching to in-flight analysis {existing_run_id}")
+                    return existing_run_id, False
+
+            # 先注册运行再提交，避免任务在注册前结束
+            self.register_run(run_id)
+            future = self._executor.submit(fn, run_id=run_id, **kwargs)
+            self._analysis_tasks[run_id] = future
+            self._inflight_analyses[inputs_key] = run_id
+
+        future.add_done_callback(
+            lambda _: self._release_inflight(inputs_key, run_id))
+        return run_id, True
+
+    def _release_inflight(self, inputs_key: str, run_id: str):
+        with self._lock:
+            if self._inflight_analyses.get(inputs_key) == run_id:
+                del self._inflight_analyses[inputs_key]
+
 
 # 创建全局API状态实例
 api_state = ApiState()
@@ -1,8 +1,8 @@
 import os
 import json
 from datetime import datetime
-import akshare as ak
 from src.utils.logging_config import setup_logger
+from src.tools.data_provider import get_data_provider
 # from langgraph.graph import AgentState # Changed import
 # Added for alignment
 from src.agents.state import AgentState, show_agent_reasoning, show_workflow_status
@@ -77,7 +77,7 @@ def macro_news_agent(state: AgentState) -> Dict[str, Any]:
         try:
             show_workflow_status(
                 f"{agent_name}: Fetching news for symbol {symbol}")
-            news_df = ak.stock_news_em(symbol=symbol)
+            news_df = get_data_provider().stock_news_em(symbol=symbol)
             if news_df is None or news_df.empty:
                 message = f"未获取到 {symbol} 的新闻数据。"
                 show_workflow_status(f"{agent_name}: {message}")
@@ -4,13 +4,20 @@ from src.agents.state import AgentState, show_agent_reasoning, show_workflow_sta
 from src.tools.api import get_financial_metrics, get_financial_statements, get_market_data, get_price_history
 from src.utils.logging_config import setup_logger
 from src.utils.api_utils import agent_endpoint, log_llm_interaction
+from src.utils.concurrency import run_concurrently
+from src.tools.price_panel import PriceBars
 
 from datetime import datetime, timedelta
+from functools import partial
+import os
 import pandas as pd
 
 # 设置日志记录
 logger = setup_logger('market_data_agent')
 
+# 每个数据获取调用的超时时间（秒）
+MARKET_DATA_TIMEOUT = float(os.getenv("MARKET_DATA_TIMEOUT", "60"))
+
 
 @agent_endpoint("market_data", "市场数据收集，负责获取股价历史、财务指标和市场信息")
 def market_data_agent(state: AgentState):
@@ -42,41 +49,51 @@ def market_data_agent(state: AgentState):
     # Get all required data
     ticker = data["ticker"]
 
-    # 获取价格数据并验证
-    prices_df = get_price_history(ticker, start_date, end_date)
-    if prices_df is None or prices_df.empty:
-        logger.warning(f"警告：无法获取{ticker}的价格数据，将使用空数据继续")
-        prices_df = pd.DataFrame(
-            columns=['close', 'open', 'high', 'low', 'volume'])
-
-    # 获取财务指标
-    try:
-        financial_metrics = get_financial_metrics(ticker)
-    except Exception as e:
-        logger.error(f"获取财务指标失败: {str(e)}")
-        financial_metrics = {}
-
-    # 获取财务报表
-    try:
-        financial_line_items = get_financial_statements(ticker)
-    except Exception as e:
-        logger.error(f"获取财务报表失败: {str(e)}")
-        financial_line_items = {}
-
-    # 获取市场数据
-    try:
-        market_data = get_market_data(ticker)
-    except Exception as e:
-        logger.error(f"获取市场数据失败: {str(e)}")
-        market_data = {"market_cap": 0}
-
-    # 确保数据格式正确
-    if not isinstance(prices_df, pd.DataFrame):
-        prices_df = pd.DataFrame(
-            columns=['close', 'open', 'high', 'low', 'volume'])
-
-    # 转换价格数据为字典格式
-    prices_dict = prices_df.to_dict('records')
+    # 四类数据相互独立且都受网络I/O限制，并发获取；
+    # 单个调用失败或超时时使用默认值，不影响其他数据
+    tasks = {
+        "financial_metrics": partial(get_financial_metrics, ticker),
+        "financial_line_items": partial(get_financial_statements, ticker),
+        "market_data": partial(get_market_data, ticker),
+    }
+    # 调用方已提供K线（如回测时预先获取的整段数据的切片）时不再重复获取
+    prefetched = data.get("prices")
+    if not isinstance(prefetched, PriceBars):
+        tasks["prices"] = partial(get_price_history, ticker, start_date, end_date)
+
+    results, errors = run_concurrently(
+        tasks,
+        timeout=MARKET_DATA_TIMEOUT,
+        defaults={
+            "financial_metrics": {},
+            "financial_line_items": {},
+            "market_data": {"market_cap": 0},
+        },
+    )
+    for name, error in errors.items():
+        logger.error(f"获取{name}失败: {error}")
+
+    financial_metrics = results["financial_metrics"]
+    financial_line_items = results["financial_line_items"]
+    market_data = results["market_data"]
+
+    if isinstance(prefetched, PriceBars):
+        prices = prefetched
+    else:
+        # 验证价格数据
+        prices_df = results["prices"]
+        if prices_df is None or prices_df.empty:
+            logger.warning(f"警告：无法获取{ticker}的价格数据，将使用空数据继续")
+            prices_df = pd.DataFrame(
+                columns=['close', 'open', 'high', 'low', 'volume'])
+
+        # 确保数据格式正确
+        if not isinstance(prices_df, pd.DataFrame):
+            prices_df = pd.DataFrame(
+                columns=['close', 'open', 'high', 'low', 'volume'])
+
+        # 以列式数组保存价格数据，下游代理无需逐行转换
+        prices = PriceBars.from_frame(prices_df)
 
     # 保存推理信息到metadata供API使用
     market_data_summary = {
@@ -84,11 +101,12 @@ def market_data_agent(state: AgentState):
         "start_date": start_date,
         "end_date": end_date,
         "data_collected": {
-            "price_history": len(prices_dict) > 0,
+            "price_history": len(prices) > 0,
             "financial_metrics": len(financial_metrics) > 0,
             "financial_statements": len(financial_line_items) > 0,
             "market_data": len(market_data) > 0
         },
+        "errors": errors,
         "summary": f"为{ticker}收集了从{start_date}到{end_date}的市场数据，包括价格历史、财务指标和市场信息"
     }
 
@@ -100,7 +118,7 @@ def market_data_agent(state: AgentState):
         "messages": messages,
         "data": {
             **data,
-            "prices": prices_dict,
+            "prices": prices,
             "start_date": start_date,
             "end_date": end_date,
             "financial_metrics": financial_metrics,
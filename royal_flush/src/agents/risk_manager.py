@@ -4,6 +4,7 @@ from langchain_core.messages import HumanMessage
 
 from src.agents.state import AgentState, show_agent_reasoning, show_workflow_status
 from src.tools.api import prices_to_df
+from src.agents.technicals import calculate_returns
 from src.utils.api_utils import agent_endpoint, log_llm_interaction
 
 import json
@@ -32,7 +33,7 @@ def risk_management_agent(state: AgentState):
         debate_results = ast.literal_eval(debate_message.content)
 
     # 1. Calculate Risk Metrics
-    returns = prices_df['close'].pct_change().dropna()
+    returns = calculate_returns(prices_df).dropna()  # 与技术分析共享同一份收益率
     daily_vol = returns.std()
     # Annualized volatility approximation
     volatility = daily_vol * (252 ** 0.5)
@@ -12,10 +12,35 @@ import pandas as pd
 import numpy as np
 
 from src.tools.api import prices_to_df
+from src.tools import kernels, rolling_stats
+from src.tools.indicator_cache import cached_indicator
+from src.tools.indicators import IndicatorRegistry
 
 # 初始化 logger
 logger = setup_logger('technical_analyst_agent')
 
+# 各策略信号的组合权重
+STRATEGY_WEIGHTS = {
+    'trend': 0.30,
+    'mean_reversion': 0.25,  # Increased weight for mean reversion
+    'momentum': 0.25,
+    'volatility': 0.15,
+    'stat_arb': 0.05
+}
+
+# 技术指标依赖图：每个指标声明其依赖的中间结果，compute_technicals 只计算请求的输出
+# 及其依赖，共用的中间结果（EMA、真实波幅、收益率等）只计算一次
+technical_indicators = IndicatorRegistry()
+
+# 各策略在依赖图中的输出名称
+STRATEGY_OUTPUTS = {
+    'trend': 'trend_signals',
+    'mean_reversion': 'mean_reversion_signals',
+    'momentum': 'momentum_signals',
+    'volatility': 'volatility_signals',
+    'stat_arb': 'stat_arb_signals',
+}
+
 
 ##### Technical Analyst #####
 @agent_endpoint("technical_analyst", "技术分析师，提供基于价格走势、指标和技术模式的交易信号")
@@ -38,18 +63,22 @@ def technical_analyst_agent(state: AgentState):
     # Initialize confidence variable
     confidence = 0.0
 
+    # 指标和策略信号一次求值，共用的中间结果只计算一次
+    values = compute_technicals(
+        prices_df, ['macd', 'rsi_14', 'bollinger_bands', 'obv', *STRATEGY_OUTPUTS.values()])
+
     # Calculate indicators
     # 1. MACD (Moving Average Convergence Divergence)
-    macd_line, signal_line = calculate_macd(prices_df)
+    macd_line, signal_line = (_as_series(v, prices_df, 'close') for v in values['macd'])
 
     # 2. RSI (Relative Strength Index)
-    rsi = calculate_rsi(prices_df)
+    rsi = _as_series(values['rsi_14'], prices_df, 'close')
 
     # 3. Bollinger Bands (Bollinger Bands)
-    upper_band, lower_band = calculate_bollinger_bands(prices_df)
+    upper_band, lower_band = (_as_series(v, prices_df, 'close') for v in values['bollinger_bands'])
 
     # 4. OBV (On-Balance Volume)
-    obv = calculate_obv(prices_df)
+    obv = _as_series(values['obv'], prices_df, 'OBV')
 
     # Generate individual signals
     signals = []
@@ -148,36 +177,28 @@ def technical_analyst_agent(state: AgentState):
     }
 
     # 1. Trend Following Strategy
-    trend_signals = calculate_trend_signals(prices_df)
+    trend_signals = values['trend_signals']
 
     # 2. Mean Reversion Strategy
-    mean_reversion_signals = calculate_mean_reversion_signals(prices_df)
+    mean_reversion_signals = values['mean_reversion_signals']
 
     # 3. Momentum Strategy
-    momentum_signals = calculate_momentum_signals(prices_df)
+    momentum_signals = values['momentum_signals']
 
     # 4. Volatility Strategy
-    volatility_signals = calculate_volatility_signals(prices_df)
+    volatility_signals = values['volatility_signals']
 
     # 5. Statistical Arbitrage Signals
-    stat_arb_signals = calculate_stat_arb_signals(prices_df)
+    stat_arb_signals = values['stat_arb_signals']
 
     # Combine all signals using a weighted ensemble approach
-    strategy_weights = {
-        'trend': 0.30,
-        'mean_reversion': 0.25,  # Increased weight for mean reversion
-        'momentum': 0.25,
-        'volatility': 0.15,
-        'stat_arb': 0.05
-    }
-
     combined_signal = weighted_signal_combination({
         'trend': trend_signals,
         'mean_reversion': mean_reversion_signals,
         'momentum': momentum_signals,
         'volatility': volatility_signals,
         'stat_arb': stat_arb_signals
-    }, strategy_weights)
+    }, STRATEGY_WEIGHTS)
 
     # Generate detailed analysis report
     analysis_report = {
@@ -240,28 +261,26 @@ def calculate_trend_signals(prices_df):
     """
     Advanced trend following strategy using multiple timeframes and indicators
     """
-    # Calculate EMAs for multiple timeframes
-    ema_8 = calculate_ema(prices_df, 8)
-    ema_21 = calculate_ema(prices_df, 21)
-    ema_55 = calculate_ema(prices_df, 55)
+    return compute_technicals(prices_df, ['trend_signals'])['trend_signals']
 
-    # Calculate ADX for trend strength
-    adx = calculate_adx(prices_df, 14)
 
-    # Calculate Ichimoku Cloud
-    ichimoku = calculate_ichimoku(prices_df)
+@technical_indicators.register('trend_signals', requires=('ema_8', 'ema_21', 'ema_55', 'adx'))
+def _trend_signals(ctx):
+    # EMAs for multiple timeframes, ADX for trend strength
+    ema_8, ema_21, ema_55 = ctx['ema_8'], ctx['ema_21'], ctx['ema_55']
+    adx = ctx['adx'][0]
 
     # Determine trend direction and strength
-    short_trend = ema_8 > ema_21
-    medium_trend = ema_21 > ema_55
+    short_trend = ema_8[-1] > ema_21[-1]
+    medium_trend = ema_21[-1] > ema_55[-1]
 
     # Combine signals with confidence weighting
-    trend_strength = adx['adx'].iloc[-1] / 100.0
+    trend_strength = adx[-1] / 100.0
 
-    if short_trend.iloc[-1] and medium_trend.iloc[-1]:
+    if short_trend and medium_trend:
         signal = 'bullish'
         confidence = trend_strength
-    elif not short_trend.iloc[-1] and not medium_trend.iloc[-1]:
+    elif not short_trend and not medium_trend:
         signal = 'bearish'
         confidence = trend_strength
     else:
@@ -272,7 +291,7 @@ def calculate_trend_signals(prices_df):
         'signal': signal,
         'confidence': confidence,
         'metrics': {
-            'adx': float(adx['adx'].iloc[-1]),
+            'adx': float(adx[-1]),
             'trend_strength': float(trend_strength),
             # 'ichimoku': ichimoku
         }
@@ -283,30 +302,37 @@ def calculate_mean_reversion_signals(prices_df):
     """
     Mean reversion strategy using statistical measures and Bollinger Bands
     """
-    # Calculate z-score of price relative to moving average
-    ma_50 = prices_df['close'].rolling(window=50).mean()
-    std_50 = prices_df['close'].rolling(window=50).std()
-    z_score = (prices_df['close'] - ma_50) / std_50
+    return compute_technicals(prices_df, ['mean_reversion_signals'])['mean_reversion_signals']
 
-    # Calculate Bollinger Bands
-    bb_upper, bb_lower = calculate_bollinger_bands(prices_df)
 
-    # Calculate RSI with multiple timeframes
-    rsi_14 = calculate_rsi(prices_df, 14)
-    rsi_28 = calculate_rsi(prices_df, 28)
+@technical_indicators.register('mean_reversion_signals',
+                               requires=('bollinger_bands', 'rsi_14', 'rsi_28'))
+def _mean_reversion_signals(ctx):
+    close = ctx['close']
+
+    # Calculate z-score of price relative to moving average
+    # （只用到最后一个值，只对最后一个窗口计算）
+    ma_50 = kernels.rolling_mean(close[-50:], 50)[-1]
+    std_50 = kernels.rolling_std(close[-50:], 50)[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_score = np.float64(close[-1] - ma_50) / std_50
+
+    # Bollinger Bands, RSI with multiple timeframes
+    bb_upper, bb_lower = ctx['bollinger_bands']
+    rsi_14, rsi_28 = ctx['rsi_14'], ctx['rsi_28']
 
     # Mean reversion signals
-    extreme_z_score = abs(z_score.iloc[-1]) > 2
-    price_vs_bb = (prices_df['close'].iloc[-1] - bb_lower.iloc[-1]
-                   ) / (bb_upper.iloc[-1] - bb_lower.iloc[-1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_vs_bb = np.float64(close[-1] - bb_lower[-1]) / \
+            (bb_upper[-1] - bb_lower[-1])
 
     # Combine signals
-    if z_score.iloc[-1] < -2 and price_vs_bb < 0.2:
+    if z_score < -2 and price_vs_bb < 0.2:
         signal = 'bullish'
-        confidence = min(abs(z_score.iloc[-1]) / 4, 1.0)
-    elif z_score.iloc[-1] > 2 and price_vs_bb > 0.8:
+        confidence = min(abs(z_score) / 4, 1.0)
+    elif z_score > 2 and price_vs_bb > 0.8:
         signal = 'bearish'
-        confidence = min(abs(z_score.iloc[-1]) / 4, 1.0)
+        confidence = min(abs(z_score) / 4, 1.0)
     else:
         signal = 'neutral'
         confidence = 0.5
@@ -315,10 +341,10 @@ def calculate_mean_reversion_signals(prices_df):
         'signal': signal,
         'confidence': confidence,
         'metrics': {
-            'z_score': float(z_score.iloc[-1]),
+            'z_score': float(z_score),
             'price_vs_bb': float(price_vs_bb),
-            'rsi_14': float(rsi_14.iloc[-1]),
-            'rsi_28': float(rsi_28.iloc[-1])
+            'rsi_14': float(rsi_14[-1]),
+            'rsi_28': float(rsi_28[-1])
         }
     }
 
@@ -327,30 +353,39 @@ def calculate_momentum_signals(prices_df):
     """
     Multi-factor momentum strategy with conservative settings
     """
+    return compute_technicals(prices_df, ['momentum_signals'])['momentum_signals']
+
+
+@technical_indicators.register('momentum_signals', requires=('returns',))
+def _momentum_signals(ctx):
+    returns = ctx['returns']
+
     # Price momentum with adjusted min_periods
-    returns = prices_df['close'].pct_change()
-    mom_1m = returns.rolling(21, min_periods=5).sum()  # 短期动量允许较少数据点
-    mom_3m = returns.rolling(63, min_periods=42).sum()  # 中期动量要求更多数据点
-    mom_6m = returns.rolling(126, min_periods=63).sum()  # 长期动量保持严格要求
+    # （只用到最后一个值，只对最后一个窗口求和）
+    mom_1m = kernels.rolling_sum(returns[-21:], 21, min_periods=5)[-1]  # 短期动量允许较少数据点
+    mom_3m = kernels.rolling_sum(returns[-63:], 63, min_periods=42)[-1]  # 中期动量要求更多数据点
+    mom_6m = kernels.rolling_sum(returns[-126:], 126, min_periods=63)[-1]  # 长期动量保持严格要求
 
     # Volume momentum
-    volume_ma = prices_df['volume'].rolling(21, min_periods=10).mean()
-    volume_momentum = prices_df['volume'] / volume_ma
+    volume = ctx['volume']
+    volume_ma = kernels.rolling_mean(volume[-21:], 21, min_periods=10)[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_momentum = np.float64(volume[-1]) / volume_ma
 
     # 处理NaN值
-    mom_1m = mom_1m.fillna(0)  # 短期动量可以用0填充
-    mom_3m = mom_3m.fillna(mom_1m)  # 中期动量可以用短期动量填充
-    mom_6m = mom_6m.fillna(mom_3m)  # 长期动量可以用中期动量填充
+    mom_1m = 0.0 if np.isnan(mom_1m) else mom_1m  # 短期动量可以用0填充
+    mom_3m = mom_1m if np.isnan(mom_3m) else mom_3m  # 中期动量可以用短期动量填充
+    mom_6m = mom_3m if np.isnan(mom_6m) else mom_6m  # 长期动量可以用中期动量填充
 
     # Calculate momentum score with more weight on longer timeframes
     momentum_score = (
         0.2 * mom_1m +  # 降低短期权重
         0.3 * mom_3m +
         0.5 * mom_6m    # 增加长期权重
-    ).iloc[-1]
+    )
 
     # Volume confirmation
-    volume_confirmation = volume_momentum.iloc[-1] > 1.0
+    volume_confirmation = volume_momentum > 1.0
 
     if momentum_score > 0.05 and volume_confirmation:
         signal = 'bullish'
@@ -366,10 +401,10 @@ def calculate_momentum_signals(prices_df):
         'signal': signal,
         'confidence': confidence,
         'metrics': {
-            'momentum_1m': float(mom_1m.iloc[-1]),
-            'momentum_3m': float(mom_3m.iloc[-1]),
-            'momentum_6m': float(mom_6m.iloc[-1]),
-            'volume_momentum': float(volume_momentum.iloc[-1])
+            'momentum_1m': float(mom_1m),
+            'momentum_3m': float(mom_3m),
+            'momentum_6m': float(mom_6m),
+            'volume_momentum': float(volume_momentum)
         }
     }
 
@@ -378,33 +413,38 @@ def calculate_volatility_signals(prices_df):
     """
     Optimized volatility calculation with shorter lookback periods
     """
-    returns = prices_df['close'].pct_change()
+    return compute_technicals(prices_df, ['volatility_signals'])['volatility_signals']
+
+
+@technical_indicators.register('volatility_signals', requires=('returns', 'atr'))
+def _volatility_signals(ctx):
+    returns = ctx['returns']
 
     # 使用更短的周期和最小周期要求计算历史波动率
-    hist_vol = returns.rolling(21, min_periods=10).std() * math.sqrt(252)
+    # （只用到最后42个波动率，对应最后 42 + 21 - 1 个收益率）
+    hist_vol = kernels.rolling_std(
+        returns[-62:], 21, min_periods=10)[-42:] * math.sqrt(252)
 
     # 使用更短的周期计算波动率均值，并允许更少的数据点
-    vol_ma = hist_vol.rolling(42, min_periods=21).mean()
-    vol_regime = hist_vol / vol_ma
+    vol_ma = kernels.rolling_mean(hist_vol, 42, min_periods=21)[-1]
 
     # 使用更灵活的标准差计算
-    vol_std = hist_vol.rolling(42, min_periods=21).std()
-    vol_z_score = (hist_vol - vol_ma) / vol_std.replace(0, np.nan)
+    vol_std = kernels.rolling_std(hist_vol, 42, min_periods=21)[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        current_vol_regime = hist_vol[-1] / vol_ma
+        vol_z = (hist_vol[-1] - vol_ma) / (np.nan if vol_std == 0 else vol_std)
 
     # ATR计算优化
-    atr = calculate_atr(prices_df, period=14, min_periods=7)
-    atr_ratio = atr / prices_df['close']
+    atr = ctx['atr']
+    atr_ratio = atr[-1] / ctx['close'][-1]
 
     # 如果关键指标为NaN，使用替代值而不是直接返回中性信号
-    if pd.isna(vol_regime.iloc[-1]):
-        vol_regime.iloc[-1] = 1.0  # 假设处于正常波动率区间
-    if pd.isna(vol_z_score.iloc[-1]):
-        vol_z_score.iloc[-1] = 0.0  # 假设处于均值位置
+    if pd.isna(current_vol_regime):
+        current_vol_regime = 1.0  # 假设处于正常波动率区间
+    if pd.isna(vol_z):
+        vol_z = 0.0  # 假设处于均值位置
 
     # Generate signal based on volatility regime
-    current_vol_regime = vol_regime.iloc[-1]
-    vol_z = vol_z_score.iloc[-1]
-
     if current_vol_regime < 0.8 and vol_z < -1:
         signal = 'bullish'  # Low vol regime, potential for expansion
         confidence = min(abs(vol_z) / 3, 1.0)
@@ -419,10 +459,10 @@ def calculate_volatility_signals(prices_df):
         'signal': signal,
         'confidence': confidence,
         'metrics': {
-            'historical_volatility': float(hist_vol.iloc[-1]),
+            'historical_volatility': float(hist_vol[-1]),
             'volatility_regime': float(current_vol_regime),
             'volatility_z_score': float(vol_z),
-            'atr_ratio': float(atr_ratio.iloc[-1])
+            'atr_ratio': float(atr_ratio)
         }
     }
 
@@ -431,27 +471,32 @@ def calculate_stat_arb_signals(prices_df):
     """
     Optimized statistical arbitrage signals with shorter lookback periods
     """
+    return compute_technicals(prices_df, ['stat_arb_signals'])['stat_arb_signals']
+
+
+@technical_indicators.register('stat_arb_signals', requires=('returns', 'hurst_exponent'))
+def _stat_arb_signals(ctx):
     # Calculate price distribution statistics
-    returns = prices_df['close'].pct_change()
+    returns = ctx['returns']
 
-    # 使用更短的周期计算偏度和峰度
-    skew = returns.rolling(42, min_periods=21).skew()
-    kurt = returns.rolling(42, min_periods=21).kurt()
+    # 使用更短的周期计算偏度和峰度（只用到最后一个窗口，一次遍历同时得到两者）
+    moments = rolling_stats.rolling_moments(returns[-42:], 42, min_periods=21)
+    skew, kurt = moments.skew[-1], moments.kurt[-1]
 
     # 优化Hurst指数计算
-    hurst = calculate_hurst_exponent(prices_df['close'], max_lag=10)
+    hurst = ctx['hurst_exponent']
 
     # 处理NaN值
-    if pd.isna(skew.iloc[-1]):
-        skew.iloc[-1] = 0.0  # 假设正态分布
-    if pd.isna(kurt.iloc[-1]):
-        kurt.iloc[-1] = 3.0  # 假设正态分布
+    if pd.isna(skew):
+        skew = 0.0  # 假设正态分布
+    if pd.isna(kurt):
+        kurt = 3.0  # 假设正态分布
 
     # Generate signal based on statistical properties
-    if hurst < 0.4 and skew.iloc[-1] > 1:
+    if hurst < 0.4 and skew > 1:
         signal = 'bullish'
         confidence = (0.5 - hurst) * 2
-    elif hurst < 0.4 and skew.iloc[-1] < -1:
+    elif hurst < 0.4 and skew < -1:
         signal = 'bearish'
         confidence = (0.5 - hurst) * 2
     else:
@@ -463,8 +508,8 @@ def calculate_stat_arb_signals(prices_df):
         'confidence': confidence,
         'metrics': {
             'hurst_exponent': float(hurst),
-            'skewness': float(skew.iloc[-1]),
-            'kurtosis': float(kurt.iloc[-1])
+            'skewness': float(skew),
+            'kurtosis': float(kurt)
         }
     }
 
@@ -524,34 +569,248 @@ def normalize_pandas(obj):
     return obj
 
 
+def _as_series(values: np.ndarray, prices_df: pd.DataFrame, name: str = None) -> pd.Series:
+    """把内核计算出的数组包装为与价格数据对齐的 Series（不复制）"""
+    return pd.Series(values, index=prices_df.index, name=name, copy=False)
+
+
+def calculate_returns(prices_df: pd.DataFrame) -> pd.Series:
+    """收盘价日收益率，首行为 NaN"""
+    returns = cached_indicator(prices_df, 'returns', (), lambda: kernels.pct_change(
+        prices_df['close'].to_numpy(dtype=float)))
+    return _as_series(returns, prices_df, 'close')
+
+
+def _columns(df: pd.DataFrame, *names: str) -> list:
+    return [df[name].to_numpy(dtype=float) for name in names]
+
+
+##### 数组实现 #####
+# 以下函数沿第 0 维（时间）计算，既用于单只股票的一维数组，
+# 也用于 (日期, 股票) 的二维面板（见 technicals_batch.py）
+
+def _true_range_values(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """真实波幅，与 DataFrame.max(axis=1) 一样忽略缺失的分量"""
+    prev_close = kernels.shift(close)
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)),
+                   np.abs(low - prev_close))
+
+
+def _macd_values(close: np.ndarray) -> np.ndarray:
+    """返回 [MACD线, 信号线]"""
+    macd_line = kernels.ewm_mean(close, 12) - kernels.ewm_mean(close, 26)
+    return np.stack([macd_line, kernels.ewm_mean(macd_line, 9)])
+
+
+def _rsi_values(close: np.ndarray, period: int) -> np.ndarray:
+    delta = kernels.diff(close)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    avg_gain = kernels.rolling_mean(gain, period)
+    avg_loss = kernels.rolling_mean(loss, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+def _bollinger_values(close: np.ndarray, window: int) -> np.ndarray:
+    """返回 [上轨, 下轨]"""
+    sma = kernels.rolling_mean(close, window)
+    std_dev = kernels.rolling_std(close, window)
+    return np.stack([sma + (std_dev * 2), sma - (std_dev * 2)])
+
+
+def _adx_values(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int,
+                true_range: np.ndarray = None) -> np.ndarray:
+    """返回 [ADX, +DI, -DI]，true_range 为可选的预先计算好的真实波幅"""
+    # Calculate True Range
+    tr = _true_range_values(high, low, close) if true_range is None else true_range
+
+    # Calculate Directional Movement
+    up_move = kernels.diff(high)
+    down_move = -kernels.diff(low)
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+
+    # Calculate ADX
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tr_mean = kernels.ewm_mean(tr, period, adjust=True)
+        plus_di = 100 * (kernels.ewm_mean(plus_dm, period, adjust=True) / tr_mean)
+        minus_di = 100 * (kernels.ewm_mean(minus_dm, period, adjust=True) / tr_mean)
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    return np.stack([kernels.ewm_mean(dx, period, adjust=True), plus_di, minus_di])
+
+
+def _atr_values(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                period: int, min_periods: int) -> np.ndarray:
+    return kernels.rolling_mean(_true_range_values(high, low, close), period,
+                                min_periods=min_periods)
+
+
+def _obv_values(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    return kernels.obv(close, volume)
+
+
+def _ichimoku_values(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+    def midpoint(window):
+        return (rolling_stats.rolling_max(high, window) + rolling_stats.rolling_min(low, window)) / 2
+
+    # Tenkan-sen (Conversion Line): (9-period high + 9-period low)/2
+    tenkan_sen = midpoint(9)
+
+    # Kijun-sen (Base Line): (26-period high + 26-period low)/2
+    kijun_sen = midpoint(26)
+
+    # Senkou Span A (Leading Span A): (Conversion Line + Base Line)/2
+    senkou_span_a = kernels.shift((tenkan_sen + kijun_sen) / 2, 26)
+
+    # Senkou Span B (Leading Span B): (52-period high + 52-period low)/2
+    senkou_span_b = kernels.shift(midpoint(52), 26)
+
+    # Chikou Span (Lagging Span): Close shifted back 26 periods
+    chikou_span = kernels.shift(close, -26)
+
+    return {
+        'tenkan_sen': tenkan_sen,
+        'kijun_sen': kijun_sen,
+        'senkou_span_a': senkou_span_a,
+        'senkou_span_b': senkou_span_b,
+        'chikou_span': chikou_span,
+    }
+
+
+##### 指标依赖图 #####
+# 原始数据为 compute_technicals 传入的 OHLCV 数组，各节点的取值与对应的 _*_values 相同；
+# 策略节点（*_signals）注册在各自的 calculate_*_signals 旁边
+
+@technical_indicators.register('returns', internal=True)
+def _returns_node(ctx):
+    return kernels.pct_change(ctx['close'])
+
+
+@technical_indicators.register('true_range', internal=True)
+def _true_range_node(ctx):
+    return _true_range_values(ctx['high'], ctx['low'], ctx['close'])
+
+
+def _register_ema(span: int):
+    technical_indicators.register(f'ema_{span}', internal=True)(
+        lambda ctx: kernels.ewm_mean(ctx['close'], span))
+
+
+for _span in (8, 12, 21, 26, 55):
+    _register_ema(_span)
+
+
+@technical_indicators.register('macd', requires=('ema_12', 'ema_26'))
+def _macd_node(ctx):
+    macd_line = ctx['ema_12'] - ctx['ema_26']
+    return np.stack([macd_line, kernels.ewm_mean(macd_line, 9)])
+
+
+@technical_indicators.register('rsi_14')
+def _rsi_14_node(ctx):
+    return _rsi_values(ctx['close'], 14)
+
+
+@technical_indicators.register('rsi_28')
+def _rsi_28_node(ctx):
+    return _rsi_values(ctx['close'], 28)
+
+
+@technical_indicators.register('bollinger_bands')
+def _bollinger_node(ctx):
+    return _bollinger_values(ctx['close'], 20)
+
+
+@technical_indicators.register('adx', requires=('true_range',))
+def _adx_node(ctx):
+    return _adx_values(ctx['high'], ctx['low'], ctx['close'], 14, true_range=ctx['true_range'])
+
+
+@technical_indicators.register('atr', requires=('true_range',))
+def _atr_node(ctx):
+    return kernels.rolling_mean(ctx['true_range'], 14, min_periods=7)
+
+
+@technical_indicators.register('obv')
+def _obv_node(ctx):
+    return _obv_values(ctx['close'], ctx['volume'])
+
+
+@technical_indicators.register('hurst_exponent')
+def _hurst_node(ctx):
+    return calculate_hurst_exponent(ctx['close'], max_lag=10)
+
+
+@technical_indicators.register('ichimoku')
+def _ichimoku_node(ctx):
+    return _ichimoku_values(ctx['high'], ctx['low'], ctx['close'])
+
+
+# 节点在指标缓存中的键，与 DataFrame 接口的 calculate_* 相同，两者共用缓存结果
+_CACHE_KEYS = {
+    'ema_8': ('ema', (8,)),
+    'ema_12': ('ema', (12,)),
+    'ema_21': ('ema', (21,)),
+    'ema_26': ('ema', (26,)),
+    'ema_55': ('ema', (55,)),
+    'macd': ('macd', (12, 26, 9)),
+    'rsi_14': ('rsi', (14,)),
+    'rsi_28': ('rsi', (28,)),
+    'bollinger_bands': ('bollinger_bands', (20,)),
+    'adx': ('adx', (14,)),
+    'atr': ('atr', (14, 7)),
+    'hurst_exponent': ('hurst_exponent', (10,)),
+}
+
+
+def compute_technicals(prices_df: pd.DataFrame, names) -> Dict[str, object]:
+    """
+    按依赖图计算技术指标和策略信号
+
+    只计算请求的输出及其依赖，共用的中间结果只计算一次；
+    处于 run_indicator_cache 中时结果与 calculate_* 共用同一个缓存。
+
+    Args:
+        prices_df: 包含 OHLCV 列的价格数据
+        names: 需要的输出名称，可选值见 technical_indicators.public_names()
+
+    Returns:
+        输出名称 -> 结果（指标为数组，策略为 calculate_*_signals 返回的字典）
+    """
+    data = {name: prices_df[name].to_numpy(dtype=float)
+            for name in ('high', 'low', 'close', 'volume') if name in prices_df.columns}
+
+    def memo(name, compute):
+        key, params = _CACHE_KEYS.get(name, (name, ()))
+        return cached_indicator(prices_df, key, params, compute)
+
+    return technical_indicators.compute(data, names, memo=memo)
+
+
+##### DataFrame 接口 #####
+
 def calculate_macd(prices_df: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
-    ema_12 = prices_df['close'].ewm(span=12, adjust=False).mean()
-    ema_26 = prices_df['close'].ewm(span=26, adjust=False).mean()
-    macd_line = ema_12 - ema_26
-    signal_line = macd_line.ewm(span=9, adjust=False).mean()
-    return macd_line, signal_line
+    macd_line, signal_line = cached_indicator(
+        prices_df, 'macd', (12, 26, 9), lambda: _macd_values(*_columns(prices_df, 'close')))
+    return _as_series(macd_line, prices_df, 'close'), _as_series(signal_line, prices_df, 'close')
 
 
 def calculate_rsi(prices_df: pd.DataFrame, period: int = 14) -> pd.Series:
-    delta = prices_df['close'].diff()
-    gain = (delta.where(delta > 0, 0)).fillna(0)
-    loss = (-delta.where(delta < 0, 0)).fillna(0)
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    rsi = cached_indicator(prices_df, 'rsi', (period,),
+                           lambda: _rsi_values(*_columns(prices_df, 'close'), period))
+    return _as_series(rsi, prices_df, 'close')
 
 
 def calculate_bollinger_bands(
     prices_df: pd.DataFrame,
     window: int = 20
 ) -> tuple[pd.Series, pd.Series]:
-    sma = prices_df['close'].rolling(window).mean()
-    std_dev = prices_df['close'].rolling(window).std()
-    upper_band = sma + (std_dev * 2)
-    lower_band = sma - (std_dev * 2)
-    return upper_band, lower_band
+    upper_band, lower_band = cached_indicator(
+        prices_df, 'bollinger_bands', (window,),
+        lambda: _bollinger_values(*_columns(prices_df, 'close'), window))
+    return _as_series(upper_band, prices_df, 'close'), _as_series(lower_band, prices_df, 'close')
 
 
 def calculate_ema(df: pd.DataFrame, window: int) -> pd.Series:
@@ -565,7 +824,9 @@ def calculate_ema(df: pd.DataFrame, window: int) -> pd.Series:
     Returns:
         pd.Series: EMA values
     """
-    return df['close'].ewm(span=window, adjust=False).mean()
+    ema = cached_indicator(df, 'ema', (window,), lambda: kernels.ewm_mean(
+        df['close'].to_numpy(dtype=float), window))
+    return _as_series(ema, df, 'close')
 
 
 def calculate_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
@@ -573,42 +834,15 @@ def calculate_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
     Calculate Average Directional Index (ADX)
 
     Args:
-        df: DataFrame with OHLC data
+        df: DataFrame with OHLC data（不会被修改）
         period: Period for calculations
 
     Returns:
         DataFrame with ADX values
     """
-    # Calculate True Range
-    df['high_low'] = df['high'] - df['low']
-    df['high_close'] = abs(df['high'] - df['close'].shift())
-    df['low_close'] = abs(df['low'] - df['close'].shift())
-    df['tr'] = df[['high_low', 'high_close', 'low_close']].max(axis=1)
-
-    # Calculate Directional Movement
-    df['up_move'] = df['high'] - df['high'].shift()
-    df['down_move'] = df['low'].shift() - df['low']
-
-    df['plus_dm'] = np.where(
-        (df['up_move'] > df['down_move']) & (df['up_move'] > 0),
-        df['up_move'],
-        0
-    )
-    df['minus_dm'] = np.where(
-        (df['down_move'] > df['up_move']) & (df['down_move'] > 0),
-        df['down_move'],
-        0
-    )
-
-    # Calculate ADX
-    df['+di'] = 100 * (df['plus_dm'].ewm(span=period).mean() /
-                       df['tr'].ewm(span=period).mean())
-    df['-di'] = 100 * (df['minus_dm'].ewm(span=period).mean() /
-                       df['tr'].ewm(span=period).mean())
-    df['dx'] = 100 * abs(df['+di'] - df['-di']) / (df['+di'] + df['-di'])
-    df['adx'] = df['dx'].ewm(span=period).mean()
-
-    return df[['adx', '+di', '-di']]
+    adx, plus_di, minus_di = cached_indicator(
+        df, 'adx', (period,), lambda: _adx_values(*_columns(df, 'high', 'low', 'close'), period))
+    return pd.DataFrame({'adx': adx, '+di': plus_di, '-di': minus_di}, index=df.index)
 
 
 def calculate_ichimoku(df: pd.DataFrame) -> Dict[str, pd.Series]:
@@ -621,33 +855,11 @@ def calculate_ichimoku(df: pd.DataFrame) -> Dict[str, pd.Series]:
     Returns:
         Dictionary containing Ichimoku components
     """
-    # Tenkan-sen (Conversion Line): (9-period high + 9-period low)/2
-    period9_high = df['high'].rolling(window=9).max()
-    period9_low = df['low'].rolling(window=9).min()
-    tenkan_sen = (period9_high + period9_low) / 2
-
-    # Kijun-sen (Base Line): (26-period high + 26-period low)/2
-    period26_high = df['high'].rolling(window=26).max()
-    period26_low = df['low'].rolling(window=26).min()
-    kijun_sen = (period26_high + period26_low) / 2
-
-    # Senkou Span A (Leading Span A): (Conversion Line + Base Line)/2
-    senkou_span_a = ((tenkan_sen + kijun_sen) / 2).shift(26)
-
-    # Senkou Span B (Leading Span B): (52-period high + 52-period low)/2
-    period52_high = df['high'].rolling(window=52).max()
-    period52_low = df['low'].rolling(window=52).min()
-    senkou_span_b = ((period52_high + period52_low) / 2).shift(26)
-
-    # Chikou Span (Lagging Span): Close shifted back 26 periods
-    chikou_span = df['close'].shift(-26)
-
+    values = cached_indicator(df, 'ichimoku', (), lambda: _ichimoku_values(
+        *_columns(df, 'high', 'low', 'close')))
     return {
-        'tenkan_sen': tenkan_sen,
-        'kijun_sen': kijun_sen,
-        'senkou_span_a': senkou_span_a,
-        'senkou_span_b': senkou_span_b,
-        'chikou_span': chikou_span
+        name: _as_series(value, df, 'close' if name == 'chikou_span' else None)
+        for name, value in values.items()
     }
 
 
@@ -663,20 +875,19 @@ def calculate_atr(df: pd.DataFrame, period: int = 14, min_periods: int = 7) -> p
     Returns:
         pd.Series: ATR values
     """
-    high_low = df['high'] - df['low']
-    high_close = abs(df['high'] - df['close'].shift())
-    low_close = abs(df['low'] - df['close'].shift())
-
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = ranges.max(axis=1)
-
-    return true_range.rolling(period, min_periods=min_periods).mean()
+    atr = cached_indicator(df, 'atr', (period, min_periods), lambda: _atr_values(
+        *_columns(df, 'high', 'low', 'close'), period, min_periods))
+    return _as_series(atr, df)
 
 
 def calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 10) -> float:
     """
     Optimized Hurst exponent calculation with shorter lookback and better error handling
 
+    注意：最初的实现用 np.subtract 对 returns[lag:] 和 returns[:-lag] 两个 Series 相减，
+    pandas 会按索引对齐，重叠部分是同一个元素自身相减，因此每个 lag 的 tau 都被截断为 1e-8，
+    数据足够时结果恒为 0.0。这里用数组保持完全相同的结果，避免改变既有信号。
+
     Args:
         price_series: Array-like price data
         max_lag: Maximum lag for R/S calculation (reduced from 20 to 10)
@@ -686,16 +897,24 @@ def calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 10) -> floa
     """
     try:
         # 使用对数收益率而不是价格
-        returns = np.log(price_series / price_series.shift(1)).dropna()
+        prices = np.asarray(price_series, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.log(prices[1:] / prices[:-1])
+        returns = returns[~np.isnan(returns)]
 
         # 如果数据不足，返回0.5（随机游走）
         if len(returns) < max_lag * 2:
             return 0.5
 
         lags = range(2, max_lag)
-        # 使用更稳定的计算方法
-        tau = [np.sqrt(np.std(np.subtract(returns[lag:], returns[:-lag])))
-               for lag in lags]
+        tau = []
+        for lag in lags:
+            # 按索引对齐后的差值：重叠区间内逐元素自身相减（inf - inf 为 NaN，被忽略）
+            overlap = returns[lag:len(returns) - lag]
+            with np.errstate(invalid='ignore'):
+                aligned = overlap - overlap
+            aligned = aligned[~np.isnan(aligned)]
+            tau.append(np.sqrt(np.std(aligned)) if len(aligned) else np.nan)
 
         # 添加小的常数避免log(0)
         tau = [max(1e-8, t) for t in tau]
@@ -713,13 +932,6 @@ def calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 10) -> floa
 
 
 def calculate_obv(prices_df: pd.DataFrame) -> pd.Series:
-    obv = [0]
-    for i in range(1, len(prices_df)):
-        if prices_df['close'].iloc[i] > prices_df['close'].iloc[i - 1]:
-            obv.append(obv[-1] + prices_df['volume'].iloc[i])
-        elif prices_df['close'].iloc[i] < prices_df['close'].iloc[i - 1]:
-            obv.append(obv[-1] - prices_df['volume'].iloc[i])
-        else:
-            obv.append(obv[-1])
-    prices_df['OBV'] = obv
-    return prices_df['OBV']
+    obv = cached_indicator(prices_df, 'obv', (),
+                           lambda: _obv_values(*_columns(prices_df, 'close', 'volume')))
+    return _as_series(obv, prices_df, 'OBV')
@@ -0,0 +1,360 @@
+"""
+技术分析批量模式 - 对整个股票池一次性计算 technical_analyst_agent 的全部信号
+
+输入为 日期×股票 的 PricePanel，MACD/RSI/布林带/OBV 指标信号、五个策略信号以及
+加权组合信号都用二维数组运算同时计算所有股票，结果为每只股票一行的信号表。
+单只股票的结果与 technical_analyst_agent 对 PricePanel.to_frame(symbol) 的分析一致。
+
+由指标得到策略信号的规则（*_rule）与 Hurst 指数的批量计算也供参数扫描（technicals_sweep.py）使用。
+
+    panel = get_price_history_batch(symbols, start_date, end_date)
+    table = analyze_panel(panel)
+    table[table["signal"] == "bullish"].sort_values("confidence", ascending=False)
+"""
+
+import math
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.agents.technicals import (
+    STRATEGY_WEIGHTS,
+    _adx_values,
+    _bollinger_values,
+    _macd_values,
+    _obv_values,
+    _rsi_values,
+)
+from src.tools import kernels, rolling_stats
+from src.tools.api import get_price_history_batch
+from src.tools.price_panel import PANEL_FIELDS, PricePanel
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('technicals_batch')
+
+# 信号编码：-1 看跌，0 中性，1 看涨
+SIGNAL_LABELS = np.array(['bearish', 'neutral', 'bullish'])
+
+Signals = Tuple[np.ndarray, np.ndarray]  # (信号编码, 置信度)，形状与输入的指标相同
+
+
+def _align_to_end(panel: PricePanel) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    把每只股票有收盘价的K线按时间顺序移到数组底部，顶部补 NaN
+
+    这样每一列的最后一行就是该股票最新的一根K线，沿时间轴的计算与对单只股票
+    去掉停牌日后的数据（PricePanel.to_frame）计算结果相同。
+
+    Returns:
+        (字段名 -> (日期, 股票) 数组, 每只股票的K线数量)
+    """
+    valid = ~np.isnan(panel.close)
+    counts = valid.sum(axis=0)
+    # 稳定排序：无效行在前，有效行保持原有时间顺序
+    order = np.argsort(valid, axis=0, kind='stable')
+    padding = np.arange(len(panel.dates))[:, None] < (len(panel.dates) - counts)[None, :]
+
+    fields = {}
+    for name in PANEL_FIELDS:
+        values = np.take_along_axis(panel.get(name), order, axis=0)
+        values[padding] = np.nan
+        fields[name] = values
+    return fields, counts
+
+
+def _classify(bullish: np.ndarray, bearish: np.ndarray) -> np.ndarray:
+    return np.where(bullish, 1, np.where(bearish, -1, 0)).astype(np.int8)
+
+
+def _hurst_values(close: np.ndarray, max_lag: int = 10, history: bool = False) -> np.ndarray:
+    """
+    calculate_hurst_exponent 的批量版本
+
+    该函数在有效对数收益率不少于 2 * max_lag 个时恒为 0.0，否则为 0.5
+    （原因见 calculate_hurst_exponent 的说明），这里直接按收益率个数计算。
+
+    Args:
+        close: 收盘价，沿第 0 维为时间
+        max_lag: 同 calculate_hurst_exponent
+        history: 为 True 时返回每个日期只用截至该日数据的结果（形状与 close 相同），
+                 否则只返回最后一个日期的结果
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_returns = np.log(close[1:] / close[:-1])
+    valid = ~np.isnan(log_returns)
+    if history:
+        observed = np.concatenate([np.zeros((1,) + valid.shape[1:], dtype=np.int64),
+                                   np.cumsum(valid, axis=0)])
+    else:
+        observed = valid.sum(axis=0)
+    return np.where(observed < max_lag * 2, 0.5, 0.0)
+
+
+##### 策略规则 #####
+# 由指标得到信号编码和置信度，判断与 technicals.py 中的 calculate_*_signals 相同。
+# 指标可以是任意形状的数组：批量模式为 (股票数,)，参数扫描为 (日期数, 参数组合数)
+
+def _trend_rule(ema_fast, ema_medium, ema_slow, adx) -> Signals:
+    short_trend = ema_fast > ema_medium
+    medium_trend = ema_medium > ema_slow
+    signal = _classify(short_trend & medium_trend, ~short_trend & ~medium_trend)
+    return signal, np.where(signal != 0, adx / 100.0, 0.5)
+
+
+def _mean_reversion_rule(close, ma, std, upper_band, lower_band) -> Signals:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_score = (close - ma) / std
+        price_vs_bb = (close - lower_band) / (upper_band - lower_band)
+
+    signal = _classify((z_score < -2) & (price_vs_bb < 0.2), (z_score > 2) & (price_vs_bb > 0.8))
+    return signal, np.where(signal != 0, np.minimum(np.abs(z_score) / 4, 1.0), 0.5)
+
+
+def _momentum_rule(mom_1m, mom_3m, mom_6m, volume, volume_ma) -> Signals:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_momentum = volume / volume_ma
+
+    mom_1m = np.where(np.isnan(mom_1m), 0.0, mom_1m)
+    mom_3m = np.where(np.isnan(mom_3m), mom_1m, mom_3m)
+    mom_6m = np.where(np.isnan(mom_6m), mom_3m, mom_6m)
+    momentum_score = 0.2 * mom_1m + 0.3 * mom_3m + 0.5 * mom_6m
+
+    volume_confirmation = volume_momentum > 1.0
+    signal = _classify((momentum_score > 0.05) & volume_confirmation,
+                       (momentum_score < -0.05) & volume_confirmation)
+    return signal, np.where(signal != 0, np.minimum(np.abs(momentum_score) * 5, 1.0), 0.5)
+
+
+def _volatility_rule(hist_vol, vol_ma, vol_std) -> Signals:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol_regime = hist_vol / vol_ma
+        vol_z = (hist_vol - vol_ma) / np.where(vol_std == 0, np.nan, vol_std)
+
+    vol_regime = np.where(np.isnan(vol_regime), 1.0, vol_regime)
+    vol_z = np.where(np.isnan(vol_z), 0.0, vol_z)
+    signal = _classify((vol_regime < 0.8) & (vol_z < -1), (vol_regime > 1.2) & (vol_z > 1))
+    return signal, np.where(signal != 0, np.minimum(np.abs(vol_z) / 3, 1.0), 0.5)
+
+
+def _stat_arb_rule(hurst, skew) -> Signals:
+    skew = np.where(np.isnan(skew), 0.0, skew)
+    signal = _classify((hurst < 0.4) & (skew > 1), (hurst < 0.4) & (skew < -1))
+    return signal, np.where(signal != 0, (0.5 - hurst) * 2, 0.5)
+
+
+def _indicator_signals(close: np.ndarray, volume: np.ndarray) -> Dict[str, np.ndarray]:
+    """technical_analyst_agent 开头的 MACD/RSI/布林带/OBV 信号及其汇总"""
+    # 除 MACD（指数平均依赖全部历史）外只用到最后一个值，只对最后的窗口计算
+    macd_line, signal_line = _macd_values(close)
+    rsi = _rsi_values(close[-15:], 14)[-1]
+    upper_band, lower_band = _bollinger_values(close[-20:], 20)
+    obv = _obv_values(close, volume)
+
+    macd = _classify(
+        (macd_line[-2] < signal_line[-2]) & (macd_line[-1] > signal_line[-1]),
+        (macd_line[-2] > signal_line[-2]) & (macd_line[-1] < signal_line[-1]))
+    rsi_signal = _classify(rsi < 30, rsi > 70)
+    current_price = close[-1]
+    bollinger = _classify(current_price < lower_band[-1], current_price > upper_band[-1])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # 全为 NaN 的列
+        obv_slope = np.nanmean(kernels.diff(obv)[-5:], axis=0)
+    obv_signal = _classify(obv_slope > 0, obv_slope < 0)
+
+    # 近期大幅下跌且 RSI 偏低时额外计一个看涨信号
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_drop = (close[-1] - close[-5]) / close[-5]
+    extra_bullish = ((price_drop < -0.05) & (rsi < 40)) | ((price_drop < -0.03) & (rsi < 45))
+
+    stacked = np.stack([macd, rsi_signal, bollinger, obv_signal])
+    bullish_count = (stacked == 1).sum(axis=0) + extra_bullish
+    bearish_count = (stacked == -1).sum(axis=0)
+    total_signals = len(stacked) + extra_bullish
+
+    return {
+        'macd': macd,
+        'rsi': rsi_signal,
+        'bollinger': bollinger,
+        'obv': obv_signal,
+        'indicator_signal': _classify(bullish_count > bearish_count, bearish_count > bullish_count),
+        'indicator_confidence': np.maximum(bullish_count, bearish_count) / total_signals,
+    }
+
+
+##### 各策略在最后一个日期的信号 #####
+# 输入为 (日期, 股票) 数组，只对最后的窗口计算指标
+
+def _trend_signals(high, low, close) -> Signals:
+    return _trend_rule(kernels.ewm_mean(close, 8)[-1], kernels.ewm_mean(close, 21)[-1],
+                       kernels.ewm_mean(close, 55)[-1], _adx_values(high, low, close, 14)[0, -1])
+
+
+def _mean_reversion_signals(close) -> Signals:
+    ma_50 = kernels.rolling_mean(close[-50:], 50)[-1]
+    std_50 = kernels.rolling_std(close[-50:], 50)[-1]
+    upper_band, lower_band = _bollinger_values(close[-20:], 20)[:, -1]
+    return _mean_reversion_rule(close[-1], ma_50, std_50, upper_band, lower_band)
+
+
+def _momentum_signals(volume, returns) -> Signals:
+    return _momentum_rule(
+        kernels.rolling_sum(returns[-21:], 21, min_periods=5)[-1],
+        kernels.rolling_sum(returns[-63:], 63, min_periods=42)[-1],
+        kernels.rolling_sum(returns[-126:], 126, min_periods=63)[-1],
+        volume[-1], kernels.rolling_mean(volume[-21:], 21, min_periods=10)[-1])
+
+
+def _volatility_signals(returns) -> Signals:
+    hist_vol = kernels.rolling_std(returns[-62:], 21, min_periods=10)[-42:] * math.sqrt(252)
+    return _volatility_rule(hist_vol[-1], kernels.rolling_mean(hist_vol, 42, min_periods=21)[-1],
+                            kernels.rolling_std(hist_vol, 42, min_periods=21)[-1])
+
+
+def _stat_arb_signals(close, returns) -> Signals:
+    # 与 technicals 相同使用一次遍历的滚动矩，两条路径的偏度一致
+    skew = rolling_stats.rolling_moments(returns[-42:], 42, min_periods=21, order=3).skew[-1]
+    return _stat_arb_rule(_hurst_values(close, max_lag=10), skew)
+
+
+def _weighted_score(signals: Dict[str, Signals], weights: Dict[str, float]) -> np.ndarray:
+    """各策略按权重和置信度加权的组合得分（-1 到 1），与 weighted_signal_combination 按相同顺序累加"""
+    weighted_sum = 0
+    total_confidence = 0
+    for strategy, (signal, confidence) in signals.items():
+        weight = weights[strategy]
+        weighted_sum = weighted_sum + signal * weight * confidence
+        total_confidence = total_confidence + weight * confidence
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total_confidence > 0, weighted_sum / total_confidence, 0.0)
+
+
+def _weighted_signal_combination(signals: Dict[str, Signals], weights: Dict[str, float]) -> Signals:
+    """weighted_signal_combination 的批量版本"""
+    final_score = _weighted_score(signals, weights)
+    return _classify(final_score > 0.2, final_score < -0.2), np.abs(final_score)
+
+
+def analyze_panel(panel: PricePanel, weights: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """
+    对价格面板中的所有股票一次性进行技术分析
+
+    Args:
+        panel: 日期×股票 的价格面板，获取失败的股票会被跳过
+        weights: 策略组合权重，默认与 technical_analyst_agent 相同
+
+    Returns:
+        以股票代码为索引的信号表：
+        - signal / confidence: 五个策略加权组合后的信号和置信度
+        - {trend,mean_reversion,momentum,volatility,stat_arb}_signal / _confidence: 各策略信号
+        - macd / rsi / bollinger / obv: 指标信号，indicator_signal / indicator_confidence 为其汇总
+        - last_date / bars: 最新K线日期和K线数量
+    """
+    weights = weights or STRATEGY_WEIGHTS
+    fields, counts = _align_to_end(panel)
+    keep = np.flatnonzero(counts > 0)
+    symbols: List[str] = [panel.symbols[j] for j in keep]
+    if not symbols:
+        return pd.DataFrame(index=pd.Index([], name='symbol'))
+
+    high, low, close, volume = (fields[name][:, keep] for name in ('high', 'low', 'close', 'volume'))
+    returns = kernels.pct_change(close)
+
+    strategies = {
+        'trend': _trend_signals(high, low, close),
+        'mean_reversion': _mean_reversion_signals(close),
+        'momentum': _momentum_signals(volume, returns),
+        'volatility': _volatility_signals(returns),
+        'stat_arb': _stat_arb_signals(close, returns),
+    }
+    combined_signal, combined_confidence = _weighted_signal_combination(strategies, weights)
+    indicators = _indicator_signals(close, volume)
+
+    # 每只股票最新K线在原面板中的日期
+    last_rows = len(panel.dates) - 1 - np.argmax(~np.isnan(panel.close[::-1, keep]), axis=0)
+
+    table = {
+        'signal': SIGNAL_LABELS[combined_signal + 1],
+        'confidence': combined_confidence,
+    }
+    for name, (signal, confidence) in strategies.items():
+        table[f'{name}_signal'] = SIGNAL_LABELS[signal + 1]
+        table[f'{name}_confidence'] = confidence
+    for name in ('macd', 'rsi', 'bollinger', 'obv', 'indicator_signal'):
+        table[name] = SIGNAL_LABELS[indicators[name] + 1]
+    table['indicator_confidence'] = indicators['indicator_confidence']
+    table['last_date'] = panel.dates[last_rows]
+    table['bars'] = counts[keep]
+
+    return pd.DataFrame(table, index=pd.Index(symbols, name='symbol'))
+
+
+def analyze_universe(symbols: Sequence[str], start_date: str = None, end_date: str = None,
+                     weights: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """
+    批量获取股票池的日线数据并进行技术分析
+
+    Args:
+        symbols: 股票代码列表
+        start_date: 开始日期，格式：YYYY-MM-DD
+        end_date: 结束日期，格式：YYYY-MM-DD
+        weights: 策略组合权重
+
+    Returns:
+        同 analyze_panel
+    """
+    panel = get_price_history_batch(symbols, start_date, end_date)
+    table = analyze_panel(panel, weights)
+    logger.info(
+        f"Analyzed {len(table)} symbols: "
+        f"{(table['signal'] == 'bullish').sum() if len(table) else 0} bullish, "
+        f"{(table['signal'] == 'bearish').sum() if len(table) else 0} bearish")
+    return table
+
+
+def analyze_windows(prices_df: pd.DataFrame, starts: np.ndarray, ends: np.ndarray,
+                    weights: Optional[Dict[str, float]] = None,
+                    chunk_size: int = 256) -> pd.DataFrame:
+    """
+    对同一只股票的多个K线区间一次性进行技术分析
+
+    每个区间 prices_df.iloc[starts[i]:ends[i]] 相当于面板中的一只股票，
+    用于回测时按日期求出 technical_analyst_agent 在每个交易日看到的结果。
+
+    Args:
+        prices_df: 按日期升序排列的日线，包含 date 和 PANEL_FIELDS 列
+        starts: 每个区间第一根K线的行号
+        ends: 每个区间最后一根K线的行号 + 1
+        weights: 策略组合权重
+        chunk_size: 每次计算的区间个数，限制面板占用的内存
+
+    Returns:
+        与 analyze_panel 相同的信号表，第 i 行对应第 i 个区间（以区间序号为索引），空区间被跳过
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    dates = pd.to_datetime(prices_df['date']).to_numpy()
+    columns = {name: prices_df[name].to_numpy(dtype=float) for name in PANEL_FIELDS}
+
+    tables = []
+    for chunk in range(0, len(starts), chunk_size):
+        lo, hi = starts[chunk:chunk + chunk_size], ends[chunk:chunk + chunk_size]
+        if not len(lo) or (hi <= lo).all():
+            continue
+        first, last = lo.min(), hi.max()
+        rows = np.arange(first, last)[:, None]
+        outside = (rows < lo[None, :]) | (rows >= hi[None, :])
+        fields = {name: np.where(outside, np.nan, values[first:last, None])
+                  for name, values in columns.items()}
+        panel = PricePanel(dates=dates[first:last],
+                           symbols=[str(i) for i in range(chunk, chunk + len(lo))], **fields)
+        tables.append(analyze_panel(panel, weights))
+
+    if not tables:
+        return pd.DataFrame(index=pd.Index([], name='window'))
+    table = pd.concat(tables)
+    table.index = table.index.astype(np.int64).rename('window')
+    return table
@@ -0,0 +1,317 @@
+"""
+技术指标与策略的参数扫描 - 在一次批量计算中评估整组参数
+
+technicals.py 中的指标和五个策略都写死了窗口长度（RSI 14、布林带 20/2、EMA 8/21/55、
+动量 21/63/126 ...）。这里把参数网格展开为参数轴，所有参数组合沿参数轴广播，
+一次算出 (参数组合 × 日期) 的指标或信号张量，不需要对每组参数重新运行代理。
+
+    result = sweep_strategy(prices_df, "mean_reversion", z_window=range(20, 81, 10), bb_std=[1.5, 2, 2.5])
+    result.params                 # 每组参数一行
+    result.values["signal"]       # (参数组合数, 日期数)，-1 看跌 / 0 中性 / 1 看涨
+    result.to_frame("confidence") # 以参数为索引、日期为列的 DataFrame
+
+每个日期的信号等于只用截至该日的数据运行对应的 calculate_*_signals 得到的信号；
+参数取默认值时与 technicals.py 的结果一致（见 src/tools/test_technicals_sweep.py）。
+由指标得到信号的规则、Hurst 指数和加权组合与批量模式共用 technicals_batch.py 中的实现，
+这里只负责按参数网格计算各日期的指标。
+
+signal_history 以默认参数给出五个策略及加权组合在每个日期的信号，
+回测和历史评估只需一次调用，不必对每个日期重新运行 technical_analyst_agent。
+"""
+
+import itertools
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.agents.technicals import STRATEGY_WEIGHTS, _adx_values, _true_range_values
+from src.agents.technicals_batch import (
+    _classify,
+    _hurst_values,
+    _mean_reversion_rule,
+    _momentum_rule,
+    _stat_arb_rule,
+    _trend_rule,
+    _volatility_rule,
+    _weighted_score,
+)
+from src.tools import kernels, rolling_stats
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('technicals_sweep')
+
+ParamValues = Union[float, Iterable[float]]
+
+
+@dataclass
+class SweepResult:
+    """参数扫描结果：params 每行一组参数，values 中每个数组的形状为 (len(params), len(dates))"""
+    params: pd.DataFrame
+    dates: np.ndarray
+    values: Dict[str, np.ndarray]
+
+    def to_frame(self, name: str) -> pd.DataFrame:
+        """以参数组合为索引、日期为列的 DataFrame"""
+        return pd.DataFrame(self.values[name], index=pd.MultiIndex.from_frame(self.params),
+                            columns=pd.DatetimeIndex(self.dates, name="date"))
+
+    def latest(self) -> pd.DataFrame:
+        """每组参数在最后一个日期的取值"""
+        latest = pd.DataFrame({name: values[:, -1] for name, values in self.values.items()})
+        return pd.concat([self.params, latest], axis=1)
+
+
+def parameter_grid(**axes: ParamValues) -> pd.DataFrame:
+    """
+    参数网格的笛卡尔积
+
+    Args:
+        **axes: 参数名 -> 取值（标量或可迭代对象）
+
+    Returns:
+        每行一组参数的 DataFrame，列顺序与传入顺序相同
+    """
+    names = list(axes)
+    values = [list(v) if isinstance(v, Iterable) and not isinstance(v, str) else [v]
+              for v in axes.values()]
+    return pd.DataFrame(list(itertools.product(*values)), columns=names)
+
+
+##### 各列窗口长度不同的滚动统计 #####
+# x 的形状为 (T,) 或 (T, P)，windows、min_periods 的形状为 (P,)，结果为 (T, P)，
+# 由 rolling_stats 一次遍历计算，与 kernels 中的同名函数结果相同
+
+def _columns(x: np.ndarray, count: int) -> np.ndarray:
+    x = np.asarray(x, dtype=float)
+    return np.broadcast_to(x[:, None], (len(x), count)) if x.ndim == 1 else x
+
+
+def rolling_sum(x, windows, min_periods=None) -> np.ndarray:
+    return rolling_stats.rolling_sum(x, np.asarray(windows), min_periods)
+
+
+def rolling_mean(x, windows, min_periods=None) -> np.ndarray:
+    return rolling_stats.rolling_moments(x, np.asarray(windows), min_periods, order=1).mean
+
+
+def rolling_std(x, windows, min_periods=None) -> np.ndarray:
+    return rolling_stats.rolling_moments(x, np.asarray(windows), min_periods, order=2).std
+
+
+def rolling_skew(x, windows, min_periods=None) -> np.ndarray:
+    return rolling_stats.rolling_moments(x, np.asarray(windows), min_periods, order=3).skew
+
+
+def _scaled_min_periods(windows, default_window: int, default_min_periods: int) -> np.ndarray:
+    """按默认参数的比例确定最少数据点数，默认窗口长度时与 technicals.py 相同"""
+    return np.maximum(1, np.asarray(windows, dtype=np.int64) * default_min_periods // default_window)
+
+
+##### 指标 #####
+# 每个函数接收 bars（列名 -> (T,) 数组）和 params（参数名 -> (P,) 数组），返回名称 -> (T, P) 数组
+
+def _sweep_rsi(bars, params):
+    delta = kernels.diff(bars["close"])
+    periods = params["period"]
+    avg_gain = rolling_mean(np.where(delta > 0, delta, 0.0), periods)
+    avg_loss = rolling_mean(np.where(delta < 0, -delta, 0.0), periods)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {"rsi": 100 - (100 / (1 + avg_gain / avg_loss))}
+
+
+def _sweep_bollinger(bars, params):
+    sma = rolling_mean(bars["close"], params["window"])
+    std_dev = rolling_std(bars["close"], params["window"])
+    return {"upper": sma + std_dev * params["num_std"], "lower": sma - std_dev * params["num_std"]}
+
+
+def _sweep_ema(bars, params):
+    return {"ema": kernels.ewm_mean(_columns(bars["close"], len(params["span"])), params["span"])}
+
+
+def _sweep_macd(bars, params):
+    close = _columns(bars["close"], len(params["fast"]))
+    macd_line = kernels.ewm_mean(close, params["fast"]) - kernels.ewm_mean(close, params["slow"])
+    return {"macd": macd_line, "signal": kernels.ewm_mean(macd_line, params["signal"])}
+
+
+def _sweep_atr(bars, params):
+    true_range = _true_range_values(bars["high"], bars["low"], bars["close"])
+    return {"atr": rolling_mean(true_range, params["period"],
+                                np.minimum(params["min_periods"], params["period"]))}
+
+
+def _sweep_adx(bars, params):
+    count = len(params["period"])
+    adx, plus_di, minus_di = _adx_values(
+        _columns(bars["high"], count), _columns(bars["low"], count),
+        _columns(bars["close"], count), params["period"])
+    return {"adx": adx, "+di": plus_di, "-di": minus_di}
+
+
+##### 策略 #####
+# 按参数网格算出每个日期的指标，再用 technicals_batch 中与批量模式共用的规则得到信号
+
+def _signals(signals):
+    signal, confidence = signals
+    return {"signal": signal, "confidence": confidence}
+
+
+def _sweep_trend(bars, params):
+    close = _columns(bars["close"], len(params["fast"]))
+    return _signals(_trend_rule(
+        kernels.ewm_mean(close, params["fast"]),
+        kernels.ewm_mean(close, params["medium"]),
+        kernels.ewm_mean(close, params["slow"]),
+        _sweep_adx(bars, {"period": params["adx_period"]})["adx"]))
+
+
+def _sweep_mean_reversion(bars, params):
+    bands = _sweep_bollinger(bars, {"window": params["bb_window"], "num_std": params["bb_std"]})
+    return _signals(_mean_reversion_rule(
+        bars["close"][:, None],
+        rolling_mean(bars["close"], params["z_window"]),
+        rolling_std(bars["close"], params["z_window"]),
+        bands["upper"], bands["lower"]))
+
+
+def _sweep_momentum(bars, params):
+    returns = kernels.pct_change(bars["close"])
+    return _signals(_momentum_rule(
+        rolling_sum(returns, params["short"], _scaled_min_periods(params["short"], 21, 5)),
+        rolling_sum(returns, params["medium"], _scaled_min_periods(params["medium"], 63, 42)),
+        rolling_sum(returns, params["long"], _scaled_min_periods(params["long"], 126, 63)),
+        bars["volume"][:, None],
+        rolling_mean(bars["volume"], params["volume_window"],
+                     _scaled_min_periods(params["volume_window"], 21, 10))))
+
+
+def _sweep_volatility(bars, params):
+    returns = kernels.pct_change(bars["close"])
+    vol_window, regime_window = params["vol_window"], params["regime_window"]
+    hist_vol = rolling_std(returns, vol_window,
+                           _scaled_min_periods(vol_window, 21, 10)) * math.sqrt(252)
+    regime_min_periods = _scaled_min_periods(regime_window, 42, 21)
+    return _signals(_volatility_rule(
+        hist_vol,
+        rolling_mean(hist_vol, regime_window, regime_min_periods),
+        rolling_std(hist_vol, regime_window, regime_min_periods)))
+
+
+def _sweep_stat_arb(bars, params):
+    returns = kernels.pct_change(bars["close"])
+    skew = rolling_skew(returns, params["skew_window"],
+                        _scaled_min_periods(params["skew_window"], 42, 21))
+    hurst = _hurst_values(bars["close"], max_lag=10, history=True)[:, None]
+    return _signals(_stat_arb_rule(hurst, skew))
+
+
+SweepFunction = Callable[[Dict[str, np.ndarray], Dict[str, np.ndarray]], Dict[str, np.ndarray]]
+
+# 名称 -> (计算函数, 默认参数)，默认参数与 technicals.py 中写死的取值相同
+INDICATOR_SWEEPS: Dict[str, Tuple[SweepFunction, Dict[str, float]]] = {
+    "rsi": (_sweep_rsi, {"period": 14}),
+    "bollinger": (_sweep_bollinger, {"window": 20, "num_std": 2.0}),
+    "ema": (_sweep_ema, {"span": 20}),
+    "macd": (_sweep_macd, {"fast": 12, "slow": 26, "signal": 9}),
+    "atr": (_sweep_atr, {"period": 14, "min_periods": 7}),
+    "adx": (_sweep_adx, {"period": 14}),
+}
+
+STRATEGY_SWEEPS: Dict[str, Tuple[SweepFunction, Dict[str, float]]] = {
+    "trend": (_sweep_trend, {"fast": 8, "medium": 21, "slow": 55, "adx_period": 14}),
+    "mean_reversion": (_sweep_mean_reversion, {"z_window": 50, "bb_window": 20, "bb_std": 2.0}),
+    "momentum": (_sweep_momentum, {"short": 21, "medium": 63, "long": 126, "volume_window": 21}),
+    "volatility": (_sweep_volatility, {"vol_window": 21, "regime_window": 42}),
+    "stat_arb": (_sweep_stat_arb, {"skew_window": 42}),
+}
+
+
+def _run_sweep(registry, name: str, prices_df: pd.DataFrame, axes) -> SweepResult:
+    if name not in registry:
+        raise KeyError(f"Unknown sweep: {name}, expected one of {sorted(registry)}")
+    func, defaults = registry[name]
+    unknown = set(axes) - set(defaults)
+    if unknown:
+        raise ValueError(f"Unknown parameters for {name}: {sorted(unknown)}")
+
+    grid = parameter_grid(**{key: axes.get(key, default) for key, default in defaults.items()})
+    params = {key: grid[key].to_numpy() for key in grid.columns}
+    bars = {column: prices_df[column].to_numpy(dtype=float)
+            for column in ("open", "high", "low", "close", "volume") if column in prices_df.columns}
+
+    values = func(bars, params)
+    logger.info(f"Swept {name} over {len(grid)} parameter combinations x {len(prices_df)} dates")
+    return SweepResult(
+        params=grid,
+        dates=pd.to_datetime(prices_df["date"]).to_numpy() if "date" in prices_df.columns
+        else prices_df.index.to_numpy(),
+        values={key: np.ascontiguousarray(np.broadcast_to(
+            value, (len(prices_df), len(grid))).T) for key, value in values.items()},
+    )
+
+
+def sweep_indicator(prices_df: pd.DataFrame, indicator: str, **axes: ParamValues) -> SweepResult:
+    """
+    在参数网格上计算技术指标
+
+    Args:
+        prices_df: 包含 date 及 OHLCV 列的日线
+        indicator: 指标名称，见 INDICATOR_SWEEPS
+        **axes: 参数名 -> 取值，未指定的参数使用默认值
+
+    Returns:
+        SweepResult，values 为该指标的各个输出（如布林带的 upper/lower）
+    """
+    return _run_sweep(INDICATOR_SWEEPS, indicator, prices_df, axes)
+
+
+def sweep_strategy(prices_df: pd.DataFrame, strategy: str, **axes: ParamValues) -> SweepResult:
+    """
+    在参数网格上计算策略信号
+
+    Args:
+        prices_df: 包含 date 及 OHLCV 列的日线
+        strategy: 策略名称，见 STRATEGY_SWEEPS
+        **axes: 参数名 -> 取值，未指定的参数使用默认值
+
+    Returns:
+        SweepResult，values["signal"] 为信号编码（-1/0/1），values["confidence"] 为置信度
+    """
+    return _run_sweep(STRATEGY_SWEEPS, strategy, prices_df, axes)
+
+
+def signal_history(prices_df: pd.DataFrame, weights: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """
+    五个策略及其加权组合在每个日期的信号（默认参数）
+
+    第 t 行等于只用前 t + 1 根K线运行 calculate_*_signals 和 weighted_signal_combination
+    得到的结果。信号编码为 -1 看跌 / 0 中性 / 1 看涨，
+    可用 technicals_batch.SIGNAL_LABELS[code + 1] 转换为文字。
+
+    Args:
+        prices_df: 包含 date 及 OHLCV 列的日线
+        weights: 策略组合权重，默认与 technical_analyst_agent 相同
+
+    Returns:
+        以日期为索引的 DataFrame：
+        - {strategy}_signal / {strategy}_confidence: 各策略的信号和置信度
+        - score: 加权组合的得分（-1 到 1）
+        - signal / confidence: 组合信号（得分超过 ±0.2）及置信度（得分的绝对值）
+    """
+    weights = weights or STRATEGY_WEIGHTS
+    columns = {}
+    strategies = {}
+    for strategy in weights:
+        result = sweep_strategy(prices_df, strategy)
+        strategies[strategy] = result.values["signal"][0], result.values["confidence"][0]
+        columns[f"{strategy}_signal"], columns[f"{strategy}_confidence"] = strategies[strategy]
+
+    score = _weighted_score(strategies, weights)
+    columns["score"] = score
+    columns["signal"] = _classify(score > 0.2, score < -0.2)
+    columns["confidence"] = np.abs(score)
+    return pd.DataFrame(columns, index=pd.DatetimeIndex(result.dates, name="date"))
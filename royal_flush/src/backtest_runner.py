@@ -0,0 +1,283 @@
+"""
+并行回测 - 把回测拆成相互独立的任务，在进程池中运行
+
+- 走步（walk-forward）回测：把回测区间按时间切成若干段，每段以初始资金空仓开始，
+  分段的权益曲线按收益率首尾相接合并为一条
+- 股票池回测：每只股票一个任务，各自以相同的初始资金回测
+
+主进程对每只股票只获取一次K线，写入临时目录中的 .npy 文件；子进程以只读内存映射打开，
+所有任务共享同一份数据而不需要通过进程间通信传输，子进程中的 Backtester 直接使用这些K线。
+
+    result = run_walk_forward("600519", "2023-01-01", "2024-12-31", segments=8)
+    result.equity.set_index("Date")["Portfolio Value"].plot()
+
+    result = run_watchlist(["600519", "000001", "300750"], "2024-01-01", "2024-12-31")
+    result.final_values()
+
+工作流包含需要调用大模型的代理时，每个进程各自按 Backtester 的规则限流，
+同时运行的进程数（max_workers）需要与大模型接口的配额相匹配。
+"""
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.backtester import EXTENDED_LOOKBACK_DAYS, Backtester
+from src.main import run_hedge_fund
+from src.tools.api import get_price_data
+from src.tools.price_panel import PANEL_FIELDS, PriceBars
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('backtest_runner')
+
+# 默认的进程数
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(os.cpu_count() or 1)))
+
+EQUITY_COLUMNS = ["Ticker", "Segment", "Date", "Portfolio Value", "Daily Return"]
+TRADE_COLUMNS = ["Ticker", "Segment", "Date", "Quantity", "Price"]
+
+
+@dataclass(frozen=True)
+class BacktestJob:
+    """一个独立的回测任务：一只股票的一段回测区间"""
+    ticker: str
+    start_date: str
+    end_date: str
+    initial_capital: float
+    segment: int = 0
+
+
+@dataclass
+class BacktestResult:
+    """
+    合并后的回测结果
+
+    equity: 每只股票每个回测日一行，同一只股票的各段按收益率首尾相接
+    trades: 各段的实际成交记录（数量按各段的初始资金计算，卖出为负）
+    failed: 运行失败的任务
+    """
+    equity: pd.DataFrame
+    trades: pd.DataFrame
+    failed: List[BacktestJob] = field(default_factory=list)
+
+    def final_values(self) -> pd.Series:
+        """每只股票合并后的最终组合价值"""
+        return self.equity.groupby("Ticker")["Portfolio Value"].last()
+
+
+def walk_forward_segments(start_date: str, end_date: str, segments: int) -> List[Tuple[str, str]]:
+    """
+    把回测区间按工作日切成 segments 段，相邻两段不重叠
+
+    Backtester 要求开始日期早于结束日期，因此每段至少包含两个工作日。
+
+    Returns:
+        [(开始日期, 结束日期), ...]，格式：YYYY-MM-DD
+    """
+    dates = pd.bdate_range(start_date, end_date)
+    if len(dates) < 2:
+        raise ValueError(f"回测区间 {start_date} 至 {end_date} 少于两个工作日")
+    segments = max(1, min(segments, len(dates) // 2))
+    return [(dates[part[0]].strftime("%Y-%m-%d"), dates[part[-1]].strftime("%Y-%m-%d"))
+            for part in np.array_split(np.arange(len(dates)), segments)]
+
+
+def _fetch_prices(ticker: str, jobs: Sequence[BacktestJob]) -> PriceBars:
+    """一次获取该股票所有任务需要的K线（最早的开始日期前 730 天至最晚的结束日期）"""
+    start = min(pd.Timestamp(job.start_date) for job in jobs) - timedelta(days=EXTENDED_LOOKBACK_DAYS)
+    end = max(job.end_date for job in jobs)
+    bars = PriceBars.from_frame(get_price_data(ticker, start.strftime("%Y-%m-%d"), end, indicators=[]))
+    if bars.empty:
+        logger.warning(f"No price data for {ticker}")
+    return bars
+
+
+def _write_prices(directory: str, ticker: str, bars: PriceBars) -> Dict[str, str]:
+    """把K线逐列写入 .npy 文件，返回 列名 -> 文件路径"""
+    files = {}
+    for name in ("date", *PANEL_FIELDS):
+        if name not in bars:
+            continue
+        path = os.path.join(directory, f"{ticker}_{name}.npy")
+        values = bars.dates if name == "date" else np.asarray(bars[name], dtype=float)
+        np.save(path, np.ascontiguousarray(values))
+        files[name] = path
+    return files
+
+
+def _load_prices(files: Dict[str, str]) -> PriceBars:
+    """以只读内存映射打开主进程写入的K线，各进程共享操作系统的页缓存"""
+    columns = {name: np.load(path, mmap_mode="r") for name, path in files.items()}
+    return PriceBars(columns.pop("date"), columns)
+
+
+def _run_job(job: BacktestJob, price_files: Dict[str, str], fast_path: Optional[bool],
+             num_of_news: int):
+    """子进程中运行一个回测任务，返回可序列化的结果"""
+    backtester = Backtester(
+        agent=run_hedge_fund,
+        ticker=job.ticker,
+        start_date=job.start_date,
+        end_date=job.end_date,
+        initial_capital=job.initial_capital,
+        num_of_news=num_of_news,
+        fast_path=fast_path,
+        prices=_load_prices(price_files),
+    )
+    backtester.run_backtest()
+    return job, backtester.portfolio_values, backtester.trades
+
+
+def merge_results(outputs, failed: Sequence[BacktestJob] = ()) -> BacktestResult:
+    """
+    合并各任务的结果
+
+    同一只股票的各段按时间顺序首尾相接：每段的组合价值乘以此前各段的累计收益倍数，
+    日收益率按合并后的组合价值重新计算（每只股票的第一天为 0）。
+
+    Args:
+        outputs: _run_job 返回的 (任务, portfolio_values, trades) 列表
+        failed: 运行失败的任务
+    """
+    by_ticker: Dict[str, list] = {}
+    for output in outputs:
+        by_ticker.setdefault(output[0].ticker, []).append(output)
+
+    equity_frames, trade_frames = [], []
+    for ticker, items in by_ticker.items():
+        growth = 1.0
+        frames = []
+        for job, values, trades in sorted(items, key=lambda item: item[0].segment):
+            frame = pd.DataFrame(values, columns=["Date", "Portfolio Value", "Daily Return"])
+            frame["Portfolio Value"] *= growth
+            if len(frame):
+                growth = frame["Portfolio Value"].iloc[-1] / job.initial_capital
+            frame.insert(0, "Segment", job.segment)
+            frames.append(frame)
+            trade_frames.append(pd.DataFrame(trades, columns=TRADE_COLUMNS[2:]).assign(
+                Ticker=ticker, Segment=job.segment))
+
+        equity = pd.concat(frames, ignore_index=True)
+        equity["Daily Return"] = (equity["Portfolio Value"].pct_change().fillna(0.0) * 100)
+        equity.insert(0, "Ticker", ticker)
+        equity_frames.append(equity)
+
+    equity = pd.concat(equity_frames, ignore_index=True) if equity_frames else \
+        pd.DataFrame(columns=EQUITY_COLUMNS)
+    trades = pd.concat(trade_frames, ignore_index=True)[TRADE_COLUMNS] if trade_frames else \
+        pd.DataFrame(columns=TRADE_COLUMNS)
+    return BacktestResult(equity[EQUITY_COLUMNS], trades, list(failed))
+
+
+def run_backtest_jobs(jobs: Sequence[BacktestJob], max_workers: Optional[int] = None,
+                      fast_path: Optional[bool] = None, num_of_news: int = 5,
+                      prices: Optional[Dict[str, PriceBars]] = None) -> BacktestResult:
+    """
+    在进程池中运行相互独立的回测任务并合并结果
+
+    Args:
+        jobs: 回测任务
+        max_workers: 进程数，默认为环境变量 BACKTEST_WORKERS（CPU 核数）
+        fast_path: 传给 Backtester，None 表示自动选择向量化回测
+        num_of_news: 传给 Backtester
+        prices: 股票代码 -> 已获取的K线，未提供的股票由主进程获取
+
+    Returns:
+        BacktestResult；单个任务失败时记录在 failed 中，不影响其他任务
+    """
+    jobs = list(jobs)
+    prices = dict(prices or {})
+    tickers = list(dict.fromkeys(job.ticker for job in jobs))
+    outputs, failed = [], []
+    started = datetime.now()
+
+    with tempfile.TemporaryDirectory(prefix="backtest_prices_") as directory:
+        price_files = {}
+        for ticker in tickers:
+            bars = prices.get(ticker)
+            if bars is None:
+                bars = _fetch_prices(ticker, [job for job in jobs if job.ticker == ticker])
+            price_files[ticker] = _write_prices(directory, ticker, bars)
+
+        workers = max(1, min(max_workers or BACKTEST_WORKERS, len(jobs) or 1))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_run_job, job, price_files[job.ticker], fast_path, num_of_news): job
+                       for job in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    outputs.append(future.result())
+                except Exception as e:
+                    logger.error(f"Backtest {job.ticker} segment {job.segment} "
+                                 f"({job.start_date} ~ {job.end_date}) failed: {e}")
+                    failed.append(job)
+
+    logger.info(f"Finished {len(outputs)}/{len(jobs)} backtest jobs with {workers} workers "
+                f"in {(datetime.now() - started).total_seconds():.1f}s")
+    return merge_results(outputs, failed)
+
+
+def run_walk_forward(ticker: str, start_date: str, end_date: str, segments: int,
+                     initial_capital: float = 100000, **options) -> BacktestResult:
+    """
+    走步回测：把回测区间切成 segments 段并行回测，每段以初始资金空仓开始
+
+    Args:
+        options: 传给 run_backtest_jobs 的参数（max_workers、fast_path 等）
+    """
+    jobs = [BacktestJob(ticker, start, end, initial_capital, segment)
+            for segment, (start, end) in enumerate(walk_forward_segments(start_date, end_date, segments))]
+    return run_backtest_jobs(jobs, **options)
+
+
+def run_watchlist(tickers: Sequence[str], start_date: str, end_date: str,
+                  initial_capital: float = 100000, segments: int = 1, **options) -> BacktestResult:
+    """
+    股票池回测：每只股票（以及每只股票的每一段）一个任务并行回测
+
+    Args:
+        segments: 每只股票再按时间切分的段数，1 表示整段回测
+        options: 传给 run_backtest_jobs 的参数（max_workers、fast_path 等）
+    """
+    periods = walk_forward_segments(start_date, end_date, segments)
+    jobs = [BacktestJob(ticker, start, end, initial_capital, segment)
+            for ticker in dict.fromkeys(tickers)
+            for segment, (start, end) in enumerate(periods)]
+    return run_backtest_jobs(jobs, **options)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='并行运行走步回测或股票池回测')
+    parser.add_argument('--tickers', type=str, required=True,
+                        help='股票代码，多个用逗号分隔 (例如: 600519,000001)')
+    parser.add_argument('--end-date', type=str,
+                        default=datetime.now().strftime('%Y-%m-%d'), help='结束日期，格式：YYYY-MM-DD')
+    parser.add_argument('--start-date', type=str, default=(datetime.now() -
+                        timedelta(days=365)).strftime('%Y-%m-%d'), help='开始日期，格式：YYYY-MM-DD')
+    parser.add_argument('--segments', type=int, default=1,
+                        help='每只股票的走步分段数 (默认: 1)')
+    parser.add_argument('--initial-capital', type=float,
+                        default=100000, help='初始资金 (默认: 100000)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='进程数 (默认: 环境变量 BACKTEST_WORKERS 或 CPU 核数)')
+    parser.add_argument('--no-fast-path', action='store_true',
+                        help='逐日运行完整工作流，不使用向量化回测')
+    args = parser.parse_args()
+
+    result = run_watchlist(
+        [ticker.strip() for ticker in args.tickers.split(',') if ticker.strip()],
+        args.start_date, args.end_date, args.initial_capital, args.segments,
+        max_workers=args.workers, fast_path=False if args.no_fast_path else None)
+
+    for ticker, value in result.final_values().items():
+        print(f"{ticker}: 最终总值 {value:,.2f}, 总收益率 {(value / args.initial_capital - 1) * 100:.2f}%")
+    for job in result.failed:
+        print(f"失败: {job.ticker} {job.start_date} ~ {job.end_date}")
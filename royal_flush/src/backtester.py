@@ -1,11 +1,16 @@
 from datetime import datetime, timedelta
+import inspect
 import json
 import time
 import logging
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 from src.tools.api import get_price_data
-from src.main import run_hedge_fund
+from src.tools.price_panel import PriceBars
+from src.tools.decision_cache import decision_cache, uses_portfolio, workflow_fingerprint
+from src.utils.file_utils import read_json, write_json_atomic
+from src.main import app, run_hedge_fund
 import sys
 import matplotlib
 import os
@@ -24,16 +29,160 @@ else:
 # 用来正常显示负号
 matplotlib.rcParams['axes.unicode_minus'] = False
 
+# 不调用大模型、输出只由价格数据决定的代理。工作流只包含这些代理时，
+# 每日决策可以对整个回测区间一次性算出（见 Backtester.run_vectorized_backtest）
+DETERMINISTIC_AGENTS = frozenset({"market_data_agent", "technical_analyst_agent"})
+
+# 与 run_backtest 和 market_data_agent 的取数规则一致：
+# 决策日前 30 天的K线不足 120 根时，market_data_agent 取结束日期前 730 天的数据
+LOOKBACK_DAYS = 30
+MIN_HISTORY_BARS = 120
+EXTENDED_LOOKBACK_DAYS = 730
+# technical_analyst_agent 至少需要 5 根K线，否则分析失败、当日持有
+MIN_ANALYSIS_BARS = 5
+
+ACTION_CODES = {"sell": -1, "hold": 0, "buy": 1}
+
+# 逐日回测默认每完成多少个回测日保存一次检查点
+DEFAULT_CHECKPOINT_EVERY = 10
+
+
+def _checkpoint_every_from_env() -> int:
+    """读取环境变量 BACKTEST_CHECKPOINT_EVERY，不是正整数时使用默认值"""
+    value = os.getenv("BACKTEST_CHECKPOINT_EVERY")
+    if value is None:
+        return DEFAULT_CHECKPOINT_EVERY
+    try:
+        every = int(value)
+    except ValueError:
+        every = 0
+    if every < 1:
+        logging.getLogger('backtester').warning(
+            f"BACKTEST_CHECKPOINT_EVERY={value!r} 无效，使用默认值 {DEFAULT_CHECKPOINT_EVERY}")
+        return DEFAULT_CHECKPOINT_EVERY
+    return every
+
+
+BACKTEST_CHECKPOINT_EVERY = _checkpoint_every_from_env()
+
+
+def decision_windows(bar_dates, dates, yesterday):
+    """
+    每个回测日期的代理分析区间和成交K线
+
+    Args:
+        bar_dates: 按升序排列的K线日期
+        dates: 回测日期
+        yesterday: 昨天的日期，数据的结束日期最晚为昨天
+
+    Returns:
+        (starts, ends, traded)：代理分析 bars[starts[i]:ends[i]]；
+        traded[i] 为 False 时 run_backtest 取不到当日价格而跳过该日，
+        否则以 bars[ends[i] - 1] 的开盘价成交
+    """
+    bar_dates = pd.DatetimeIndex(bar_dates).normalize()
+    dates = pd.DatetimeIndex(dates).normalize()
+    ends_at = dates.where(dates <= yesterday, yesterday)
+    ends = bar_dates.searchsorted(ends_at, side="right")
+    recent = bar_dates.searchsorted(dates - timedelta(days=LOOKBACK_DAYS), side="left")
+    extended = bar_dates.searchsorted(
+        ends_at - timedelta(days=EXTENDED_LOOKBACK_DAYS), side="left")
+    starts = np.where(ends - recent < MIN_HISTORY_BARS, extended, recent)
+    return starts, ends, ends > recent
+
+
+def simulate_trades(actions, quantities, prices, cash, stock):
+    """
+    用数组运算模拟逐日执行 Backtester.execute_trade 的结果
+
+    卖出数量不超过持仓，即 stock_t = max(stock_{t-1} + delta_t, 0)，
+    其解为累计变动减去累计变动的历史最小值（不足 0 的部分）。
+    买入受现金限制时从该日起按 execute_trade 的规则只买得起的整数股，再继续向量化计算。
+
+    Args:
+        actions: 每日操作编码，1 买入、-1 卖出、0 持有
+        quantities: 每日计划数量
+        prices: 每日成交价格
+        cash: 初始现金
+        stock: 初始持仓
+
+    Returns:
+        (每日收盘后的持仓, 每日收盘后的现金, 每日实际成交数量，卖出为负)
+    """
+    prices = np.asarray(prices, dtype=float)
+    delta = np.asarray(actions, dtype=np.int64) * np.asarray(quantities, dtype=np.int64)
+    n = len(prices)
+    stocks = np.empty(n, dtype=np.int64)
+    cashes = np.empty(n)
+    executed = np.empty(n, dtype=np.int64)
+
+    start = 0
+    while start < n:
+        path = stock + np.cumsum(delta[start:])
+        held = path - np.minimum(np.minimum.accumulate(path), 0)
+        traded = np.diff(held, prepend=stock)
+        cash_path = cash - np.cumsum(traded * prices[start:])
+        short = np.flatnonzero(cash_path < 0)
+        end = start + (short[0] if len(short) else n - start)
+
+        stocks[start:end] = held[:end - start]
+        cashes[start:end] = cash_path[:end - start]
+        executed[start:end] = traded[:end - start]
+        if end == n:
+            break
+        if end > start:
+            stock, cash = stocks[end - 1], cashes[end - 1]
+
+        # 现金不足以买入计划数量：只买得起的整数股
+        bought = max(int(cash // prices[end]), 0)
+        stock, cash = stock + bought, cash - bought * prices[end]
+        stocks[end], cashes[end], executed[end] = stock, cash, bought
+        start = end + 1
+    return stocks, cashes, executed
+
 
 class Backtester:
-    def __init__(self, agent, ticker, start_date, end_date, initial_capital, num_of_news):
+    # 智能体调用的限流：两次调用至少间隔的秒数、每分钟最多调用次数
+    API_CALL_INTERVAL = 6
+    API_CALLS_PER_MINUTE = 8  # 预留余量
+    # 调用失败后第 n 次重试前等待 API_RETRY_DELAY * 2^n 秒
+    API_RETRY_DELAY = 1
+
+    def __init__(self, agent, ticker, start_date, end_date, initial_capital, num_of_news,
+                 fast_path=None, prices=None, checkpoint_path=None, resume=False,
+                 checkpoint_every=None, use_decision_cache=True):
+        """
+        Args:
+            fast_path: 是否使用向量化回测；None 表示工作流只包含 DETERMINISTIC_AGENTS 时自动使用
+            prices: 已获取的K线（PriceBars），需覆盖最早回测日前 730 天至结束日期；
+                    None 时由 prefetch_prices 获取
+            checkpoint_path: 逐日回测的检查点文件，默认为 logs 目录下按股票代码和回测区间命名的文件
+            resume: 是否从检查点记录的最后一个已完成的回测日之后继续
+            checkpoint_every: 每完成多少个回测日保存一次检查点，默认为环境变量 BACKTEST_CHECKPOINT_EVERY（未设置时为 10）
+            use_decision_cache: 智能体为 run_hedge_fund 时，是否复用本地缓存的每日决策（见 decision_cache）
+        """
         self.agent = agent
+        self.fast_path = fast_path
+        # 智能体可以接收预先获取的K线时，每日只传入整段K线的切片，不再逐日获取
+        self._agent_accepts_prices = "prices" in inspect.signature(agent).parameters
         self.ticker = ticker
         self.start_date = start_date
         self.end_date = end_date
         self.initial_capital = initial_capital
         self.portfolio = {"cash": initial_capital, "stock": 0}
         self.portfolio_values = []
+        # 实际成交记录，卖出数量为负
+        self.trades = []
+        # 每个回测日的决策和成交
+        self.decisions = []
+        self.prices = prices
+        self._fingerprint = self.agent_fingerprint() if use_decision_cache else None
+        self._portfolio_in_key = uses_portfolio(app)
+        self.resume = resume
+        self.checkpoint_every = max(1, checkpoint_every or BACKTEST_CHECKPOINT_EVERY)
+        self.checkpoint_path = checkpoint_path or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), '..', 'logs',
+            f"backtest_{ticker}_{start_date.replace('-', '')}_{end_date.replace('-', '')}.checkpoint.json")
         self.num_of_news = num_of_news
         # 设置回测日志
         self.setup_backtest_logging()
@@ -75,8 +224,40 @@ class Backtester:
             self.logger.error(f"输入参数验证失败: {str(e)}")
             raise
 
-    def get_agent_decision(self, current_date, lookback_start, portfolio):
-        """获取智能体决策，包含 API 限制处理"""
+    def agent_fingerprint(self):
+        """智能体的指纹，用于区分决策缓存；只有 run_hedge_fund 可以按工作流计算，其他智能体返回 None（不缓存）"""
+        return workflow_fingerprint(app) if self.agent is run_hedge_fund else None
+
+    def decision_cache_key(self, current_date, lookback_start, portfolio):
+        """
+        当日决策的缓存键，不使用缓存时返回 None
+
+        决策日期晚于昨天时数据的结束日期被截断为昨天，之后重新运行会看到更多数据，不缓存。
+        """
+        if self._fingerprint is None:
+            return None
+        if pd.Timestamp(current_date) > pd.Timestamp(datetime.now().date()) - timedelta(days=1):
+            return None
+        key = {"lookback_start": lookback_start, "num_of_news": self.num_of_news, "portfolio": None}
+        if self._portfolio_in_key:
+            key["portfolio"] = {"cash": round(float(portfolio["cash"]), 2),
+                                "stock": int(portfolio["stock"])}
+        return key
+
+    def get_agent_decision(self, current_date, lookback_start, portfolio, prices=None):
+        """
+        获取智能体决策，包含 API 限制处理；prices 为当日分析区间的K线
+
+        调用失败（如额度耗尽）或返回结果无法解析时重试，重试后仍失败时抛出 RuntimeError，
+        不能把没有拿到的决策当作持有记入回测结果
+        """
+        # 相同工作流、相同输入的决策已缓存时直接复用，不调用智能体
+        cache_key = self.decision_cache_key(current_date, lookback_start, portfolio)
+        if cache_key is not None:
+            cached = decision_cache.get(self._fingerprint, self.ticker, current_date, cache_key)
+            if cached is not None:
+                return cached
+
         max_retries = 3
 
         # 检查并重置 API 时间窗口
@@ -86,7 +267,7 @@ class Backtester:
             self._api_window_start = current_time
 
         # 如果达到 API 限制，等待新的时间窗口
-        if self._api_call_count >= 8:  # 预留余量
+        if self._api_call_count >= self.API_CALLS_PER_MINUTE:
             wait_time = 60 - (current_time - self._api_window_start)
             if wait_time > 0:
                 time.sleep(wait_time)
@@ -98,8 +279,8 @@ class Backtester:
                 # 确保调用间隔至少 6 秒
                 if self._last_api_call:
                     time_since_last_call = time.time() - self._last_api_call
-                    if time_since_last_call < 6:
-                        sleep_time = 6 - time_since_last_call
+                    if time_since_last_call < self.API_CALL_INTERVAL:
+                        sleep_time = self.API_CALL_INTERVAL - time_since_last_call
                         time.sleep(sleep_time)
 
                 # 更新调用时间和计数
@@ -113,7 +294,8 @@ class Backtester:
                     end_date=current_date,
                     portfolio=portfolio,
                     num_of_news=self.num_of_news,
-                    run_id=f"backtest_{self.ticker}_{current_date.replace('-', '')}"
+                    run_id=f"backtest_{self.ticker}_{current_date.replace('-', '')}",
+                    **({"prices": prices} if self._agent_accepts_prices and prices is not None else {})
                 )
 
                 try:
@@ -143,16 +325,16 @@ class Backtester:
 
                         self.logger.info(
                             f"解析后的决策: {formatted_result['decision']}")  # 添加日志
+                        if cache_key is not None:
+                            decision_cache.put(self._fingerprint, self.ticker, current_date,
+                                               cache_key, formatted_result)
                         return formatted_result
                     return result
                 except json.JSONDecodeError as e:
-                    # 如果无法解析为 JSON，记录错误并返回默认决策
+                    # 如果无法解析为 JSON，记录错误后按调用失败重试
                     self.logger.warning(f"JSON解析错误: {str(e)}")
                     self.logger.warning(f"原始返回结果: {result}")
-                    return {
-                        "decision": {"action": "hold", "quantity": 0},
-                        "analyst_signals": {}
-                    }
+                    raise
 
             except Exception as e:
                 if "AFC is enabled" in str(e):
@@ -165,8 +347,11 @@ class Backtester:
                 self.logger.warning(
                     f"获取智能体决策失败 (尝试 {attempt + 1}/{max_retries}): {str(e)}")
                 if attempt == max_retries - 1:
-                    return {"decision": {"action": "hold", "quantity": 0}, "analyst_signals": {}}
-                time.sleep(2 ** attempt)
+                    raise RuntimeError(
+                        f"{current_date} 的智能体决策在 {max_retries} 次尝试后仍然失败") from e
+                time.sleep(self.API_RETRY_DELAY * 2 ** attempt)
+
+        raise RuntimeError(f"{current_date} 的智能体决策在 {max_retries} 次尝试后仍然失败")
 
     def parse_decision_from_text(self, text):
         """从文本中解析交易决策"""
@@ -248,22 +433,125 @@ class Backtester:
         self.backtest_logger.info(f"初始资金: {self.initial_capital:,.2f}\n")
         self.backtest_logger.info("-" * 100)
 
+    def can_run_vectorized(self):
+        """智能体为 run_hedge_fund 且工作流只包含不调用大模型的代理时，每日决策可以一次性算出"""
+        if self.agent is not run_hedge_fund:
+            return False
+        graph = app.get_graph()
+        nodes = set(graph.nodes) - {"__start__", "__end__"}
+        last_nodes = {edge.source for edge in graph.edges if edge.target == "__end__"}
+        return nodes <= DETERMINISTIC_AGENTS and last_nodes == {"technical_analyst_agent"}
+
+    def save_checkpoint(self, last_date):
+        """把截至 last_date（含）已完成的回测状态原子地写入检查点文件"""
+        def dated(records):
+            return [{**record, "Date": record["Date"].strftime("%Y-%m-%d")} for record in records]
+
+        write_json_atomic(self.checkpoint_path, {
+            "ticker": self.ticker,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "initial_capital": self.initial_capital,
+            "last_date": last_date.strftime("%Y-%m-%d"),
+            "portfolio": {key: float(value) for key, value in self.portfolio.items()},
+            "portfolio_values": dated(self.portfolio_values),
+            "trades": dated(self.trades),
+            "decisions": self.decisions,
+        })
+
+    def load_checkpoint(self):
+        """
+        从检查点恢复回测状态
+
+        Returns:
+            最后一个已完成的回测日；没有检查点时返回 None，从头开始回测
+        """
+        state = read_json(self.checkpoint_path)
+        if state is None:
+            self.logger.info(f"未找到检查点 {self.checkpoint_path}，从头开始回测")
+            return None
+        expected = (self.ticker, self.start_date, self.end_date, self.initial_capital)
+        if tuple(state.get(key) for key in ("ticker", "start_date", "end_date", "initial_capital")) != expected:
+            raise ValueError(f"检查点 {self.checkpoint_path} 与当前回测参数不一致")
+
+        def dated(records):
+            return [{**record, "Date": pd.Timestamp(record["Date"])} for record in records]
+
+        self.portfolio = state["portfolio"]
+        self.portfolio["stock"] = int(self.portfolio["stock"])
+        self.portfolio_values = dated(state["portfolio_values"])
+        self.trades = dated(state["trades"])
+        self.decisions = state["decisions"]
+        self.logger.info(f"从检查点恢复，已完成至 {state['last_date']}")
+        return pd.Timestamp(state["last_date"])
+
+    def prefetch_prices(self, dates):
+        """
+        一次获取所有回测日需要的K线（最早的回测日前 730 天至结束日期），已传入 prices 时直接使用
+
+        Args:
+            dates: 回测日期
+
+        Returns:
+            (K线, starts, ends, traded)：第 i 个回测日智能体分析 bars[starts[i]:ends[i]]，
+            traded[i] 为 True 时以 bars["open"][ends[i] - 1] 成交，见 decision_windows
+        """
+        bars = self.prices
+        if bars is None:
+            history_start = dates[0] - timedelta(days=EXTENDED_LOOKBACK_DAYS)
+            bars = PriceBars.from_frame(get_price_data(
+                self.ticker, history_start.strftime("%Y-%m-%d"), self.end_date, indicators=[]))
+        yesterday = pd.Timestamp(datetime.now().date()) - timedelta(days=1)
+        starts, ends, traded = decision_windows(bars.dates, dates, yesterday)
+        self.logger.info(f"已获取 {self.ticker} 的 {len(bars)} 根K线，{int(traded.sum())} 个回测日有成交价格")
+        return bars, starts, ends, traded
+
     def run_backtest(self):
         """运行回测"""
+        if self.fast_path is None:
+            self.fast_path = self.can_run_vectorized()
+        elif self.fast_path and not self.can_run_vectorized():
+            raise ValueError("当前工作流包含需要调用大模型的代理，无法使用向量化回测")
+        if self.fast_path:
+            return self.run_vectorized_backtest()
+
         dates = pd.date_range(self.start_date, self.end_date, freq="B")
 
         self.logger.info("\n开始回测...")
+        if dates.empty:
+            return
+        bars, starts, ends, traded = self.prefetch_prices(dates)
+        completed = self.load_checkpoint() if self.resume else None
         print(f"{'日期':<12} {'代码':<6} {'操作':<6} {'数量':>8} {'价格':>8} {'现金':>12} {'持仓':>8} {'总值':>12} {'看多':>8} {'看空':>8} {'中性':>8}")
         print("-" * 110)
 
-        for current_date in dates:
-            lookback_start = (current_date - timedelta(days=30)
+        for i, current_date in enumerate(dates):
+            # 断点续跑时跳过检查点中已完成的回测日
+            if completed is not None and current_date <= completed:
+                continue
+            # 定期保存截至前一个回测日的状态，中断后最多重复 checkpoint_every 个回测日
+            if i > 0 and i % self.checkpoint_every == 0:
+                self.save_checkpoint(dates[i - 1])
+
+            # 当日取不到价格时无法成交，不需要智能体决策
+            if not traded[i]:
+                continue
+
+            lookback_start = (current_date - timedelta(days=LOOKBACK_DAYS)
                               ).strftime("%Y-%m-%d")
             current_date_str = current_date.strftime("%Y-%m-%d")
 
-            # 获取智能体决策
-            output = self.get_agent_decision(
-                current_date_str, lookback_start, self.portfolio)
+            # 获取智能体决策，当日分析区间的K线是预取数据的切片（不复制）
+            try:
+                output = self.get_agent_decision(
+                    current_date_str, lookback_start, self.portfolio,
+                    prices=bars[starts[i]:ends[i]])
+            except RuntimeError:
+                # 当日没有决策，检查点只记录到前一个回测日，断点续跑时重新请求当日决策
+                self.logger.error(f"{current_date_str} 未能获取智能体决策，回测中止")
+                if i > 0:
+                    self.save_checkpoint(dates[i - 1])
+                raise
 
             # 记录每个智能体的信号和分析结果
             self.backtest_logger.info(f"\n交易日期: {current_date_str}")
@@ -310,6 +598,9 @@ class Backtester:
 
             agent_decision = output.get(
                 "decision", {"action": "hold", "quantity": 0})
+            if "action" not in agent_decision and "signal" in agent_decision:
+                # 最后一个代理只给出看多/看空信号（如 technical_analyst_agent）时按信号交易
+                agent_decision = self.parse_decision_from_text(agent_decision["signal"])
             action, quantity = agent_decision.get(
                 "action", "hold"), agent_decision.get("quantity", 0)
 
@@ -319,14 +610,21 @@ class Backtester:
             if "reason" in agent_decision:
                 self.backtest_logger.info(f"决策理由: {agent_decision['reason']}")
 
-            # 获取当前价格并执行交易
-            df = get_price_data(self.ticker, lookback_start, current_date_str)
-            if df is None or df.empty:
-                continue
-
-            current_price = df.iloc[-1]['open']
+            # 以当日最新K线的开盘价执行交易
+            current_price = bars["open"][ends[i] - 1]
             executed_quantity = self.execute_trade(
                 action, quantity, current_price)
+            if executed_quantity:
+                self.trades.append({
+                    "Date": current_date,
+                    "Quantity": executed_quantity if action == "buy" else -executed_quantity,
+                    "Price": current_price,
+                })
+            self.decisions.append({
+                "Date": current_date_str,
+                "Decision": agent_decision,
+                "Executed": executed_quantity,
+            })
 
             # 更新组合总值
             total_value = self.portfolio["cash"] + \
@@ -347,6 +645,63 @@ class Backtester:
                 "Daily Return": daily_return
             })
 
+        self.save_checkpoint(dates[-1])
+
+    def run_vectorized_backtest(self):
+        """
+        向量化回测：一次获取整个区间的K线，一次算出每个回测日 technical_analyst_agent 的信号，
+        再用数组运算模拟持仓、现金和组合价值，结果与逐日运行工作流的 run_backtest 相同。
+        整个回测只需很短的时间，不保存检查点
+        """
+        from src.agents.technicals_batch import analyze_windows
+
+        dates = pd.date_range(self.start_date, self.end_date, freq="B")
+        self.logger.info("\n开始向量化回测...")
+        if dates.empty:
+            return
+
+        bars, starts, ends, traded = self.prefetch_prices(dates)
+        dates, starts, ends = dates[traded], starts[traded], ends[traded]
+        if dates.empty:
+            self.logger.warning(f"无法获取 {self.ticker} 的价格数据")
+            return
+
+        # 每个回测日的信号，K线不足的区间分析失败，当日持有
+        signals = np.full(len(dates), "neutral", dtype=object)
+        analyzable = np.flatnonzero(ends - starts >= MIN_ANALYSIS_BARS)
+        table = analyze_windows(bars.to_frame(), starts[analyzable], ends[analyzable])
+        signals[analyzable[table.index]] = table["signal"].to_numpy()
+
+        decisions = [self.parse_decision_from_text(signal) for signal in signals]
+        actions = np.array([ACTION_CODES[d["action"]] for d in decisions])
+        quantities = np.array([d["quantity"] for d in decisions])
+        prices = bars["open"].astype(float)[ends - 1]
+
+        stocks, cashes, executed = simulate_trades(
+            actions, quantities, prices, self.portfolio["cash"], self.portfolio["stock"])
+        values = cashes + stocks * prices
+        daily_returns = np.zeros(len(values))
+        daily_returns[1:] = (values[1:] / values[:-1] - 1) * 100
+
+        for date, signal, decision, quantity, price, value in zip(
+                dates, signals, decisions, executed, prices, values):
+            self.backtest_logger.info(
+                f"{date.strftime('%Y-%m-%d')} 信号: {signal}, 行动: {decision['action'].upper()}, "
+                f"成交: {abs(quantity)}, 价格: {price:.2f}, 总值: {value:,.2f}")
+
+        self.decisions.extend(
+            {"Date": date.strftime("%Y-%m-%d"), "Decision": {**decision, "signal": signal}, "Executed": abs(quantity)}
+            for date, signal, decision, quantity in zip(dates, signals, decisions, executed.tolist()))
+        self.trades.extend(
+            {"Date": date, "Quantity": quantity, "Price": price}
+            for date, quantity, price in zip(dates, executed.tolist(), prices.tolist()) if quantity)
+        self.portfolio_values.extend(
+            {"Date": date, "Portfolio Value": value, "Daily Return": daily_return}
+            for date, value, daily_return in zip(dates, values.tolist(), daily_returns.tolist()))
+        if len(values):
+            self.portfolio.update(
+                cash=float(cashes[-1]), stock=int(stocks[-1]), portfolio_value=float(values[-1]))
+
     def analyze_performance(self):
         """分析回测性能"""
         performance_df = pd.DataFrame(self.portfolio_values).set_index("Date")
@@ -452,6 +807,12 @@ if __name__ == "__main__":
                         default=100000, help='初始资金 (默认: 100000)')
     parser.add_argument('--num-of-news', type=int, default=5,
                         help='Number of news articles to analyze for sentiment (default: 5)')
+    parser.add_argument('--no-fast-path', action='store_true',
+                        help='逐日运行完整工作流，不使用向量化回测')
+    parser.add_argument('--resume', action='store_true',
+                        help='从上次中断的检查点继续逐日回测')
+    parser.add_argument('--no-decision-cache', action='store_true',
+                        help='不复用本地缓存的每日决策，重新调用智能体')
 
     args = parser.parse_args()
 
@@ -462,7 +823,10 @@ if __name__ == "__main__":
         start_date=args.start_date,
         end_date=args.end_date,
         initial_capital=args.initial_capital,
-        num_of_news=args.num_of_news
+        num_of_news=args.num_of_news,
+        fast_path=False if args.no_fast_path else None,
+        resume=args.resume,
+        use_decision_cache=not args.no_decision_cache
     )
 
     # 运行回测
@@ -5,6 +5,7 @@ import threading  # Import threading for background task
 import uvicorn  # Import uvicorn to run FastAPI
 
 from datetime import datetime, timedelta
+from typing import Optional
 # Removed START as it's implicit with set_entry_point
 from langgraph.graph import END, StateGraph
 from langchain_core.messages import HumanMessage
@@ -35,6 +36,8 @@ from src.utils.output_logger import OutputLogger
 # )
 from app.main import app as fastapi_app
 from src.utils.logging_config import setup_logger
+from src.tools.indicator_cache import run_indicator_cache
+from src.tools.price_panel import PriceBars
 
 # --- Import Summary Report Generator ---
 try:
@@ -60,7 +63,21 @@ logger = setup_logger('main_workflow')
 # --- Run the Hedge Fund Workflow ---
 
 
-def run_hedge_fund(run_id: str, ticker: str, start_date: str, end_date: str, portfolio: dict, show_reasoning: bool = False, num_of_news: int = 5, show_summary: bool = False):
+def _invoke_workflow(initial_state: dict):
+    """在该运行的指标缓存中执行工作流，各代理共享同一份指标计算结果"""
+    with run_indicator_cache(initial_state["metadata"]["run_id"],
+                             symbol=initial_state["data"]["ticker"]):
+        return app.invoke(initial_state)
+
+
+def run_hedge_fund(run_id: str, ticker: str, start_date: str, end_date: str, portfolio: dict, show_reasoning: bool = False, num_of_news: int = 5, show_summary: bool = False,
+                   prices: Optional[PriceBars] = None):
+    """
+    运行一次完整的工作流
+
+    Args:
+        prices: 预先获取的K线（如回测时整段数据的切片），传入后 market_data_agent 不再获取价格数据
+    """
     print(f"--- Starting Workflow Run ID: {run_id} ---")
     try:
         from app.state import api_state
@@ -77,6 +94,7 @@ def run_hedge_fund(run_id: str, ticker: str, start_date: str, end_date: str, por
             "start_date": start_date,
             "end_date": end_date,
             "num_of_news": num_of_news,
+            "prices": prices,
         },
         "metadata": {
             "show_reasoning": show_reasoning,
@@ -88,7 +106,7 @@ def run_hedge_fund(run_id: str, ticker: str, start_date: str, end_date: str, por
     try:
         from app.utils.context_managers import workflow_run
         with workflow_run(run_id):
-            final_state = app.invoke(initial_state)
+            final_state = _invoke_workflow(initial_state)
             print(f"--- Finished Workflow Run ID: {run_id} ---")
 
             if HAS_SUMMARY_REPORT and show_summary:
@@ -99,7 +117,7 @@ def run_hedge_fund(run_id: str, ticker: str, start_date: str, end_date: str, por
             if HAS_STRUCTURED_OUTPUT and show_reasoning:
                 print_structured_output(final_state)
     except ImportError:
-        final_state = app.invoke(initial_state)
+        final_state = _invoke_workflow(initial_state)
         print(f"--- Finished Workflow Run ID: {run_id} ---")
 
         # if HAS_SUMMARY_REPORT and show_summary:
@@ -1,14 +1,54 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence
 import pandas as pd
-import akshare as ak
 from datetime import datetime, timedelta
 import json
-import numpy as np
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from src.utils.logging_config import setup_logger
+from src.tools.data_provider import get_data_provider
+from src.tools.price_store import price_store
+from src.tools.spot_cache import spot_cache
+from src.tools.financial_cache import financial_report_cache
+from src.tools.price_panel import PriceBars, PricePanel
+from src.tools.indicators import PRICE_HISTORY_CACHE_KEYS, price_history_indicators
+from src.tools.indicator_cache import cached_indicator
+from src.tools.resampler import period_keys, timeframe_cache
+from src.utils.rate_limiter import RateLimiter
 
 # 设置日志记录
 logger = setup_logger('api')
 
+DEFAULT_AKSHARE_RATE_LIMIT = 5.0
+
+
+def _batch_rate_limit() -> float:
+    """读取环境变量 AKSHARE_RATE_LIMIT（每秒请求数），不是正数时使用默认值"""
+    value = os.getenv("AKSHARE_RATE_LIMIT")
+    if value is None:
+        return DEFAULT_AKSHARE_RATE_LIMIT
+    try:
+        rate = float(value)
+    except ValueError:
+        rate = 0.0
+    if not (0 < rate < float("inf")):
+        logger.warning(
+            f"Invalid AKSHARE_RATE_LIMIT={value!r}, using default {DEFAULT_AKSHARE_RATE_LIMIT}")
+        return DEFAULT_AKSHARE_RATE_LIMIT
+    return rate
+
+
+# 批量获取行情时所有工作线程共享的限流器（每秒请求数）
+_batch_rate_limiter = RateLimiter(rate=_batch_rate_limit(), burst=2)
+
+
+def _get_financial_report(symbol: str, report_type: str) -> pd.DataFrame:
+    """获取新浪财务报表，同一报告期内复用本地缓存"""
+    return financial_report_cache.get_report(
+        symbol, report_type,
+        fetcher=lambda: get_data_provider().stock_financial_report_sina(
+            stock=f"sh{symbol}", symbol=report_type)
+    )
+
 
 def get_financial_metrics(symbol: str) -> Dict[str, Any]:
     """获取财务指标数据"""
@@ -16,23 +56,22 @@ def get_financial_metrics(symbol: str) -> Dict[str, Any]:
     try:
         # 获取实时行情数据（用于市值和估值比率）
         logger.info("Fetching real-time quotes...")
-        realtime_data = ak.stock_zh_a_spot_em()
+        realtime_data = spot_cache.get_snapshot()
         if realtime_data is None or realtime_data.empty:
             logger.warning("No real-time quotes data available")
             return [{}]
 
-        stock_data = realtime_data[realtime_data['代码'] == symbol]
-        if stock_data.empty:
+        stock_data = spot_cache.get_quote(symbol)
+        if stock_data is None:
             logger.warning(f"No real-time quotes found for {symbol}")
             return [{}]
 
-        stock_data = stock_data.iloc[0]
         logger.info("✓ Real-time quotes fetched")
 
         # 获取新浪财务指标
         logger.info("Fetching Sina financial indicators...")
         current_year = datetime.now().year
-        financial_data = ak.stock_financial_analysis_indicator(
+        financial_data = get_data_provider().stock_financial_analysis_indicator(
             symbol=symbol, start_year=str(current_year-1))
         if financial_data is None or financial_data.empty:
             logger.warning("No financial indicator data available")
@@ -50,8 +89,7 @@ def get_financial_metrics(symbol: str) -> Dict[str, Any]:
         # 获取利润表数据（用于计算 price_to_sales）
         logger.info("Fetching income statement...")
         try:
-            income_statement = ak.stock_financial_report_sina(
-                stock=f"sh{symbol}", symbol="利润表")
+            income_statement = _get_financial_report(symbol, "利润表")
             if not income_statement.empty:
                 latest_income = income_statement.iloc[0]
                 logger.info("✓ Income statement fetched")
@@ -156,8 +194,7 @@ def get_financial_statements(symbol: str) -> Dict[str, Any]:
         # 获取资产负债表数据
         logger.info("Fetching balance sheet...")
         try:
-            balance_sheet = ak.stock_financial_report_sina(
-                stock=f"sh{symbol}", symbol="资产负债表")
+            balance_sheet = _get_financial_report(symbol, "资产负债表")
             if not balance_sheet.empty:
                 latest_balance = balance_sheet.iloc[0]
                 previous_balance = balance_sheet.iloc[1] if len(
@@ -177,8 +214,7 @@ def get_financial_statements(symbol: str) -> Dict[str, Any]:
         # 获取利润表数据
         logger.info("Fetching income statement...")
         try:
-            income_statement = ak.stock_financial_report_sina(
-                stock=f"sh{symbol}", symbol="利润表")
+            income_statement = _get_financial_report(symbol, "利润表")
             if not income_statement.empty:
                 latest_income = income_statement.iloc[0]
                 previous_income = income_statement.iloc[1] if len(
@@ -198,8 +234,7 @@ def get_financial_statements(symbol: str) -> Dict[str, Any]:
         # 获取现金流量表数据
         logger.info("Fetching cash flow statement...")
         try:
-            cash_flow = ak.stock_financial_report_sina(
-                stock=f"sh{symbol}", symbol="现金流量表")
+            cash_flow = _get_financial_report(symbol, "现金流量表")
             if not cash_flow.empty:
                 latest_cash_flow = cash_flow.iloc[0]
                 previous_cash_flow = cash_flow.iloc[1] if len(
@@ -283,8 +318,10 @@ def get_market_data(symbol: str) -> Dict[str, Any]:
     """获取市场数据"""
     try:
         # 获取实时行情
-        realtime_data = ak.stock_zh_a_spot_em()
-        stock_data = realtime_data[realtime_data['代码'] == symbol].iloc[0]
+        stock_data = spot_cache.get_quote(symbol)
+        if stock_data is None:
+            logger.error(f"No real-time quotes found for {symbol}")
+            return {}
 
         return {
             "market_cap": float(stock_data.get("总市值", 0)),
@@ -300,7 +337,63 @@ def get_market_data(symbol: str) -> Dict[str, Any]:
         return {}
 
 
-def get_price_history(symbol: str, start_date: str = None, end_date: str = None, adjust: str = "qfq") -> pd.DataFrame:
+def _fetch_price_bars(symbol: str, start_date: datetime, end_date: datetime, adjust: str) -> pd.DataFrame:
+    """从数据源拉取日线数据，并重命名列以匹配技术分析代理的需求"""
+    df = get_data_provider().stock_zh_a_hist(
+        symbol=symbol,
+        period="daily",
+        start_date=start_date.strftime("%Y%m%d"),
+        end_date=end_date.strftime("%Y%m%d"),
+        adjust=adjust
+    )
+
+    if df is None or df.empty:
+        return pd.DataFrame()
+
+    df = df.rename(columns={
+        "日期": "date",
+        "开盘": "open",
+        "最高": "high",
+        "最低": "low",
+        "收盘": "close",
+        "成交量": "volume",
+        "成交额": "amount",
+        "振幅": "amplitude",
+        "涨跌幅": "pct_change",
+        "涨跌额": "change_amount",
+        "换手率": "turnover"
+    })
+
+    # 确保日期列为datetime类型
+    df["date"] = pd.to_datetime(df["date"])
+    return df
+
+
+def _resolve_date_range(start_date: str = None, end_date: str = None):
+    """解析查询区间：结束日期默认且最晚为昨天，开始日期默认为结束日期前一年"""
+    # 获取当前日期和昨天的日期
+    current_date = datetime.now()
+    yesterday = current_date - timedelta(days=1)
+
+    # 如果没有提供日期，默认使用昨天作为结束日期
+    if not end_date:
+        end_date = yesterday  # 使用昨天作为结束日期
+    else:
+        end_date = datetime.strptime(end_date, "%Y-%m-%d")
+        # 确保end_date不会超过昨天
+        if end_date > yesterday:
+            end_date = yesterday
+
+    if not start_date:
+        start_date = end_date - timedelta(days=365)  # 默认获取一年的数据
+    else:
+        start_date = datetime.strptime(start_date, "%Y-%m-%d")
+
+    return start_date, end_date
+
+
+def get_price_history(symbol: str, start_date: str = None, end_date: str = None, adjust: str = "qfq",
+                      indicators: Optional[Sequence[str]] = None) -> pd.DataFrame:
     """获取历史价格数据
 
     Args:
@@ -311,6 +404,9 @@ def get_price_history(symbol: str, start_date: str = None, end_date: str = None,
                - "": 不复权
                - "qfq": 前复权（默认）
                - "hfq": 后复权
+        indicators: 需要计算的技术指标列表，默认为 None 表示计算全部指标；
+               传入空列表时只返回原始K线，且不会因数据不足120天而扩大时间范围。
+               可选值见 price_history_indicators.public_names()
 
     Returns:
         包含以下列的DataFrame：
@@ -339,61 +435,27 @@ def get_price_history(symbol: str, start_date: str = None, end_date: str = None,
         - skewness: 偏度
         - kurtosis: 峰度
     """
+    if indicators is None:
+        indicators = price_history_indicators.public_names()
+    else:
+        indicators = list(dict.fromkeys(indicators))
+        price_history_indicators.resolve(indicators)  # 指标名称无效时直接报错
+
     try:
-        # 获取当前日期和昨天的日期
-        current_date = datetime.now()
-        yesterday = current_date - timedelta(days=1)
-
-        # 如果没有提供日期，默认使用昨天作为结束日期
-        if not end_date:
-            end_date = yesterday  # 使用昨天作为结束日期
-        else:
-            end_date = datetime.strptime(end_date, "%Y-%m-%d")
-            # 确保end_date不会超过昨天
-            if end_date > yesterday:
-                end_date = yesterday
-
-        if not start_date:
-            start_date = end_date - timedelta(days=365)  # 默认获取一年的数据
-        else:
-            start_date = datetime.strptime(start_date, "%Y-%m-%d")
+        start_date, end_date = _resolve_date_range(start_date, end_date)
 
         logger.info(f"\nGetting price history for {symbol}...")
         logger.info(f"Start date: {start_date.strftime('%Y-%m-%d')}")
         logger.info(f"End date: {end_date.strftime('%Y-%m-%d')}")
 
         def get_and_process_data(start_date, end_date):
-            """获取并处理数据，包括重命名列等操作"""
-            df = ak.stock_zh_a_hist(
-                symbol=symbol,
-                period="daily",
-                start_date=start_date.strftime("%Y%m%d"),
-                end_date=end_date.strftime("%Y%m%d"),
-                adjust=adjust
+            """获取并处理数据，已拉取过的K线直接从本地行情存储读取"""
+            return price_store.get_bars(
+                symbol, start_date, end_date, adjust,
+                fetcher=lambda start, end: _fetch_price_bars(
+                    symbol, start, end, adjust)
             )
 
-            if df is None or df.empty:
-                return pd.DataFrame()
-
-            # 重命名列以匹配技术分析代理的需求
-            df = df.rename(columns={
-                "日期": "date",
-                "开盘": "open",
-                "最高": "high",
-                "最低": "low",
-                "收盘": "close",
-                "成交量": "volume",
-                "成交额": "amount",
-                "振幅": "amplitude",
-                "涨跌幅": "pct_change",
-                "涨跌额": "change_amount",
-                "换手率": "turnover"
-            })
-
-            # 确保日期列为datetime类型
-            df["date"] = pd.to_datetime(df["date"])
-            return df
-
         # 获取历史行情数据
         df = get_and_process_data(start_date, end_date)
 
@@ -402,9 +464,9 @@ def get_price_history(symbol: str, start_date: str = None, end_date: str = None,
                 f"Warning: No price history data found for {symbol}")
             return pd.DataFrame()
 
-        # 检查数据量是否足够
+        # 检查数据量是否足够（只获取原始K线时不需要）
         min_required_days = 120  # 至少需要120个交易日的数据
-        if len(df) < min_required_days:
+        if indicators and len(df) < min_required_days:
             logger.warning(
                 f"Warning: Insufficient data ({len(df)} days) for all technical indicators")
             logger.info("Attempting to fetch more data...")
@@ -417,115 +479,18 @@ def get_price_history(symbol: str, start_date: str = None, end_date: str = None,
                 logger.warning(
                     f"Warning: Even with extended time range, insufficient data ({len(df)} days)")
 
-        # 计算动量指标
-        df["momentum_1m"] = df["close"].pct_change(periods=20)  # 20个交易日约等于1个月
-        df["momentum_3m"] = df["close"].pct_change(periods=60)  # 60个交易日约等于3个月
-        df["momentum_6m"] = df["close"].pct_change(
-            periods=120)  # 120个交易日约等于6个月
-
-        # 计算成交量动量（相对于20日平均成交量的变化）
-        df["volume_ma20"] = df["volume"].rolling(window=20).mean()
-        df["volume_momentum"] = df["volume"] / df["volume_ma20"]
-
-        # 计算波动率指标
-        # 1. 历史波动率 (20日)
-        returns = df["close"].pct_change()
-        df["historical_volatility"] = returns.rolling(
-            window=20).std() * np.sqrt(252)  # 年化
-
-        # 2. 波动率区间 (相对于过去120天的波动率的位置)
-        volatility_120d = returns.rolling(window=120).std() * np.sqrt(252)
-        vol_min = volatility_120d.rolling(window=120).min()
-        vol_max = volatility_120d.rolling(window=120).max()
-        vol_range = vol_max - vol_min
-        df["volatility_regime"] = np.where(
-            vol_range > 0,
-            (df["historical_volatility"] - vol_min) / vol_range,
-            0  # 当范围为0时返回0
-        )
+        # 只计算请求的技术指标及其依赖
+        # 同一次运行中相同K线区间的指标只计算一次，缓存中保存只读数组
+        def memo(name, compute):
+            key, params = PRICE_HISTORY_CACHE_KEYS.get(name, (name, ()))
+            cached = cached_indicator(df, key, params,
+                                      lambda: compute().to_numpy(dtype=float), symbol=symbol)
+            return pd.Series(cached, index=df.index, copy=False)
 
-        # 3. 波动率Z分数
-        vol_mean = df["historical_volatility"].rolling(window=120).mean()
-        vol_std = df["historical_volatility"].rolling(window=120).std()
-        df["volatility_z_score"] = (
-            df["historical_volatility"] - vol_mean) / vol_std
-
-        # 4. ATR比率
-        tr = pd.DataFrame()
-        tr["h-l"] = df["high"] - df["low"]
-        tr["h-pc"] = abs(df["high"] - df["close"].shift(1))
-        tr["l-pc"] = abs(df["low"] - df["close"].shift(1))
-        tr["tr"] = tr[["h-l", "h-pc", "l-pc"]].max(axis=1)
-        df["atr"] = tr["tr"].rolling(window=14).mean()
-        df["atr_ratio"] = df["atr"] / df["close"]
-
-        # 计算统计套利指标
-        # 1. 赫斯特指数 (使用过去120天的数据)
-        def calculate_hurst(series):
-            """
-            计算Hurst指数。
-
-            Args:
-                series: 价格序列
-
-            Returns:
-                float: Hurst指数，或在计算失败时返回np.nan
-            """
-            try:
-                series = series.dropna()
-                if len(series) < 30:  # 降低最小数据点要求
-                    return np.nan
-
-                # 使用对数收益率
-                log_returns = np.log(series / series.shift(1)).dropna()
-                if len(log_returns) < 30:  # 降低最小数据点要求
-                    return np.nan
-
-                # 使用更小的lag范围
-                # 减少lag范围到2-10天
-                lags = range(2, min(11, len(log_returns) // 4))
-
-                # 计算每个lag的标准差
-                tau = []
-                for lag in lags:
-                    # 计算滚动标准差
-                    std = log_returns.rolling(window=lag).std().dropna()
-                    if len(std) > 0:
-                        tau.append(np.mean(std))
-
-                # 基本的数值检查
-                if len(tau) < 3:  # 进一步降低最小要求
-                    return np.nan
-
-                # 使用对数回归
-                lags_log = np.log(list(lags))
-                tau_log = np.log(tau)
-
-                # 计算回归系数
-                reg = np.polyfit(lags_log, tau_log, 1)
-                hurst = reg[0] / 2.0
-
-                # 只保留基本的数值检查
-                if np.isnan(hurst) or np.isinf(hurst):
-                    return np.nan
-
-                return hurst
-
-            except Exception as e:
-                return np.nan
-
-        # 使用对数收益率计算Hurst指数
-        log_returns = np.log(df["close"] / df["close"].shift(1))
-        df["hurst_exponent"] = log_returns.rolling(
-            window=120,
-            min_periods=60  # 要求至少60个数据点
-        ).apply(calculate_hurst)
-
-        # 2. 偏度 (20日)
-        df["skewness"] = returns.rolling(window=20).skew()
-
-        # 3. 峰度 (20日)
-        df["kurtosis"] = returns.rolling(window=20).kurt()
+        values = price_history_indicators.compute(df, indicators, memo=memo)
+        for name in indicators:
+            # 复制一份，返回的 DataFrame 可以被调用方修改
+            df[name] = values[name].to_numpy(copy=True)
 
         # 按日期升序排序
         df = df.sort_values("date")
@@ -551,9 +516,115 @@ def get_price_history(symbol: str, start_date: str = None, end_date: str = None,
         return pd.DataFrame()
 
 
+def get_resampled_price_history(symbol: str, period: str = "weekly", start_date: str = None,
+                                end_date: str = None, adjust: str = "qfq") -> pd.DataFrame:
+    """获取周线或月线，由本地日线合成，不向数据源单独请求周线、月线
+
+    同一进程内每只股票的周期K线增量维护，新的日线到达时只合并新增部分。
+    与 stock_zh_a_hist(period="weekly"/"monthly") 一样，第一根K线包含开始日期所在
+    周/月的全部交易日；最后一根K线只包含截至结束日期的交易日。
+
+    Args:
+        symbol: 股票代码
+        period: "daily"、"weekly" 或 "monthly"
+        start_date: 开始日期，格式：YYYY-MM-DD
+        end_date: 结束日期，格式：YYYY-MM-DD
+        adjust: 复权类型，同 get_price_history
+
+    Returns:
+        包含 date（周期内最后一个交易日）、open、high、low、close、volume、amount 列的DataFrame
+    """
+    if period == "daily":
+        return get_price_history(symbol, start_date, end_date, adjust, indicators=[])
+
+    start, end = _resolve_date_range(start_date, end_date)
+    # 从开始日期所在周期的第一天起获取日线
+    if period == "weekly":
+        period_start = start - timedelta(days=start.weekday())
+    else:
+        period_start = start.replace(day=1)
+    daily = get_price_history(symbol, period_start.strftime("%Y-%m-%d"),
+                              end.strftime("%Y-%m-%d"), adjust, indicators=[])
+    if daily.empty:
+        return daily
+
+    bars = timeframe_cache.update(symbol, adjust, period, daily)
+    first_key = period_keys([start], period)[0]
+    return bars[period_keys(bars["date"], period) >= first_key].reset_index(drop=True)
+
+
+def get_price_history_batch(
+    symbols: List[str],
+    start_date: str = None,
+    end_date: str = None,
+    adjust: str = "qfq",
+    max_workers: int = 8
+) -> PricePanel:
+    """批量获取多只股票的日线数据，并对齐为 日期×股票 的价格面板
+
+    各股票通过有界线程池并发获取，所有线程共享同一个限流器
+    （每秒请求数由环境变量 AKSHARE_RATE_LIMIT 配置），已拉取过的K线
+    直接从本地行情存储读取。只返回原始 OHLCV，不计算技术指标。
+
+    Args:
+        symbols: 股票代码列表
+        start_date: 开始日期，格式：YYYY-MM-DD，默认为结束日期前一年
+        end_date: 结束日期，格式：YYYY-MM-DD，默认且最晚为昨天
+        adjust: 复权类型，同 get_price_history
+        max_workers: 最大并发数
+
+    Returns:
+        PricePanel，包含 dates、symbols 以及 open/high/low/close/volume
+        二维数组；获取失败的股票列为 NaN 并记录在 failed_symbols 中
+    """
+    symbols = list(dict.fromkeys(symbols))
+    start, end = _resolve_date_range(start_date, end_date)
+    logger.info(
+        f"Getting price history for {len(symbols)} symbols "
+        f"({start.strftime('%Y-%m-%d')} ~ {end.strftime('%Y-%m-%d')})...")
+
+    def fetch_limited(symbol, fetch_start, fetch_end):
+        _batch_rate_limiter.acquire()
+        return _fetch_price_bars(symbol, fetch_start, fetch_end, adjust)
+
+    def load(symbol):
+        return price_store.get_bars(
+            symbol, start, end, adjust,
+            fetcher=lambda fetch_start, fetch_end: fetch_limited(
+                symbol, fetch_start, fetch_end)
+        )
+
+    frames = {}
+    if symbols:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols)))) as executor:
+            futures = {executor.submit(load, symbol): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    frames[symbol] = future.result()
+                except Exception as e:
+                    logger.error(f"Error getting price history for {symbol}: {e}")
+
+    panel = PricePanel.from_frames(frames, symbols)
+    if panel.failed_symbols:
+        logger.warning(
+            f"No price history for {len(panel.failed_symbols)} symbols: {panel.failed_symbols}")
+    logger.info(
+        f"Successfully built price panel ({panel.shape[0]} dates x {panel.shape[1]} symbols)")
+    return panel
+
+
 def prices_to_df(prices):
     """Convert price data to DataFrame with standardized column names"""
     try:
+        if isinstance(prices, PriceBars):
+            # 列式数据已使用英文列名，直接共享数组构建 DataFrame
+            df = prices.to_frame()
+            for col in ['close', 'open', 'high', 'low', 'volume']:
+                if col not in df.columns:
+                    df[col] = 0.0
+            return df
+
         df = pd.DataFrame(prices)
 
         # 标准化列名映射
@@ -591,7 +662,8 @@ def prices_to_df(prices):
 def get_price_data(
     ticker: str,
     start_date: str,
-    end_date: str
+    end_date: str,
+    indicators: Optional[Sequence[str]] = None
 ) -> pd.DataFrame:
     """获取股票价格数据
 
@@ -599,8 +671,9 @@ def get_price_data(
         ticker: 股票代码
         start_date: 开始日期，格式：YYYY-MM-DD
         end_date: 结束日期，格式：YYYY-MM-DD
+        indicators: 需要计算的技术指标，含义同 get_price_history
 
     Returns:
         包含价格数据的DataFrame
     """
-    return get_price_history(ticker, start_date, end_date)
+    return get_price_history(ticker, start_date, end_date, indicators=indicators)
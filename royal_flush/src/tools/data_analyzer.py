@@ -1,13 +1,37 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from src.agents.technicals import (
+    calculate_bollinger_bands,
+    calculate_macd,
+    calculate_returns,
+    calculate_rsi,
+)
+from src.tools import kernels, rolling_stats
 from src.tools.api import get_price_history
+from src.tools.indicator_cache import cached_indicator, indicator_scope
+
+
+def _moving_average(df: pd.DataFrame, column: str, window: int) -> pd.Series:
+    """简单移动平均，同一运行中相同K线区间只计算一次"""
+    values = cached_indicator(df, f'{column}_sma', (window,), lambda: kernels.rolling_mean(
+        df[column].to_numpy(dtype=float), window))
+    return pd.Series(values, index=df.index, copy=False)
+
+
+def _annualized_volatility(df: pd.DataFrame, window: int) -> pd.Series:
+    """日收益率的滚动标准差（年化）"""
+    values = cached_indicator(df, 'annualized_volatility', (window,), lambda: rolling_stats.rolling_moments(
+        calculate_returns(df).to_numpy(), window, order=2).std * np.sqrt(252))
+    return pd.Series(values, index=df.index, copy=False)
 
 
 def analyze_stock_data(symbol: str, start_date: str = None, end_date: str = None):
     """
     获取股票历史数据，计算技术指标，并保存为CSV文件
 
+    指标经过运行级指标缓存计算，在分析运行中调用时与技术分析代理共享结果。
+
     Args:
         symbol: 股票代码
         start_date: 开始日期，格式：YYYY-MM-DD
@@ -20,48 +44,39 @@ def analyze_stock_data(symbol: str, start_date: str = None, end_date: str = None
         print("未获取到数据")
         return
 
-    # 计算额外的技术指标
-    # 1. 移动平均线
-    df['ma5'] = df['close'].rolling(window=5).mean()
-    df['ma10'] = df['close'].rolling(window=10).mean()
-    df['ma20'] = df['close'].rolling(window=20).mean()
-    df['ma60'] = df['close'].rolling(window=60).mean()
-
-    # 2. MACD
-    exp1 = df['close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['close'].ewm(span=26, adjust=False).mean()
-    df['macd'] = exp1 - exp2
-    df['signal_line'] = df['macd'].ewm(span=9, adjust=False).mean()
-    df['macd_hist'] = df['macd'] - df['signal_line']
-
-    # 3. RSI
-    delta = df['close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['rsi'] = 100 - (100 / (1 + rs))
-
-    # 4. 布林带
-    df['bb_middle'] = df['close'].rolling(window=20).mean()
-    bb_std = df['close'].rolling(window=20).std()
-    df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
-    df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
-
-    # 5. 成交量相关指标
-    df['volume_ma5'] = df['volume'].rolling(window=5).mean()
-    df['volume_ma20'] = df['volume'].rolling(window=20).mean()
-    df['volume_ratio'] = df['volume'] / df['volume_ma5']
-
-    # 6. 价格动量指标
-    df['price_momentum'] = df['close'].pct_change(periods=5)
-    df['price_acceleration'] = df['price_momentum'].diff()
-
-    # 7. 波动率指标
-    df['daily_return'] = df['close'].pct_change()
-    df['volatility_5d'] = df['daily_return'].rolling(
-        window=5).std() * np.sqrt(252)
-    df['volatility_20d'] = df['daily_return'].rolling(
-        window=20).std() * np.sqrt(252)
+    with indicator_scope(symbol):
+        # 计算额外的技术指标
+        # 1. 移动平均线
+        for window in (5, 10, 20, 60):
+            df[f'ma{window}'] = _moving_average(df, 'close', window)
+
+        # 2. MACD
+        macd_line, signal_line = calculate_macd(df)
+        df['macd'] = macd_line
+        df['signal_line'] = signal_line
+        df['macd_hist'] = macd_line - signal_line
+
+        # 3. RSI
+        df['rsi'] = calculate_rsi(df, 14)
+
+        # 4. 布林带
+        df['bb_middle'] = _moving_average(df, 'close', 20)
+        df['bb_upper'], df['bb_lower'] = calculate_bollinger_bands(df, 20)
+
+        # 5. 成交量相关指标
+        df['volume_ma5'] = _moving_average(df, 'volume', 5)
+        df['volume_ma20'] = _moving_average(df, 'volume', 20)
+        df['volume_ratio'] = df['volume'] / df['volume_ma5']
+
+        # 6. 价格动量指标
+        df['price_momentum'] = cached_indicator(df, 'momentum', (5,), lambda: kernels.pct_change(
+            df['close'].to_numpy(dtype=float), 5))
+        df['price_acceleration'] = df['price_momentum'].diff()
+
+        # 7. 波动率指标
+        df['daily_return'] = calculate_returns(df)
+        df['volatility_5d'] = _annualized_volatility(df, 5)
+        df['volatility_20d'] = _annualized_volatility(df, 20)
 
     # 保存为CSV文件
     output_file = f"{symbol}_analysis_{datetime.now().strftime('%Y%m%d')}.csv"
@@ -0,0 +1,220 @@
+"""
+数据源接口 - 所有上游数据访问都经过 DataProvider，便于替换为离线回放
+
+- AkshareProvider: 实时访问 akshare（默认）
+- RecordingProvider: 包装另一个数据源，把每次调用的返回结果保存到本地
+- ReplayProvider: 只读取已保存的结果，不访问网络，结果完全确定
+
+通过环境变量选择数据源：
+    DATA_PROVIDER=akshare|record|replay（默认 akshare）
+    DATA_FIXTURE_DIR=录制文件目录（默认 src/data/fixtures）
+
+回放时价格和财务报表仍会经过本地缓存（PRICE_STORE_DIR、FINANCIAL_CACHE_DIR），
+需要可重复的结果时应把这两个目录指向空的临时目录。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from src.utils.file_utils import atomic_write, read_json, write_json_atomic
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('data_provider')
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "data", "fixtures")
+
+
+class FixtureNotFoundError(LookupError):
+    """回放模式下没有找到对应调用的录制结果"""
+
+
+class DataProvider:
+    """
+    数据源基类。方法名和参数与 akshare 保持一致，子类只需实现 _call。
+    """
+
+    def stock_zh_a_hist(self, symbol: str, period: str = "daily", start_date: str = "19700101",
+                        end_date: str = "20500101", adjust: str = "") -> pd.DataFrame:
+        """A股日线行情"""
+        return self._call("stock_zh_a_hist", symbol=symbol, period=period,
+                          start_date=start_date, end_date=end_date, adjust=adjust)
+
+    def stock_zh_a_spot_em(self) -> pd.DataFrame:
+        """全市场实时行情快照"""
+        return self._call("stock_zh_a_spot_em")
+
+    def stock_financial_analysis_indicator(self, symbol: str, start_year: str) -> pd.DataFrame:
+        """新浪财务指标"""
+        return self._call("stock_financial_analysis_indicator",
+                          symbol=symbol, start_year=start_year)
+
+    def stock_financial_report_sina(self, stock: str, symbol: str) -> pd.DataFrame:
+        """新浪财务报表（资产负债表、利润表、现金流量表）"""
+        return self._call("stock_financial_report_sina", stock=stock, symbol=symbol)
+
+    def stock_news_em(self, symbol: str) -> pd.DataFrame:
+        """东方财富个股新闻"""
+        return self._call("stock_news_em", symbol=symbol)
+
+    def _call(self, method: str, **kwargs) -> pd.DataFrame:
+        raise NotImplementedError
+
+
+class AkshareProvider(DataProvider):
+    """直接访问 akshare"""
+
+    def __init__(self):
+        # 延迟导入，回放模式下不需要安装 akshare
+        import akshare
+        self._ak = akshare
+
+    def _call(self, method: str, **kwargs) -> pd.DataFrame:
+        return getattr(self._ak, method)(**kwargs)
+
+
+def _call_key(method: str, kwargs: Dict[str, Any]) -> str:
+    """由方法名和参数生成录制文件名"""
+    payload = json.dumps({"method": method, "kwargs": kwargs},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class _FixtureStore:
+    """
+    录制文件目录：<root>/<method>/<key>.pkl 保存返回的 DataFrame，
+    同名 .json 记录调用参数和录制时间，便于检查和按参数查找
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def paths(self, method: str, kwargs: Dict[str, Any]):
+        base = os.path.join(self.root, method, _call_key(method, kwargs))
+        return base + ".pkl", base + ".json"
+
+    def save(self, method: str, kwargs: Dict[str, Any], result: pd.DataFrame):
+        data_path, meta_path = self.paths(method, kwargs)
+        atomic_write(data_path, result.to_pickle)
+        write_json_atomic(meta_path, {
+            "method": method,
+            "kwargs": kwargs,
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    def load(self, method: str, kwargs: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        data_path, _ = self.paths(method, kwargs)
+        if not os.path.exists(data_path):
+            return None
+        return pd.read_pickle(data_path)
+
+    def recorded_calls(self, method: str) -> List[Dict[str, Any]]:
+        """某个方法所有录制过的调用参数"""
+        directory = os.path.join(self.root, method)
+        if not os.path.isdir(directory):
+            return []
+        calls = []
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".json"):
+                meta = read_json(os.path.join(directory, name))
+                if meta:
+                    calls.append(meta.get("kwargs", {}))
+        return calls
+
+
+class RecordingProvider(DataProvider):
+    """包装另一个数据源，把每次成功调用的结果录制到本地"""
+
+    def __init__(self, upstream: DataProvider, fixture_dir: Optional[str] = None):
+        self.upstream = upstream
+        self.fixtures = _FixtureStore(fixture_dir or os.getenv(
+            "DATA_FIXTURE_DIR") or DEFAULT_FIXTURE_DIR)
+
+    def _call(self, method: str, **kwargs) -> pd.DataFrame:
+        result = self.upstream._call(method, **kwargs)
+        if isinstance(result, pd.DataFrame):
+            try:
+                self.fixtures.save(method, kwargs, result)
+            except Exception as e:
+                logger.warning(f"Failed to record {method}{kwargs}: {e}")
+        return result
+
+
+class ReplayProvider(DataProvider):
+    """只从录制文件返回结果，不访问网络"""
+
+    def __init__(self, fixture_dir: Optional[str] = None):
+        self.fixtures = _FixtureStore(fixture_dir or os.getenv(
+            "DATA_FIXTURE_DIR") or DEFAULT_FIXTURE_DIR)
+
+    def _call(self, method: str, **kwargs) -> pd.DataFrame:
+        result = self.fixtures.load(method, kwargs)
+        if result is None and method == "stock_zh_a_hist":
+            result = self._slice_price_history(**kwargs)
+        if result is None:
+            raise FixtureNotFoundError(
+                f"No recorded response for {method}{kwargs} in {self.fixtures.root}")
+        # 返回副本，调用方修改结果不影响后续回放
+        return result.copy()
+
+    def _slice_price_history(self, symbol, period, start_date, end_date, adjust):
+        """
+        本地价格缓存会按缺口请求不同的日期区间，录制和回放时的区间不一定相同。
+        找不到完全一致的调用时，从覆盖所请求区间的录制结果中截取。
+        """
+        for recorded in self.fixtures.recorded_calls("stock_zh_a_hist"):
+            if (recorded.get("symbol") != symbol or recorded.get("period") != period
+                    or recorded.get("adjust") != adjust):
+                continue
+            if not (recorded["start_date"] <= start_date and end_date <= recorded["end_date"]):
+                continue
+            df = self.fixtures.load("stock_zh_a_hist", recorded)
+            if df is None:
+                continue
+            if df.empty:
+                return df
+            dates = pd.to_datetime(df["日期"])
+            mask = (dates >= pd.Timestamp(start_date)) & (
+                dates <= pd.Timestamp(end_date))
+            return df[mask].reset_index(drop=True)
+        return None
+
+
+def _create_default_provider() -> DataProvider:
+    mode = os.getenv("DATA_PROVIDER", "akshare").lower()
+    if mode == "replay":
+        logger.info("Using recorded fixtures (replay mode)")
+        return ReplayProvider()
+    if mode == "record":
+        logger.info("Recording akshare responses to fixtures")
+        return RecordingProvider(AkshareProvider())
+    if mode != "akshare":
+        raise ValueError(f"Unknown DATA_PROVIDER: {mode}")
+    return AkshareProvider()
+
+
+_provider: Optional[DataProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_data_provider() -> DataProvider:
+    """获取当前进程使用的数据源，首次调用时按环境变量创建"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = _create_default_provider()
+    return _provider
+
+
+def set_data_provider(provider: Optional[DataProvider]):
+    """替换当前进程使用的数据源，传入 None 时恢复为按环境变量创建"""
+    global _provider
+    with _provider_lock:
+        _provider = provider
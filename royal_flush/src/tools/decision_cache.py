@@ -0,0 +1,160 @@
+"""
+决策缓存 - 把回测中每个交易日的智能体决策保存在本地，重复回测时直接复用
+
+缓存键为 (股票代码, 决策日期, 回看开始日期, 新闻条数, 持仓状态, 工作流指纹)：
+- 工作流指纹由图的节点和边、各代理函数所在模块及其（直接或间接）引用的 src 模块的源代码、
+  模型配置（环境变量）和 DECISION_CACHE_VERSION 哈希得到，修改工作流、代理及其依赖的工具代码、
+  提示词或模型后自动使用新的缓存；源代码之外的变化（如数据源返回的字段含义）需要手动递增版本号
+- 只有工作流中存在会读取持仓的代理（风险管理、投资组合管理）时，持仓状态才计入缓存键；
+  否则只修改初始资金、成交规则、仓位等执行层设置的回测可以复用全部决策
+
+每条决策单独保存为一个 JSON 文件（原子写入），多个回测进程可以同时读写同一个缓存目录。
+"""
+
+import hashlib
+import json
+import os
+import sys
+import types
+from typing import Any, Dict, Iterable, Optional, Set
+
+from src.utils.file_utils import read_json, write_json_atomic
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('decision_cache')
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "data", "decisions")
+
+# 会读取 state["data"]["portfolio"] 的代理，决策随持仓变化
+PORTFOLIO_AWARE_AGENTS = frozenset({"risk_management_agent", "portfolio_management_agent"})
+
+# 决策缓存的版本，计入工作流指纹；源代码之外影响决策的变化需要手动递增
+DECISION_CACHE_VERSION = 1
+
+# 源代码计入工作流指纹的模块前缀
+SOURCE_PACKAGE = "src."
+
+# 影响决策的配置（模型和数据源），计入工作流指纹；不包含 API 密钥
+FINGERPRINT_ENV_VARS = (
+    "OPENAI_COMPATIBLE_MODEL",
+    "OPENAI_COMPATIBLE_BASE_URL",
+    "GEMINI_MODEL",
+    "DATA_PROVIDER",
+)
+
+
+def _node_function(spec):
+    """取出图节点对应的代理函数（兼容不同版本 langgraph 的节点结构）"""
+    runnable = getattr(spec, "runnable", spec)
+    return getattr(runnable, "func", None)
+
+
+def _source_files(roots: Iterable[types.ModuleType]) -> Set[str]:
+    """roots 及其在模块级引用（import 的模块，或从中导入的函数、类等）的全部 src 模块的源文件"""
+    files, seen = set(), set()
+    stack = list(roots)
+    while stack:
+        module = stack.pop()
+        if module.__name__ in seen:
+            continue
+        seen.add(module.__name__)
+        if getattr(module, "__file__", None):
+            files.add(module.__file__)
+        for value in list(vars(module).values()):
+            if isinstance(value, types.ModuleType):
+                dependency = value
+            else:
+                name = getattr(value, "__module__", None)
+                dependency = sys.modules.get(name) if isinstance(name, str) else None
+            if dependency is not None and dependency.__name__.startswith(SOURCE_PACKAGE):
+                stack.append(dependency)
+    return files
+
+
+def workflow_fingerprint(app, env_vars: Iterable[str] = FINGERPRINT_ENV_VARS) -> str:
+    """
+    计算编译后工作流的指纹
+
+    Args:
+        app: StateGraph.compile() 的结果
+        env_vars: 计入指纹的环境变量
+
+    Returns:
+        十六进制的 SHA-256 摘要
+    """
+    graph = app.get_graph()
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        "nodes": sorted(graph.nodes),
+        "edges": sorted([edge.source, edge.target, bool(edge.conditional)] for edge in graph.edges),
+        "env": {name: os.getenv(name, "") for name in env_vars},
+        "version": DECISION_CACHE_VERSION,
+    }, sort_keys=True).encode("utf-8"))
+
+    modules = []
+    for spec in app.builder.nodes.values():
+        module = sys.modules.get(getattr(_node_function(spec), "__module__", None))
+        if module is not None:
+            modules.append(module)
+    for path in sorted(_source_files(modules)):
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def uses_portfolio(app) -> bool:
+    """工作流中是否存在会读取持仓的代理"""
+    return bool(PORTFOLIO_AWARE_AGENTS & set(app.get_graph().nodes))
+
+
+class DecisionCache:
+    """本地决策缓存"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv("DECISION_CACHE_DIR") or DEFAULT_CACHE_DIR
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, fingerprint: str, ticker: str, date: str, key: Dict[str, Any]) -> str:
+        key_digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+        return os.path.join(self.root, fingerprint[:16], ticker, f"{date}_{key_digest[:16]}.json")
+
+    def get(self, fingerprint: str, ticker: str, date: str,
+            key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的决策
+
+        Args:
+            fingerprint: 工作流指纹
+            ticker: 股票代码
+            date: 决策日期，格式：YYYY-MM-DD
+            key: 其余影响决策的参数（回看开始日期、持仓等），须可序列化为 JSON
+
+        Returns:
+            缓存的决策，不存在时返回 None
+        """
+        entry = read_json(self._path(fingerprint, ticker, date, key))
+        if entry is None or entry.get("fingerprint") != fingerprint or entry.get("key") != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logger.debug(f"Using cached decision for {ticker} on {date}")
+        return entry["decision"]
+
+    def put(self, fingerprint: str, ticker: str, date: str, key: Dict[str, Any],
+            decision: Dict[str, Any]) -> None:
+        """保存决策，参数同 get"""
+        try:
+            write_json_atomic(self._path(fingerprint, ticker, date, key), {
+                "fingerprint": fingerprint,
+                "ticker": ticker,
+                "date": date,
+                "key": key,
+                "decision": decision,
+            })
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Failed to cache decision for {ticker} on {date}: {e}")
+
+
+decision_cache = DecisionCache()
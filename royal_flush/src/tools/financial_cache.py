@@ -0,0 +1,160 @@
+"""
+财务报表缓存 - 按股票代码和报表类型保存新浪财务报表，按定期报告披露日历失效
+
+财务报表只有在新的定期报告（一季报、半年报、三季报、年报）发布后才会变化。
+缓存记录已获取数据中最新的报告期，在下一个报告期结束之前不可能出现新报告，
+直接使用缓存；下一个报告期结束后进入披露窗口，每天最多重新获取一次。
+"""
+
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from src.utils.file_utils import atomic_write, read_json, write_json_atomic
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('financial_cache')
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "data", "financial_reports")
+
+# 定期报告的报告期（月, 日）
+REPORT_PERIOD_ENDS = ((3, 31), (6, 30), (9, 30), (12, 31))
+
+# 披露窗口内重新检查的最小间隔
+DEFAULT_RECHECK_INTERVAL = timedelta(days=1)
+
+
+def latest_report_period(report: pd.DataFrame) -> Optional[date]:
+    """从新浪财务报表的“报告日”列中取出最新的报告期"""
+    if report is None or report.empty or "报告日" not in report.columns:
+        return None
+    periods = pd.to_datetime(
+        report["报告日"].astype(str), format="%Y%m%d", errors="coerce").dropna()
+    if periods.empty:
+        return None
+    return periods.max().date()
+
+
+def next_report_period(period: date) -> date:
+    """给定报告期的下一个报告期"""
+    for month, day in REPORT_PERIOD_ENDS:
+        candidate = date(period.year, month, day)
+        if candidate > period:
+            return candidate
+    return date(period.year + 1, *REPORT_PERIOD_ENDS[0])
+
+
+class FinancialReportCache:
+    """本地财务报表缓存"""
+
+    def __init__(self, root: Optional[str] = None,
+                 recheck_interval: timedelta = DEFAULT_RECHECK_INTERVAL):
+        self.root = root or os.getenv(
+            "FINANCIAL_CACHE_DIR") or DEFAULT_CACHE_DIR
+        self.recheck_interval = recheck_interval
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+    def get_report(self, symbol: str, report_type: str,
+                   fetcher: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        获取财务报表，缓存仍然有效时不访问数据源
+
+        Args:
+            symbol: 股票代码
+            report_type: 报表类型，如 "资产负债表"、"利润表"、"现金流量表"
+            fetcher: 从数据源获取该报表的函数
+
+        Returns:
+            报表 DataFrame，最新报告期在前（与数据源一致）
+        """
+        with self._key_lock(symbol, report_type):
+            cached, meta = self._load(symbol, report_type)
+            if cached is not None and self._is_valid(meta):
+                logger.debug(
+                    f"Using cached {report_type} for {symbol} (period {meta.get('latest_period')})")
+                return cached
+
+            try:
+                report = fetcher()
+            except Exception as e:
+                if cached is not None:
+                    logger.warning(
+                        f"Failed to refresh {report_type} for {symbol}, using cached data: {e}")
+                    return cached
+                raise
+
+            if report is None or report.empty:
+                return cached if cached is not None else pd.DataFrame()
+
+            self._save(symbol, report_type, report)
+            return report
+
+    def invalidate(self, symbol: str, report_type: Optional[str] = None):
+        """删除某只股票的缓存报表"""
+        directory = os.path.join(self.root, symbol)
+        if not os.path.isdir(directory):
+            return
+        for name in os.listdir(directory):
+            if report_type is None or name.startswith(f"{report_type}."):
+                os.remove(os.path.join(directory, name))
+
+    def _is_valid(self, meta: dict, today: Optional[date] = None) -> bool:
+        today = today or date.today()
+        fetched_at = datetime.fromisoformat(meta["fetched_at"])
+        latest_period = meta.get("latest_period")
+
+        if latest_period:
+            upcoming = next_report_period(
+                date.fromisoformat(latest_period))
+            # 下一个报告期尚未结束，不可能出现更新的报告
+            if today <= upcoming:
+                return True
+
+        # 处于披露窗口（或无法判断报告期），按间隔重新检查
+        return datetime.now() - fetched_at < self.recheck_interval
+
+    def _key_lock(self, symbol: str, report_type: str) -> threading.Lock:
+        key = (symbol, report_type)
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def _paths(self, symbol: str, report_type: str):
+        directory = os.path.join(self.root, symbol)
+        return (os.path.join(directory, f"{report_type}.pkl"),
+                os.path.join(directory, f"{report_type}.json"))
+
+    def _load(self, symbol: str, report_type: str):
+        data_path, meta_path = self._paths(symbol, report_type)
+        meta = read_json(meta_path)
+        if not meta or not os.path.exists(data_path):
+            return None, None
+        try:
+            return pd.read_pickle(data_path), meta
+        except Exception as e:
+            logger.warning(
+                f"Failed to read cached {report_type} for {symbol}: {e}")
+            return None, None
+
+    def _save(self, symbol: str, report_type: str, report: pd.DataFrame):
+        data_path, meta_path = self._paths(symbol, report_type)
+        period = latest_report_period(report)
+        atomic_write(data_path, report.to_pickle)
+        write_json_atomic(meta_path, {
+            "symbol": symbol,
+            "report_type": report_type,
+            "latest_period": period.isoformat() if period else None,
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+        })
+        logger.debug(
+            f"Cached {report_type} for {symbol} (period {period})")
+
+
+# 进程内共享的默认缓存实例
+financial_report_cache = FinancialReportCache()
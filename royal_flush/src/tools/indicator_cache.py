@@ -0,0 +1,168 @@
+"""
+指标缓存 - 同一次运行中，数据层和各个代理共享已经算过的指标序列
+
+缓存按运行ID隔离：run_hedge_fund 在整个工作流期间激活该运行的缓存，
+运行结束后释放。缓存键为 (股票代码, 最后一根K线日期, 指标名称, 参数,
+第一根K线日期, K线数量)，后两项区分同一只股票不同长度的价格序列。
+
+    with run_indicator_cache(run_id, symbol=ticker):    # 工作流入口
+        ...
+        cached_indicator(prices_df, "atr", (14, 7), compute)  # 代理内
+
+一次运行涉及多只股票时，用 indicator_scope(symbol) 声明当前处理的股票。
+
+没有激活缓存（如单独调用 calculate_* 函数）时 cached_indicator 直接计算，不做缓存。
+缓存的指标序列必须是 NumPy 数组（不接受 Series/DataFrame，数据层和代理按各自需要包装），
+数组被设为只读，调用方不能原地修改。
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('indicator_cache')
+
+
+class IndicatorCache:
+    """线程安全的指标缓存"""
+
+    def __init__(self):
+        self._values: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._values:
+                self.hits += 1
+                return self._values[key]
+
+        value = compute()
+        if isinstance(value, (pd.Series, pd.DataFrame)):
+            raise TypeError(f"Indicator {key!r} must be cached as a NumPy array, "
+                            f"got {type(value).__name__}")
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+
+        with self._lock:
+            self.misses += 1
+            # 并发计算同一个键时保留先写入的结果
+            return self._values.setdefault(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+_run_caches: Dict[str, IndicatorCache] = {}
+_run_caches_lock = threading.Lock()
+
+_active_cache: ContextVar[Optional[IndicatorCache]] = ContextVar(
+    "indicator_cache", default=None)
+_active_symbol: ContextVar[Optional[str]] = ContextVar(
+    "indicator_symbol", default=None)
+
+
+def get_run_cache(run_id: str) -> IndicatorCache:
+    """获取（不存在时创建）某次运行的缓存"""
+    with _run_caches_lock:
+        if run_id not in _run_caches:
+            _run_caches[run_id] = IndicatorCache()
+        return _run_caches[run_id]
+
+
+def release_run_cache(run_id: str):
+    """释放某次运行的缓存"""
+    with _run_caches_lock:
+        cache = _run_caches.pop(run_id, None)
+    if cache is not None:
+        logger.debug(
+            f"Released indicator cache for run {run_id}: {len(cache)} entries, "
+            f"{cache.hits} hits, {cache.misses} misses")
+
+
+@contextmanager
+def run_indicator_cache(run_id: str, symbol: Optional[str] = None):
+    """
+    在当前上下文中激活运行 run_id 的缓存，退出时释放
+
+    Args:
+        run_id: 运行ID
+        symbol: 可选，该运行分析的股票代码，相当于同时进入 indicator_scope(symbol)
+    """
+    cache = get_run_cache(run_id)
+    token = _active_cache.set(cache)
+    symbol_token = _active_symbol.set(symbol) if symbol else None
+    try:
+        yield cache
+    finally:
+        if symbol_token is not None:
+            _active_symbol.reset(symbol_token)
+        _active_cache.reset(token)
+        release_run_cache(run_id)
+
+
+@contextmanager
+def indicator_scope(symbol: str):
+    """声明当前上下文中 calculate_* 等函数处理的价格序列属于哪只股票"""
+    token = _active_symbol.set(symbol)
+    try:
+        yield
+    finally:
+        _active_symbol.reset(token)
+
+
+def active_indicator_cache() -> Optional[IndicatorCache]:
+    return _active_cache.get()
+
+
+def _bars_key(prices_df: pd.DataFrame) -> Optional[tuple]:
+    """(第一根K线日期, 最后一根K线日期, K线数量)，无法确定日期时返回 None"""
+    if len(prices_df) == 0:
+        return None
+    if "date" in prices_df.columns:
+        dates = prices_df["date"].to_numpy()
+    elif isinstance(prices_df.index, pd.DatetimeIndex):
+        dates = prices_df.index.to_numpy()
+    else:
+        return None
+    return pd.Timestamp(dates[0]), pd.Timestamp(dates[-1]), len(prices_df)
+
+
+def cached_indicator(prices_df: pd.DataFrame, name: str, params: Sequence[Hashable],
+                     compute: Callable[[], Any], symbol: Optional[str] = None) -> Any:
+    """
+    在当前运行的缓存中查找指标，未命中时调用 compute 计算并缓存
+
+    Args:
+        prices_df: 计算该指标所用的价格数据，用于确定K线区间
+        name: 指标名称
+        params: 指标参数
+        compute: 计算函数
+        symbol: 股票代码，默认使用 indicator_scope 声明的股票
+
+    Returns:
+        指标值（数组被设为只读）
+    """
+    cache = _active_cache.get()
+    symbol = symbol or _active_symbol.get()
+    if cache is None or symbol is None:
+        return compute()
+
+    bars = _bars_key(prices_df)
+    if bars is None:
+        return compute()
+
+    first_date, last_date, count = bars
+    key = (symbol, last_date, name, tuple(params), first_date, count)
+    return cache.get_or_compute(key, compute)
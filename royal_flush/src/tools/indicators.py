@@ -0,0 +1,259 @@
+"""
+指标注册表 - 声明指标及其依赖，按需只计算请求的指标和它们依赖的中间结果
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.tools.kernels import rolling_hurst_exponent
+from src.tools.rolling_stats import rolling_max, rolling_min, rolling_moments
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    name: str
+    func: Callable[["IndicatorContext"], Any]
+    requires: tuple
+    internal: bool = False
+
+
+class IndicatorContext(Mapping):
+    """
+    指标计算时的只读上下文：已计算的指标优先，其余名称从原始数据中读取。
+    只能访问在 requires 中声明过的指标，未声明的依赖会直接报错。
+    """
+
+    def __init__(self, data, values: Dict[str, Any]):
+        self.data = data
+        self._values = values
+
+    def __getitem__(self, name):
+        if name in self._values:
+            return self._values[name]
+        return self.data[name]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def index(self):
+        return self.data.index
+
+
+class IndicatorRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._specs: Dict[str, IndicatorSpec] = {}
+
+    def register(self, name: str, requires: Sequence[str] = (), internal: bool = False):
+        """
+        注册指标的装饰器
+
+        Args:
+            name: 指标名称
+            requires: 依赖的其他指标名称（原始数据列无需声明）
+            internal: 是否为中间结果，中间结果不会出现在默认输出中
+        """
+        def decorator(func):
+            if name in self._specs:
+                raise ValueError(f"Indicator already registered: {name}")
+            self._specs[name] = IndicatorSpec(
+                name, func, tuple(requires), internal)
+            return func
+        return decorator
+
+    def __contains__(self, name) -> bool:
+        return name in self._specs
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def public_names(self) -> List[str]:
+        """所有非中间结果的指标，按注册顺序排列"""
+        return [name for name, spec in self._specs.items() if not spec.internal]
+
+    def resolve(self, names: Iterable[str]) -> List[str]:
+        """
+        计算给定指标所需的最小指标集合
+
+        Returns:
+            按依赖关系排序（依赖在前）的指标名称列表
+        """
+        order: List[str] = []
+        visiting = set()
+
+        def visit(name):
+            if name in order:
+                return
+            if name not in self._specs:
+                raise KeyError(f"Unknown indicator: {name}")
+            if name in visiting:
+                raise ValueError(f"Circular indicator dependency: {name}")
+            visiting.add(name)
+            for dependency in self._specs[name].requires:
+                visit(dependency)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in names:
+            visit(name)
+        return order
+
+    def compute(self, data, names: Iterable[str],
+                memo: Optional[Callable[[str, Callable[[], Any]], Any]] = None) -> Dict[str, Any]:
+        """
+        计算指定指标
+
+        Args:
+            data: 原始数据（如包含 OHLCV 列的 DataFrame）
+            names: 需要的指标名称
+            memo: 可选，memo(name, compute) 返回缓存的指标值或调用 compute 计算，
+                  用于在多次调用之间共享结果（见 indicator_cache.cached_indicator）
+
+        Returns:
+            指标名称 -> 计算结果，只包含请求的指标
+        """
+        names = list(names)
+        values: Dict[str, Any] = {}
+        for name in self.resolve(names):
+            spec = self._specs[name]
+            allowed = {dep: values[dep] for dep in spec.requires}
+            ctx = IndicatorContext(data, allowed)
+            if memo is None:
+                values[name] = spec.func(ctx)
+            else:
+                values[name] = memo(name, lambda: spec.func(ctx))
+        return {name: values[name] for name in names}
+
+
+##### get_price_history 的衍生指标 #####
+price_history_indicators = IndicatorRegistry()
+
+# 在指标缓存中的键，未列出的为 (指标名称, ())。returns、true_range 与 technicals.py 定义相同，
+# 两者共用缓存结果；同名但定义不同的指标使用各自的键
+PRICE_HISTORY_CACHE_KEYS = {
+    "atr": ("atr", (14, 14)),  # technicals.calculate_atr 默认 min_periods=7
+    "hurst_exponent": ("rolling_hurst_exponent", (120, 60)),  # technicals 中为单个值
+}
+
+
+@price_history_indicators.register("returns", internal=True)
+def _returns(ctx):
+    return ctx["close"].pct_change()
+
+
+# 计算动量指标
+@price_history_indicators.register("momentum_1m")
+def _momentum_1m(ctx):
+    return ctx["close"].pct_change(periods=20)  # 20个交易日约等于1个月
+
+
+@price_history_indicators.register("momentum_3m")
+def _momentum_3m(ctx):
+    return ctx["close"].pct_change(periods=60)  # 60个交易日约等于3个月
+
+
+@price_history_indicators.register("momentum_6m")
+def _momentum_6m(ctx):
+    return ctx["close"].pct_change(periods=120)  # 120个交易日约等于6个月
+
+
+# 计算成交量动量（相对于20日平均成交量的变化）
+@price_history_indicators.register("volume_ma20")
+def _volume_ma20(ctx):
+    return ctx["volume"].rolling(window=20).mean()
+
+
+@price_history_indicators.register("volume_momentum", requires=["volume_ma20"])
+def _volume_momentum(ctx):
+    return ctx["volume"] / ctx["volume_ma20"]
+
+
+# 计算波动率指标
+# 1. 历史波动率 (20日)
+@price_history_indicators.register("historical_volatility", requires=["returns"])
+def _historical_volatility(ctx):
+    std = rolling_moments(ctx["returns"].to_numpy(dtype=float), 20, order=2).std
+    return pd.Series(std * np.sqrt(252), index=ctx.index)  # 年化
+
+
+@price_history_indicators.register("volatility_120d", requires=["returns"], internal=True)
+def _volatility_120d(ctx):
+    std = rolling_moments(ctx["returns"].to_numpy(dtype=float), 120, order=2).std
+    return pd.Series(std * np.sqrt(252), index=ctx.index)
+
+
+# 2. 波动率区间 (相对于过去120天的波动率的位置)
+@price_history_indicators.register(
+    "volatility_regime", requires=["historical_volatility", "volatility_120d"])
+def _volatility_regime(ctx):
+    volatility_120d = ctx["volatility_120d"].to_numpy(dtype=float)
+    vol_min = rolling_min(volatility_120d, 120)
+    vol_max = rolling_max(volatility_120d, 120)
+    vol_range = vol_max - vol_min
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.Series(np.where(
+            vol_range > 0,
+            (ctx["historical_volatility"].to_numpy(dtype=float) - vol_min) / vol_range,
+            0  # 当范围为0时返回0
+        ), index=ctx.index)
+
+
+# 3. 波动率Z分数
+@price_history_indicators.register("volatility_z_score", requires=["historical_volatility"])
+def _volatility_z_score(ctx):
+    hist_vol = ctx["historical_volatility"].to_numpy(dtype=float)
+    moments = rolling_moments(hist_vol, 120, order=2)  # 均值和标准差一次算出
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.Series((hist_vol - moments.mean) / moments.std, index=ctx.index)
+
+
+# 4. ATR比率
+@price_history_indicators.register("true_range", internal=True)
+def _true_range(ctx):
+    tr = pd.DataFrame()
+    tr["h-l"] = ctx["high"] - ctx["low"]
+    tr["h-pc"] = abs(ctx["high"] - ctx["close"].shift(1))
+    tr["l-pc"] = abs(ctx["low"] - ctx["close"].shift(1))
+    return tr[["h-l", "h-pc", "l-pc"]].max(axis=1)
+
+
+@price_history_indicators.register("atr", requires=["true_range"])
+def _atr(ctx):
+    return ctx["true_range"].rolling(window=14).mean()
+
+
+@price_history_indicators.register("atr_ratio", requires=["atr"])
+def _atr_ratio(ctx):
+    return ctx["atr"] / ctx["close"]
+
+
+# 计算统计套利指标
+# 1. 赫斯特指数 (使用过去120天的对数收益率，要求至少60个数据点)
+@price_history_indicators.register("hurst_exponent")
+def _hurst_exponent(ctx):
+    return pd.Series(rolling_hurst_exponent(
+        ctx["close"].to_numpy(dtype=float),
+        window=120,
+        min_periods=60
+    ), index=ctx.index)
+
+
+# 2. 偏度 (20日)
+@price_history_indicators.register("skewness", requires=["returns"])
+def _skewness(ctx):
+    return ctx["returns"].rolling(window=20).skew()
+
+
+# 3. 峰度 (20日)
+@price_history_indicators.register("kurtosis", requires=["returns"])
+def _kurtosis(ctx):
+    return ctx["returns"].rolling(window=20).kurt()
@@ -0,0 +1,382 @@
+"""
+NumPy 计算内核 - 对整段序列一次性计算滚动指标，避免逐行的 Python 回调
+
+递推和逐窗口的计算（ewm_mean、obv、rolling_hurst_exponent，以及 rolling_stats 的滚动极值）
+在安装了 numba 时自动改用 kernels_numba 中编译的实现；设置环境变量
+KERNEL_BACKEND=numpy 或调用 set_backend("numpy") 可强制使用 NumPy 实现。
+"""
+
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.tools import kernels_numba
+
+BACKENDS = ("numpy", "numba")
+
+
+def _default_backend() -> str:
+    requested = os.getenv("KERNEL_BACKEND", "auto").lower()
+    if requested == "numpy" or not kernels_numba.HAS_NUMBA:
+        return "numpy"
+    return "numba"
+
+
+_backend = _default_backend()
+
+
+def get_backend() -> str:
+    return _backend
+
+
+def set_backend(name: str) -> str:
+    """
+    切换计算后端
+
+    Args:
+        name: "numpy" 或 "numba"
+
+    Returns:
+        切换前的后端名称
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown kernel backend: {name}")
+    if name == "numba" and not kernels_numba.HAS_NUMBA:
+        raise ImportError("numba is not installed")
+    previous, _backend = _backend, name
+    return previous
+
+
+def rolling_hurst_exponent(close: np.ndarray, window: int = 120, min_periods: int = 60,
+                           max_lag: int = 10) -> np.ndarray:
+    """
+    滚动 Hurst 指数，等价于
+
+        log_returns = np.log(close / close.shift(1))
+        log_returns.rolling(window, min_periods=min_periods).apply(calculate_hurst)
+
+    其中 calculate_hurst 对窗口内的序列 s（对数收益率）再取 r = log(s_t / s_{t-1})，
+    丢弃 NaN 后对 lag = 2..min(max_lag, len(r) // 4 - 1) 分别计算 r 的滚动标准差均值 tau，
+    以 log(tau) 对 log(lag) 回归，斜率的一半即为 Hurst 指数。
+
+    实现方式：r 在窗口内总是全局序列的一个连续片段，因此先对全局序列用
+    sliding_window_view 一次算出每个 lag 的全部滚动标准差，再用前缀和求出每个窗口的
+    tau，最后对所有窗口做批量最小二乘。含 inf 的滚动窗口与 pandas 一样视为 NaN 丢弃。
+
+    与逐窗口回调的实现相比只有浮点求和顺序不同，结果差异在 1e-8 以内
+    （见 src/tools/test_hurst.py）。
+
+    Args:
+        close: 收盘价序列
+        window: 滚动窗口长度
+        min_periods: 窗口内至少需要的有效对数收益率个数
+        max_lag: 最大 lag
+
+    Returns:
+        与 close 等长的 Hurst 指数数组，无法计算的位置为 NaN
+    """
+    close = np.asarray(close, dtype=float)
+    if _backend == "numba":
+        return kernels_numba.rolling_hurst_exponent(
+            np.ascontiguousarray(close), window, min_periods, max_lag)
+
+    n_obs = len(close)
+    result = np.full(n_obs, np.nan)
+    if n_obs < 2:
+        return result
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_returns = np.empty(n_obs)
+        log_returns[0] = np.nan
+        log_returns[1:] = np.log(close[1:] / close[:-1])
+
+        # 窗口内 dropna 后的对数收益率是全局有效值序列的连续片段
+        valid_returns = ~np.isnan(log_returns)
+        values = log_returns[valid_returns]
+        ratios = np.full(len(values), np.nan)
+        ratios[1:] = np.log(values[1:] / values[:-1])
+
+    # 每个位置之前（不含）的有效对数收益率个数
+    valid_before = np.concatenate(([0], np.cumsum(valid_returns)))
+    ends = np.arange(n_obs)
+    starts = np.maximum(0, ends - window + 1)
+    counts = valid_before[ends + 1] - valid_before[starts]
+
+    # r 同样去掉 NaN，得到压缩序列 compact；第 k 个有效值对应 ratios 中的位置 kept[k]
+    kept = np.flatnonzero(~np.isnan(ratios))
+    compact = ratios[kept]
+
+    # 窗口覆盖 values[p..q]，对应 ratios[p+1..q]，再映射到 compact[a:b]
+    p = valid_before[starts]
+    q = valid_before[ends + 1] - 1
+    a = np.searchsorted(kept, p + 1, side="left")
+    b = np.searchsorted(kept, q, side="right")
+    sizes = b - a
+
+    active = (counts >= min_periods) & (counts >= 30) & (sizes >= 30)
+    if not active.any():
+        return result
+
+    lags = np.arange(2, max_lag + 1)
+    # 每个窗口实际使用的 lag 上界（不含）：min(max_lag + 1, len(r) // 4)
+    lag_limit = np.minimum(max_lag + 1, sizes // 4)
+
+    log_tau = np.full((n_obs, len(lags)), np.nan)
+    used = lags[None, :] < lag_limit[:, None]
+    missing = np.zeros(n_obs, dtype=bool)
+
+    for j, lag in enumerate(lags):
+        if len(compact) < lag:
+            missing |= used[:, j]
+            continue
+        windows = sliding_window_view(compact, lag)
+        finite = np.isfinite(windows).all(axis=1)
+        with np.errstate(invalid="ignore"):
+            stds = np.where(finite, np.std(windows, axis=1, ddof=1), 0.0)
+        std_sum = np.concatenate(([0.0], np.cumsum(stds)))
+        std_count = np.concatenate(([0], np.cumsum(finite)))
+
+        # 窗口内起点 j 取值 [a, b - lag]
+        lo = np.clip(a, 0, len(stds))
+        hi = np.clip(b - lag + 1, lo, len(stds))
+        total = std_sum[hi] - std_sum[lo]
+        count = std_count[hi] - std_count[lo]
+
+        # 某个 lag 没有任何有效标准差时，原实现 tau 与 lags 长度不一致，polyfit 报错返回 NaN
+        missing |= used[:, j] & (count == 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_tau[:, j] = np.log(total / count)
+
+    weights = used & active[:, None] & ~missing[:, None]
+    # tau 为 0 时 log 为 -inf，原实现同样得到 NaN
+    degenerate = (weights & ~np.isfinite(log_tau)).any(axis=1)
+    rows = active & ~missing & ~degenerate & (weights.sum(axis=1) >= 3)
+
+    x = np.broadcast_to(np.log(lags), log_tau.shape)
+    w = weights[rows].astype(float)
+    xs = x[rows]
+    ys = np.where(weights[rows], log_tau[rows], 0.0)
+
+    # 批量一元线性回归：slope = cov(x, y) / var(x)
+    n = w.sum(axis=1)
+    x_mean = (w * xs).sum(axis=1) / n
+    y_mean = (w * ys).sum(axis=1) / n
+    dx = (xs - x_mean[:, None]) * w
+    slope = (dx * (ys - y_mean[:, None])).sum(axis=1) / (dx * dx).sum(axis=1)
+
+    result[rows] = slope / 2.0
+    result[~np.isfinite(result)] = np.nan
+    return result
+
+
+##### 通用数组内核 #####
+# 以下函数沿第 0 轴（时间）计算，输入可以是一维序列，也可以是 (时间, 股票, ...) 的多维数组，
+# 与对每一列分别调用对应的 pandas 方法结果一致（只有浮点求和顺序不同）。
+
+# 滚动窗口分块计算时单块最多展开的元素个数，限制内存占用
+_ROLLING_CHUNK_ELEMENTS = 1 << 22
+
+
+def _as_2d(values: np.ndarray):
+    """把 (n, ...) 数组变为 (n, m)，返回二维数组和还原形状的函数"""
+    values = np.asarray(values, dtype=float)
+    shape = values.shape
+    flat = values.reshape(shape[0], -1) if values.ndim != 2 else values
+    return flat, (lambda result: result.reshape(shape))
+
+
+def shift(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """等价于 Series.shift(periods)，空出的位置为 NaN"""
+    values = np.asarray(values, dtype=float)
+    result = np.full_like(values, np.nan)
+    if periods == 0:
+        result[:] = values
+    elif abs(periods) < len(values):
+        if periods > 0:
+            result[periods:] = values[:-periods]
+        else:
+            result[:periods] = values[-periods:]
+    return result
+
+
+def diff(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """等价于 Series.diff(periods)"""
+    return np.asarray(values, dtype=float) - shift(values, periods)
+
+
+def pct_change(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """等价于 Series.pct_change(periods)（不填充缺失值）"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.asarray(values, dtype=float) / shift(values, periods) - 1
+
+
+def _linear_recurrence(b: np.ndarray, factor: np.ndarray) -> np.ndarray:
+    """
+    求解 y[t] = factor * y[t-1] + b[t]（y[-1] = 0），b 为 (n, m) 数组，factor 为 (m,) 数组
+
+    分块用累加和求解：块内 y[i] = factor^i * (factor * carry + sum_{s<=i} b[s] * factor^-s)，
+    块长保证所有列的 factor^-i 都不超过 1e4，避免长序列上的上溢和精度损失。
+    """
+    n = len(b)
+    result = np.empty_like(b)
+    if n == 0:
+        return result
+    if np.all(factor == 0):
+        result[:] = b
+        return result
+
+    smallest = factor.min()
+    with np.errstate(divide="ignore"):
+        block = n if smallest >= 1 else max(1, int(np.log(1e4) / -np.log(smallest)))
+    carry = np.zeros(b.shape[1:])
+    for start in range(0, n, block):
+        chunk = b[start:start + block]
+        steps = np.arange(len(chunk))[:, None]
+        decay = factor ** steps
+        with np.errstate(divide="ignore"):
+            scaled = np.cumsum(chunk * factor ** -steps, axis=0)
+        result[start:start + len(chunk)] = decay * (factor * carry + scaled)
+        carry = result[start + len(chunk) - 1]
+    return result
+
+
+def _ewm_mean_column(column: np.ndarray, alpha: float, adjust: bool) -> np.ndarray:
+    """逐点复现 pandas ewm().mean() 的递推，用于序列中间有缺失值的列"""
+    old_wt_factor = 1.0 - alpha
+    new_wt = 1.0 if adjust else alpha
+    result = np.full(len(column), np.nan)
+    weighted = np.nan
+    old_wt = 1.0
+    for i, value in enumerate(column):
+        is_observation = value == value
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_observation:
+                if weighted != value:
+                    weighted = ((old_wt * weighted) + (new_wt * value)) / \
+                        (old_wt + new_wt)
+                old_wt = old_wt + new_wt if adjust else 1.0
+        elif is_observation:
+            weighted = value
+        result[i] = weighted
+    return result
+
+
+def ewm_mean(values: np.ndarray, span, adjust: bool = False) -> np.ndarray:
+    """
+    等价于 ewm(span=span, adjust=adjust).mean()（ignore_na=False, min_periods=0）
+
+    span 可以是标量，也可以是能广播到 values.shape[1:] 的数组，即每一列使用各自的 span
+    （如参数扫描时 (时间, 参数) 数组的每一列对应一个参数）。
+
+    adjust=True 时加权平均等于两个线性递推之比（加权和 / 权重和），缺失值只使权重衰减；
+    adjust=False 时首个观测值之后没有缺失值的列直接用线性递推，
+    其余列逐点递推。
+    """
+    values = np.asarray(values, dtype=float)
+    values2d, restore = _as_2d(values)
+    span = np.broadcast_to(np.asarray(span, dtype=float), values.shape[1:]).reshape(-1)
+    com = (span - 1) / 2.0
+    alpha = 1.0 / (1.0 + com)
+    factor = 1.0 - alpha
+    if _backend == "numba":
+        return restore(kernels_numba.ewm_mean(
+            np.ascontiguousarray(values2d), np.ascontiguousarray(alpha), adjust))
+
+    observed = ~np.isnan(values2d)
+    x = np.where(observed, values2d, 0.0)
+    started = np.cumsum(observed, axis=0) > 0
+
+    if adjust:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = _linear_recurrence(x, factor) / \
+                _linear_recurrence(observed.astype(float), factor)
+    else:
+        # 首个观测值直接作为初值，之后 y = (1 - alpha) * y + alpha * x
+        first = started.copy()
+        first[1:] &= ~started[:-1]
+        b = alpha * x
+        b[first] = x[first]
+        result = _linear_recurrence(b, factor)
+        gapped = (started & ~observed).any(axis=0)
+        for j in np.flatnonzero(gapped):
+            result[:, j] = _ewm_mean_column(values2d[:, j], alpha[j], adjust)
+
+    result[~started] = np.nan
+    return restore(result)
+
+
+def _rolling(values: np.ndarray, window: int, min_periods: int, reducer) -> np.ndarray:
+    """
+    对每个位置的滚动窗口（开头不足 window 时为部分窗口）调用 reducer(windows, counts)，
+    窗口内有效值个数少于 min_periods 的位置为 NaN
+    """
+    values2d, restore = _as_2d(values)
+    n, m = values2d.shape
+    result = np.full((n, m), np.nan)
+    if n == 0:
+        return restore(result)
+
+    padded = np.concatenate([np.full((window - 1, m), np.nan), values2d])
+    windows = sliding_window_view(padded, window, axis=0)  # (n, m, window)
+    chunk = max(1, _ROLLING_CHUNK_ELEMENTS // max(1, m * window))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for start in range(0, n, chunk):
+            block = windows[start:start + chunk]
+            counts = (~np.isnan(block)).sum(axis=-1)
+            reduced = reducer(block, counts)
+            result[start:start + chunk] = np.where(
+                counts >= max(min_periods, 1), reduced, np.nan)
+    return restore(result)
+
+
+def _window_moments(block: np.ndarray, counts: np.ndarray):
+    """窗口均值以及去均值后的窗口（缺失值为 0），窗口内全部取值相同时均值精确等于该值"""
+    total = np.where(np.isnan(block), 0.0, block).sum(axis=-1)
+    mean = total / counts
+    low, high = np.fmin.reduce(block, axis=-1), np.fmax.reduce(block, axis=-1)
+    uniform = (low == high) & np.isfinite(low)
+    mean = np.where(uniform, low, mean)
+    centered = np.where(np.isnan(block), 0.0, block - mean[..., None])
+    return mean, centered, uniform
+
+
+def rolling_sum(values: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    """等价于 rolling(window, min_periods).sum()"""
+    return _rolling(values, window, window if min_periods is None else min_periods,
+                    lambda block, counts: np.where(np.isnan(block), 0.0, block).sum(axis=-1))
+
+
+def rolling_mean(values: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    """等价于 rolling(window, min_periods).mean()"""
+    return _rolling(values, window, window if min_periods is None else min_periods,
+                    lambda block, counts: _window_moments(block, counts)[0])
+
+
+def rolling_std(values: np.ndarray, window: int, min_periods: int = None,
+                ddof: int = 1) -> np.ndarray:
+    """
+    等价于 rolling(window, min_periods).std(ddof=ddof)，按两遍法计算方差。
+    窗口内取值全部相同时结果精确为 0（pandas 的在线算法在长时间停牌后会留下约 1e-7 的舍入误差）
+    """
+    def reducer(block, counts):
+        _, centered, uniform = _window_moments(block, counts)
+        variance = (centered * centered).sum(axis=-1) / (counts - ddof)
+        variance = np.where(counts > ddof, variance, np.nan)
+        return np.sqrt(np.where(uniform & (counts > ddof), 0.0, variance))
+    return _rolling(values, window, window if min_periods is None else min_periods, reducer)
+
+
+def obv(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """能量潮：上涨加成交量，下跌减成交量，持平（或无法比较）不变，首行为 0"""
+    close2d, restore = _as_2d(close)
+    volume2d, _ = _as_2d(volume)
+    if _backend == "numba":
+        return restore(kernels_numba.obv(
+            np.ascontiguousarray(close2d), np.ascontiguousarray(volume2d)))
+    direction = np.sign(diff(close2d))
+    steps = np.where(direction > 0, volume2d, np.where(direction < 0, -volume2d, 0.0))
+    steps[:1] = 0.0
+    return restore(np.cumsum(steps, axis=0))
@@ -0,0 +1,232 @@
+"""
+numba 编译的计算内核 - kernels.py 中难以用 NumPy 向量化的递推和逐窗口计算
+
+包括指数加权平均（EMA、MACD、ADX 平滑）、OBV 累加、单调队列实现的滚动最小/最大值
+以及逐窗口的滚动 Hurst 指数。numba 未安装时 HAS_NUMBA 为 False，
+kernels.py 自动使用 NumPy 实现；两者的一致性见 src/tools/test_kernels_numba.py。
+
+所有函数的输入为 float64 数组，二维数组沿第 0 轴（时间）逐列计算。
+"""
+
+import numpy as np
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    numba = None
+    HAS_NUMBA = False
+
+
+def _jit(func):
+    """numba 可用时编译函数（除零按 NumPy 规则得到 inf/NaN），否则原样返回"""
+    if not HAS_NUMBA:
+        return func
+    return numba.njit(cache=True, nogil=True, error_model="numpy")(func)
+
+
+@_jit
+def ewm_mean(values, alpha, adjust):
+    """
+    逐列复现 pandas ewm(alpha=alpha, adjust=adjust).mean() 的递推
+
+    values 为 (n, m)，alpha 为 (m,)，每一列使用各自的 alpha
+    """
+    n, m = values.shape
+    result = np.empty((n, m))
+    for j in range(m):
+        old_wt_factor = 1.0 - alpha[j]
+        new_wt = 1.0 if adjust else alpha[j]
+        weighted = np.nan
+        old_wt = 1.0
+        for i in range(n):
+            value = values[i, j]
+            is_observation = value == value
+            if weighted == weighted:
+                old_wt *= old_wt_factor
+                if is_observation:
+                    if weighted != value:
+                        weighted = ((old_wt * weighted) + (new_wt * value)) / \
+                            (old_wt + new_wt)
+                    old_wt = old_wt + new_wt if adjust else 1.0
+            elif is_observation:
+                weighted = value
+            result[i, j] = weighted
+    return result
+
+
+@_jit
+def obv(close, volume):
+    """能量潮：上涨加成交量，下跌减成交量，持平（或无法比较）不变，首行为 0"""
+    n, m = close.shape
+    result = np.empty((n, m))
+    for j in range(m):
+        total = 0.0
+        if n > 0:
+            result[0, j] = 0.0
+        for i in range(1, n):
+            change = close[i, j] - close[i - 1, j]
+            if change > 0:
+                total += volume[i, j]
+            elif change < 0:
+                total -= volume[i, j]
+            result[i, j] = total
+    return result
+
+
+@_jit
+def rolling_extreme(values, window, min_periods, use_max):
+    """
+    滚动最小值（use_max=False）或最大值，等价于 rolling(window, min_periods).min()/max()
+
+    单调队列保存窗口内可能成为极值的位置，每个值只进出队列一次。
+    """
+    n, m = values.shape
+    result = np.full((n, m), np.nan)
+    queue = np.empty(n, dtype=np.int64)
+    for j in range(m):
+        head = 0
+        tail = 0
+        count = 0
+        for i in range(n):
+            value = values[i, j]
+            if value == value:
+                count += 1
+                if use_max:
+                    while tail > head and values[queue[tail - 1], j] <= value:
+                        tail -= 1
+                else:
+                    while tail > head and values[queue[tail - 1], j] >= value:
+                        tail -= 1
+                queue[tail] = i
+                tail += 1
+            if i >= window:
+                leaving = values[i - window, j]
+                if leaving == leaving:
+                    count -= 1
+                if tail > head and queue[head] <= i - window:
+                    head += 1
+            if count >= min_periods and count > 0:
+                result[i, j] = values[queue[head], j]
+    return result
+
+
+@_jit
+def rolling_hurst_exponent(close, window, min_periods, max_lag):
+    """
+    滚动 Hurst 指数，定义见 kernels.rolling_hurst_exponent
+
+    每个窗口内：对数收益率去掉 NaN 后再取 r = log(s_t / s_{t-1}) 并去掉 NaN，
+    对 lag = 2..min(max_lag, len(r) // 4 - 1) 求 r 的滚动标准差（含 inf 的窗口丢弃）均值 tau，
+    log(tau) 对 log(lag) 回归的斜率的一半即为 Hurst 指数。
+
+    窗口内的 r 总是全局序列 r 的一个连续片段，因此每个 lag 的滚动标准差只对全局序列
+    计算一次，再用前缀和求每个窗口的 tau。
+    """
+    n = len(close)
+    result = np.full(n, np.nan)
+    if n < 2:
+        return result
+
+    # 有效对数收益率 values 及每个位置之前（不含）的有效个数
+    values = np.empty(n)
+    valid_before = np.zeros(n + 1, dtype=np.int64)
+    count = 0
+    for t in range(n):
+        if t > 0:
+            log_return = np.log(close[t] / close[t - 1])
+            if log_return == log_return:
+                values[count] = log_return
+                count += 1
+        valid_before[t + 1] = count
+
+    # r 去掉 NaN 后的压缩序列 compact，kept[k] 为其在 values 中对应的位置
+    compact = np.empty(max(count, 1))
+    kept = np.empty(max(count, 1), dtype=np.int64)
+    size = 0
+    for k in range(1, count):
+        ratio = np.log(values[k] / values[k - 1])
+        if ratio == ratio:
+            compact[size] = ratio
+            kept[size] = k
+            size += 1
+
+    # 每个 lag 的滚动标准差前缀和（含 inf 的窗口不计入）
+    lags = max_lag - 1
+    std_sum = np.zeros((lags, size + 1))
+    std_count = np.zeros((lags, size + 1), dtype=np.int64)
+    for j in range(lags):
+        lag = j + 2
+        for s in range(size):
+            std = 0.0
+            finite = 0
+            if s + lag <= size:
+                mean = 0.0
+                finite = 1
+                for k in range(s, s + lag):
+                    if not np.isfinite(compact[k]):
+                        finite = 0
+                        break
+                    mean += compact[k]
+                if finite:
+                    mean /= lag
+                    squares = 0.0
+                    for k in range(s, s + lag):
+                        squares += (compact[k] - mean) ** 2
+                    std = np.sqrt(squares / (lag - 1))
+            std_sum[j, s + 1] = std_sum[j, s] + std
+            std_count[j, s + 1] = std_count[j, s] + finite
+
+    log_lags = np.empty(lags)
+    log_tau = np.empty(lags)
+    for i in range(n):
+        start = max(0, i - window + 1)
+        in_window = valid_before[i + 1] - valid_before[start]
+        if in_window < min_periods or in_window < 30:
+            continue
+
+        # 窗口覆盖 values[p..q]，对应 r 中 kept 落在 [p + 1, q] 的部分 compact[a:b]
+        p = valid_before[start]
+        q = valid_before[i + 1] - 1
+        a = np.searchsorted(kept[:size], p + 1)
+        b = np.searchsorted(kept[:size], q, side="right")
+        if b - a < 30:
+            continue
+
+        lag_stop = min(max_lag + 1, (b - a) // 4)
+        used = 0
+        valid = True
+        for lag in range(2, lag_stop):
+            j = lag - 2
+            hi = max(b - lag + 1, a)
+            windows = std_count[j, hi] - std_count[j, a]
+            if windows == 0:
+                valid = False
+                break
+            log_lags[used] = np.log(lag)
+            log_tau[used] = np.log((std_sum[j, hi] - std_sum[j, a]) / windows)
+            if not np.isfinite(log_tau[used]):
+                valid = False
+                break
+            used += 1
+        if not valid or used < 3:
+            continue
+
+        # 一元线性回归：slope = cov(x, y) / var(x)
+        x_mean = 0.0
+        y_mean = 0.0
+        for k in range(used):
+            x_mean += log_lags[k]
+            y_mean += log_tau[k]
+        x_mean /= used
+        y_mean /= used
+        covariance = 0.0
+        variance = 0.0
+        for k in range(used):
+            dx = log_lags[k] - x_mean
+            covariance += dx * (log_tau[k] - y_mean)
+            variance += dx * dx
+        hurst = covariance / variance / 2.0
+        if np.isfinite(hurst):
+            result[i] = hurst
+    return result
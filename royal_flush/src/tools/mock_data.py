@@ -0,0 +1,83 @@
+"""
+模拟行情数据 - 各测试与基准共用的随机日线，以及替换 api 日线数据源的 stub_price_source
+
+收盘价为几何随机游走并按分取整（取整会产生涨跌为 0 的交易日），同一 seed 生成的数据固定。
+"""
+
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+def _mock_close(rng: np.random.Generator, days: int, symbols: Optional[int] = None,
+                drift: float = 0.0, volatile: bool = False) -> np.ndarray:
+    shape = days if symbols is None else (days, symbols)
+    returns = rng.normal(drift, 0.02, shape)
+    if volatile:
+        # 每 200 个交易日中前 60 日波动放大，使技术分析出现看多、看空信号
+        burst = np.where(np.arange(days) % 200 < 60, 2.5, 1.0)
+        returns = returns * (burst if symbols is None else burst[:, None])
+    return np.round(20 * np.exp(np.cumsum(returns, axis=0)), 2)
+
+
+def generate_mock_close(days: int, symbols: Optional[int] = None, seed: int = 0,
+                        volatile: bool = False) -> np.ndarray:
+    """模拟收盘价；给出 symbols 时返回 (days, symbols) 的面板，各列相互独立"""
+    return _mock_close(np.random.default_rng(seed), days, symbols, volatile=volatile)
+
+
+def generate_mock_bars(days: int, seed: int = 0, start_date: str = "2020-01-01",
+                       volatile: bool = False, flat: Optional[Tuple[int, int]] = None,
+                       open_noise: bool = False, drift: float = 0.0) -> pd.DataFrame:
+    """
+    模拟日线（date/open/high/low/close/volume），日期为从 start_date 开始的连续工作日
+
+    Args:
+        volatile: 周期性放大波动，使各策略都出现非中性信号
+        flat: (begin, end)，该区间内收盘价不变，模拟长时间停牌
+        open_noise: 开盘价在收盘价附近随机波动；否则开盘价等于收盘价
+        drift: 日收益率的均值
+    """
+    rng = np.random.default_rng(seed)
+    close = _mock_close(rng, days, drift=drift, volatile=volatile)
+    if flat is not None:
+        begin, end = flat
+        close[begin:end] = close[begin]
+    spread = np.round(np.abs(rng.normal(0, 0.01, days)) * close, 2)
+    open_ = np.round(close * (1 + rng.normal(0, 0.005, days)), 2) if open_noise else close
+    return pd.DataFrame({
+        "date": pd.bdate_range(start_date, periods=days),
+        "open": open_,
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.integers(1_000, 100_000, days).astype(float),
+    })
+
+
+@contextmanager
+def stub_price_source(bars: Union[pd.DataFrame, Dict[str, pd.DataFrame]]):
+    """
+    在上下文中让 api 的日线请求返回 bars 中对应区间的数据，本地行情存储使用临时目录
+
+    bars 也可以是 股票代码 -> 日线 的字典，请求字典中没有的股票时抛出 ConnectionError
+    """
+    from src.tools import api
+
+    def fetch(symbol, start_date, end_date, adjust):
+        symbol_bars = bars.get(symbol) if isinstance(bars, dict) else bars
+        if symbol_bars is None:
+            raise ConnectionError(f"no price history for {symbol}")
+        mask = (symbol_bars["date"] >= start_date) & (symbol_bars["date"] <= end_date)
+        return symbol_bars.loc[mask].reset_index(drop=True)
+
+    original_fetch, original_root = api._fetch_price_bars, api.price_store.root
+    with tempfile.TemporaryDirectory() as root:
+        api._fetch_price_bars, api.price_store.root = fetch, root
+        try:
+            yield
+        finally:
+            api._fetch_price_bars, api.price_store.root = original_fetch, original_root
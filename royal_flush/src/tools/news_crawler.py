@@ -15,14 +15,8 @@ except ImportError:
     google_search_sync = None
     SearchOptions = None
 
-# 保留 akshare 作为备用
-try:
-    import akshare as ak
-    import requests
-    from bs4 import BeautifulSoup
-except ImportError:
-    print("警告: akshare 不可用")
-    ak = None
+# 保留 akshare 作为备用，通过数据源接口访问以支持离线回放
+from src.tools.data_provider import get_data_provider
 
 
 def build_search_query(symbol: str, date: str = None) -> str:
@@ -149,12 +143,9 @@ def convert_search_results_to_news_format(search_results, symbol: str) -> list:
 
 def get_stock_news_via_akshare(symbol: str, max_news: int = 10) -> list:
     """使用 akshare 获取股票新闻的原始方法"""
-    if ak is None:
-        return []
-
     try:
         # 获取新闻列表
-        news_df = ak.stock_news_em(symbol=symbol)
+        news_df = get_data_provider().stock_news_em(symbol=symbol)
         if news_df is None or len(news_df) == 0:
             print(f"未获取到{symbol}的新闻数据")
             return []
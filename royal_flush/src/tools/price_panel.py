@@ -0,0 +1,156 @@
+"""
+列式价格数据 - 单只股票的 PriceBars 和多股票对齐的 PricePanel，均以 NumPy 数组保存
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+PANEL_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+@dataclass
+class PriceBars:
+    """
+    单只股票的列式价格数据
+
+    dates 为升序的 datetime64[ns] 数组，columns 中每一列是与 dates 等长的一维数组。
+    在 AgentState 中代替逐行的字典列表传递，切片返回共享内存的视图。
+    """
+    dates: np.ndarray
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __getitem__(self, key):
+        """按列名获取一维数组；传入切片时返回对应行的 PriceBars（视图，不复制）"""
+        if isinstance(key, slice):
+            return PriceBars(self.dates[key],
+                             {name: values[key] for name, values in self.columns.items()})
+        if key == "date":
+            return self.dates
+        return self.columns[key]
+
+    def __contains__(self, name) -> bool:
+        return name == "date" or name in self.columns
+
+    @property
+    def empty(self) -> bool:
+        return len(self.dates) == 0
+
+    @property
+    def last_date(self) -> Optional[pd.Timestamp]:
+        return pd.Timestamp(self.dates[-1]) if len(self.dates) else None
+
+    def between(self, start_date=None, end_date=None) -> "PriceBars":
+        """截取 [start_date, end_date] 内的行（视图，不复制）"""
+        lo = 0 if start_date is None else np.searchsorted(
+            self.dates, np.datetime64(pd.Timestamp(start_date), "ns"), side="left")
+        hi = len(self.dates) if end_date is None else np.searchsorted(
+            self.dates, np.datetime64(pd.Timestamp(end_date), "ns"), side="right")
+        return self[lo:hi]
+
+    def to_frame(self) -> pd.DataFrame:
+        """转换为以 date 为第一列的 DataFrame，不复制数组"""
+        return pd.DataFrame({"date": self.dates, **self.columns}, copy=False)
+
+    def to_dict(self) -> Dict[str, list]:
+        """按列序列化为 JSON 友好的字典，供 serialize_agent_state 使用"""
+        result = {"date": np.datetime_as_string(self.dates, unit="D").tolist()}
+        for name, values in self.columns.items():
+            result[name] = values.tolist()
+        return result
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "PriceBars":
+        """由 get_price_history 返回的 DataFrame 构建，只保留数值列"""
+        if df is None or "date" not in df.columns:
+            return cls(np.array([], dtype="datetime64[ns]"))
+        dates = pd.to_datetime(df["date"]).to_numpy(dtype="datetime64[ns]")
+        columns = {name: df[name].to_numpy()
+                   for name in df.columns
+                   if name != "date" and pd.api.types.is_numeric_dtype(df[name])}
+        return cls(dates, columns)
+
+
+@dataclass
+class PricePanel:
+    """
+    对齐后的价格面板
+
+    dates 为所有股票交易日的并集（升序），每个字段是形状为
+    (len(dates), len(symbols)) 的 float64 数组，某只股票在某日没有数据
+    （停牌、未上市或获取失败）时对应位置为 NaN。
+    """
+    dates: np.ndarray
+    symbols: List[str]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    failed_symbols: List[str] = field(default_factory=list)
+
+    @property
+    def shape(self) -> tuple:
+        return self.close.shape
+
+    def get(self, name: str) -> np.ndarray:
+        """按字段名获取二维数组"""
+        if name not in PANEL_FIELDS:
+            raise KeyError(f"Unknown panel field: {name}")
+        return getattr(self, name)
+
+    def symbol_index(self, symbol: str) -> int:
+        return self.symbols.index(symbol)
+
+    def to_frame(self, symbol: str) -> pd.DataFrame:
+        """取出单只股票的数据，去掉没有行情的日期"""
+        i = self.symbol_index(symbol)
+        df = pd.DataFrame({"date": self.dates})
+        for name in PANEL_FIELDS:
+            df[name] = self.get(name)[:, i]
+        return df.dropna(subset=["close"]).reset_index(drop=True)
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame],
+                    symbols: Sequence[str] = None) -> "PricePanel":
+        """
+        由单只股票的 DataFrame 构建面板
+
+        Args:
+            frames: 股票代码 -> 包含 date 及 OHLCV 列的 DataFrame
+            symbols: 面板的列顺序，默认使用 frames 的键顺序；
+                     不在 frames 中或数据为空的股票记为获取失败
+        """
+        symbols = list(symbols) if symbols is not None else list(frames)
+        valid = {s: frames[s] for s in symbols
+                 if s in frames and frames[s] is not None and not frames[s].empty}
+
+        if valid:
+            dates = np.unique(np.concatenate(
+                [pd.to_datetime(df["date"]).to_numpy(dtype="datetime64[ns]") for df in valid.values()]))
+        else:
+            dates = np.array([], dtype="datetime64[ns]")
+
+        arrays = {name: np.full((len(dates), len(symbols)), np.nan)
+                  for name in PANEL_FIELDS}
+        for j, symbol in enumerate(symbols):
+            df = valid.get(symbol)
+            if df is None:
+                continue
+            rows = np.searchsorted(dates, pd.to_datetime(
+                df["date"]).to_numpy(dtype="datetime64[ns]"))
+            for name in PANEL_FIELDS:
+                if name in df.columns:
+                    arrays[name][rows, j] = df[name].to_numpy(dtype=float)
+
+        return cls(
+            dates=dates,
+            symbols=symbols,
+            failed_symbols=[s for s in symbols if s not in valid],
+            **arrays,
+        )
@@ -0,0 +1,226 @@
+"""
+本地行情存储 - 按复权类型和股票代码分区保存已获取的日线数据
+
+目录结构：
+    <root>/adjust=<qfq|hfq|none>/symbol=<代码>/bars.parquet
+    <root>/adjust=<qfq|hfq|none>/symbol=<代码>/meta.json
+
+meta.json 记录已覆盖的自然日区间（covered_start ~ covered_end），
+再次请求时只向数据源拉取区间前后缺失的部分。
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.file_utils import atomic_write, read_json, write_json_atomic
+from src.utils.logging_config import setup_logger
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = setup_logger('price_store')
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "data", "price_store")
+
+DATE_FORMAT = "%Y-%m-%d"
+
+# 拼接增量数据时用于校验的价格列，前复权数据在除权除息后会整体变化
+_VERIFY_COLUMNS = ["open", "close"]
+
+BarFetcher = Callable[[datetime, datetime], pd.DataFrame]
+
+
+class PriceStore:
+    """按 (复权类型, 股票代码) 分区的列式日线存储"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv("PRICE_STORE_DIR") or DEFAULT_STORE_DIR
+        self._lock = threading.Lock()
+        self._partition_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+    def get_bars(self, symbol: str, start_date: datetime, end_date: datetime,
+                 adjust: str, fetcher: BarFetcher) -> pd.DataFrame:
+        """
+        获取 [start_date, end_date] 区间的日线数据，优先读取本地存储
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            adjust: 复权类型（""/"qfq"/"hfq"）
+            fetcher: 从数据源拉取指定区间数据的函数，返回列名已标准化、
+                     date 列为 datetime 类型的 DataFrame
+
+        Returns:
+            按日期升序排列的 DataFrame，区间内无数据时返回空 DataFrame
+        """
+        start_date = _normalize_date(start_date)
+        end_date = _normalize_date(end_date)
+
+        with self._partition_lock(symbol, adjust):
+            bars, covered = self._load(symbol, adjust)
+
+            if bars is None or bars.empty:
+                bars = _clean(fetcher(start_date, end_date))
+                if bars.empty:
+                    return pd.DataFrame()
+                self._save(symbol, adjust, bars, start_date, end_date)
+                return _slice(bars, start_date, end_date)
+
+            covered_start, covered_end = covered
+            new_start, new_end = covered_start, covered_end
+
+            # 前后两段缺口各多取一根已存储的K线，用于校验复权基准是否变化
+            if start_date < covered_start:
+                leading = _clean(fetcher(start_date, bars["date"].iloc[0]))
+                merged = _merge(bars, leading)
+                if merged is None:
+                    bars = self._refetch(symbol, adjust, fetcher,
+                                         min(start_date, covered_start),
+                                         max(end_date, covered_end))
+                    return _slice(bars, start_date, end_date)
+                if not leading.empty:
+                    bars, new_start = merged, start_date
+
+            if end_date > covered_end:
+                trailing = _clean(fetcher(bars["date"].iloc[-1], end_date))
+                merged = _merge(bars, trailing)
+                if merged is None:
+                    bars = self._refetch(symbol, adjust, fetcher,
+                                         min(start_date, new_start),
+                                         max(end_date, covered_end))
+                    return _slice(bars, start_date, end_date)
+                if not trailing.empty:
+                    bars, new_end = merged, end_date
+
+            if (new_start, new_end) != (covered_start, covered_end):
+                self._save(symbol, adjust, bars, new_start, new_end)
+            else:
+                logger.debug(
+                    f"Serving {symbol} ({adjust or 'none'}) from local price store")
+
+            return _slice(bars, start_date, end_date)
+
+    def clear(self, symbol: Optional[str] = None, adjust: Optional[str] = None):
+        """删除本地存储的数据，不指定参数时清空全部"""
+        for adjust_dir in os.listdir(self.root) if os.path.isdir(self.root) else []:
+            if adjust is not None and adjust_dir != f"adjust={adjust or 'none'}":
+                continue
+            adjust_path = os.path.join(self.root, adjust_dir)
+            for symbol_dir in os.listdir(adjust_path):
+                if symbol is not None and symbol_dir != f"symbol={symbol}":
+                    continue
+                symbol_path = os.path.join(adjust_path, symbol_dir)
+                for name in os.listdir(symbol_path):
+                    os.remove(os.path.join(symbol_path, name))
+                os.rmdir(symbol_path)
+
+    def _refetch(self, symbol: str, adjust: str, fetcher: BarFetcher,
+                 start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """复权基准发生变化时整体重新拉取并覆盖本地数据"""
+        logger.info(
+            f"Adjusted prices changed for {symbol} ({adjust or 'none'}), refetching full range")
+        bars = _clean(fetcher(start_date, end_date))
+        if not bars.empty:
+            self._save(symbol, adjust, bars, start_date, end_date)
+        return bars
+
+    def _partition_lock(self, symbol: str, adjust: str) -> threading.Lock:
+        key = (symbol, adjust)
+        with self._lock:
+            if key not in self._partition_locks:
+                self._partition_locks[key] = threading.Lock()
+            return self._partition_locks[key]
+
+    def _partition_dir(self, symbol: str, adjust: str) -> str:
+        return os.path.join(self.root, f"adjust={adjust or 'none'}", f"symbol={symbol}")
+
+    def _bars_path(self, symbol: str, adjust: str) -> str:
+        name = "bars.parquet" if HAS_PYARROW else "bars.pkl"
+        return os.path.join(self._partition_dir(symbol, adjust), name)
+
+    def _load(self, symbol: str, adjust: str):
+        partition = self._partition_dir(symbol, adjust)
+        meta = read_json(os.path.join(partition, "meta.json"))
+        path = self._bars_path(symbol, adjust)
+        if not meta or not os.path.exists(path):
+            return None, None
+        try:
+            if HAS_PYARROW:
+                bars = pd.read_parquet(path)
+            else:
+                bars = pd.read_pickle(path)
+            covered = (datetime.strptime(meta["covered_start"], DATE_FORMAT),
+                       datetime.strptime(meta["covered_end"], DATE_FORMAT))
+        except Exception as e:
+            logger.warning(
+                f"Failed to read local price store for {symbol}: {e}")
+            return None, None
+        return bars, covered
+
+    def _save(self, symbol: str, adjust: str, bars: pd.DataFrame,
+              covered_start: datetime, covered_end: datetime):
+        partition = self._partition_dir(symbol, adjust)
+        if HAS_PYARROW:
+            atomic_write(self._bars_path(symbol, adjust),
+                         lambda tmp: bars.to_parquet(tmp, index=False))
+        else:
+            atomic_write(self._bars_path(symbol, adjust), bars.to_pickle)
+        write_json_atomic(os.path.join(partition, "meta.json"), {
+            "symbol": symbol,
+            "adjust": adjust,
+            "covered_start": covered_start.strftime(DATE_FORMAT),
+            "covered_end": covered_end.strftime(DATE_FORMAT),
+            "rows": len(bars),
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        })
+        logger.debug(
+            f"Saved {len(bars)} bars for {symbol} ({adjust or 'none'}) to local price store")
+
+
+def _normalize_date(value: datetime) -> datetime:
+    return datetime(value.year, value.month, value.day)
+
+
+def _clean(df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    if df is None or df.empty:
+        return pd.DataFrame()
+    return df.sort_values("date").drop_duplicates("date", keep="last").reset_index(drop=True)
+
+
+def _merge(bars: pd.DataFrame, new_bars: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    合并增量数据。重叠日期上的价格与已存储数据不一致时返回 None，
+    说明复权基准已经改变，需要整体重新拉取
+    """
+    if new_bars.empty:
+        return bars
+
+    overlap = bars.merge(new_bars, on="date", suffixes=("_old", "_new"))
+    for col in _VERIFY_COLUMNS:
+        if f"{col}_old" in overlap and not np.allclose(
+                overlap[f"{col}_old"].astype(float), overlap[f"{col}_new"].astype(float),
+                rtol=1e-6, atol=1e-6, equal_nan=True):
+            return None
+
+    merged = pd.concat([bars, new_bars], ignore_index=True)
+    return _clean(merged)
+
+
+def _slice(bars: pd.DataFrame, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+    mask = (bars["date"] >= start_date) & (
+        bars["date"] < end_date + timedelta(days=1))
+    return bars.loc[mask].reset_index(drop=True)
+
+
+# 进程内共享的默认存储实例
+price_store = PriceStore()
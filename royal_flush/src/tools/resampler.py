@@ -0,0 +1,207 @@
+"""
+多周期K线 - 由本地日线合成周线、月线，不再单独向数据源请求 period="weekly"/"monthly"
+
+每个周期内：开盘价取第一根日线，最高价取最大值，最低价取最小值，收盘价取最后一根日线，
+成交量、成交额求和；日期为该周期内最后一个交易日（与 stock_zh_a_hist 的周线、月线一致）。
+
+BarResampler 增量维护一只股票某个周期的K线：新的日线到达时只合并新增部分，
+未结束的周期（本周、本月）随之更新。新增日线须包含已合成的最后一根日线，
+以确认两者首尾相接，中间没有缺失的交易日；否则整体重建。
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('resampler')
+
+PERIODS = ("weekly", "monthly")
+
+# 参与合成的列及合成方式，不在日线中的列会被跳过
+BAR_AGGREGATIONS = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+    "amount": "sum",
+}
+
+
+def period_keys(dates, period: str) -> np.ndarray:
+    """
+    每个日期所属周期的编号，同一周（周一至周日）或同一自然月的日期编号相同
+
+    Args:
+        dates: 日期序列
+        period: "weekly" 或 "monthly"
+    """
+    dates = pd.DatetimeIndex(dates)
+    if period == "weekly":
+        # 1970-01-01 是周四，加 3 天后按 7 天取整即为以周一为起点的周编号
+        days = dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+        return (days + 3) // 7
+    if period == "monthly":
+        return dates.year.to_numpy(dtype=np.int64) * 12 + dates.month.to_numpy(dtype=np.int64)
+    raise ValueError(f"Unknown period: {period}, expected one of {PERIODS}")
+
+
+def resample_bars(daily: pd.DataFrame, period: str) -> pd.DataFrame:
+    """
+    由日线合成周线或月线
+
+    Args:
+        daily: 包含 date 及 OHLCV（可选 amount）列的日线，按日期升序
+        period: "weekly" 或 "monthly"
+
+    Returns:
+        每个周期一行的 DataFrame，列为 date 以及日线中存在的 BAR_AGGREGATIONS 列
+    """
+    columns = [name for name in BAR_AGGREGATIONS if name in daily.columns]
+    if daily.empty:
+        return pd.DataFrame(columns=["date"] + columns)
+
+    keys = period_keys(daily["date"], period)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    result = {"date": pd.to_datetime(daily["date"]).to_numpy()[ends]}
+    for name in columns:
+        values = daily[name].to_numpy(dtype=float)
+        how = BAR_AGGREGATIONS[name]
+        if how == "first":
+            result[name] = values[starts]
+        elif how == "last":
+            result[name] = values[ends]
+        elif how == "max":
+            result[name] = np.fmax.reduceat(values, starts)
+        elif how == "min":
+            result[name] = np.fmin.reduceat(values, starts)
+        else:
+            result[name] = np.add.reduceat(np.nan_to_num(values), starts)
+    return pd.DataFrame(result)
+
+
+def _merge_period(last: pd.Series, first_new: pd.Series) -> pd.Series:
+    """把同一周期内新增日线合成的K线并入已有的（未结束）周期K线"""
+    merged = last.copy()
+    merged["date"] = first_new["date"]
+    for name, how in BAR_AGGREGATIONS.items():
+        if name not in merged.index:
+            continue
+        if how == "last":
+            merged[name] = first_new[name]
+        elif how == "max":
+            merged[name] = np.fmax(last[name], first_new[name])
+        elif how == "min":
+            merged[name] = np.fmin(last[name], first_new[name])
+        elif how == "sum":
+            merged[name] = last[name] + first_new[name]
+    return merged
+
+
+class BarResampler:
+    """增量维护一只股票某个周期的K线"""
+
+    def __init__(self, period: str):
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period: {period}, expected one of {PERIODS}")
+        self.period = period
+        self.bars = pd.DataFrame()
+        self.first_daily_date: Optional[pd.Timestamp] = None
+        self.last_daily_date: Optional[pd.Timestamp] = None
+        self._last_daily_close: Optional[float] = None
+
+    def reset(self):
+        self.bars = pd.DataFrame()
+        self.first_daily_date = self.last_daily_date = None
+        self._last_daily_close = None
+
+    def _is_stale(self, daily: pd.DataFrame) -> bool:
+        """
+        日线起点更早、不包含已合成的最后一根日线（无法确认首尾相接），
+        或已合成部分的日线发生变化（如前复权价格随除权除息调整）时需要重建
+        """
+        if self.last_daily_date is None:
+            return True
+        dates = pd.to_datetime(daily["date"])
+        if dates.iloc[0] < self.first_daily_date:
+            return True
+        matched = daily.loc[dates == self.last_daily_date, "close"]
+        return matched.empty or not np.isclose(float(matched.iloc[0]), self._last_daily_close)
+
+    def update(self, daily: pd.DataFrame) -> pd.DataFrame:
+        """
+        用最新的日线更新周期K线
+
+        Args:
+            daily: 按日期升序的日线，可以是全部历史，也可以只包含新增部分
+                   （新增部分须从已合成的最后一根日线开始）
+
+        Returns:
+            更新后的全部周期K线
+        """
+        if daily is None or daily.empty:
+            return self.bars
+
+        if self._is_stale(daily):
+            if self.last_daily_date is not None:
+                logger.info(f"Daily bars changed or not contiguous, rebuilding {self.period} bars")
+            self.reset()
+            new_daily = daily
+        else:
+            new_daily = daily[pd.to_datetime(daily["date"]) > self.last_daily_date]
+
+        if new_daily.empty:
+            return self.bars
+
+        new_bars = resample_bars(new_daily, self.period)
+        if not self.bars.empty and period_keys([self.bars["date"].iloc[-1]], self.period)[0] == \
+                period_keys([new_bars["date"].iloc[0]], self.period)[0]:
+            # 新增日线的第一个周期与最后一根周期K线相同（周期尚未结束）
+            bars = self.bars.copy()
+            last = bars.index[-1]
+            for name, value in _merge_period(bars.iloc[-1], new_bars.iloc[0]).items():
+                bars.at[last, name] = value
+            self.bars = pd.concat([bars, new_bars.iloc[1:]], ignore_index=True)
+        else:
+            self.bars = pd.concat([self.bars, new_bars], ignore_index=True) \
+                if not self.bars.empty else new_bars
+
+        if self.first_daily_date is None:
+            self.first_daily_date = pd.Timestamp(new_daily["date"].iloc[0])
+        self.last_daily_date = pd.Timestamp(new_daily["date"].iloc[-1])
+        self._last_daily_close = float(new_daily["close"].iloc[-1])
+        return self.bars
+
+
+class TimeframeCache:
+    """按 (股票代码, 复权类型, 周期) 保存 BarResampler，进程内共享"""
+
+    def __init__(self):
+        self._resamplers: Dict[Tuple[str, str, str], BarResampler] = {}
+        self._lock = threading.Lock()
+
+    def update(self, symbol: str, adjust: str, period: str, daily: pd.DataFrame) -> pd.DataFrame:
+        """用日线更新并返回该股票的周期K线"""
+        key = (symbol, adjust, period)
+        with self._lock:
+            if key not in self._resamplers:
+                self._resamplers[key] = BarResampler(period)
+            return self._resamplers[key].update(daily).copy()
+
+    def clear(self, symbol: Optional[str] = None):
+        with self._lock:
+            if symbol is None:
+                self._resamplers.clear()
+            else:
+                for key in [k for k in self._resamplers if k[0] == symbol]:
+                    del self._resamplers[key]
+
+
+# 全局实例
+timeframe_cache = TimeframeCache()
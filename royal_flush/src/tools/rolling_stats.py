@@ -0,0 +1,202 @@
+"""
+滚动统计 - 与窗口长度无关的 O(n) 滚动极值和一次遍历的滚动矩
+
+- rolling_min / rolling_max：安装 numba 时使用单调队列（kernels_numba.rolling_extreme），
+  否则使用 van Herk/Gil-Werman 分块算法：按窗口长度分块，块内前缀极值与后缀极值
+  各算一次，每个窗口的极值为两者之一的组合，NumPy 下同样只需 O(n) 次运算。
+- rolling_moments：一次遍历同时累积 1~4 次幂的前缀和，
+  同时给出窗口内的有效值个数、均值、标准差、偏度和峰度。
+  窗口长度可以是整数，也可以是每列一个（参数扫描时每列对应一组参数）。
+
+语义等价于 pandas rolling（与 kernels.rolling_mean/std 相同）：窗口内有效值少于 min_periods 时为 NaN，
+窗口内取值全部相同时均值精确等于该值、标准差为 0、偏度为 0、峰度为 -3。
+kernels 中按窗口两遍计算的实现更精确，这里的前缀和在数值量级变化很大的序列（如多年的价格）上
+高阶矩会有较大的相对误差，适合收益率、波动率这类量级稳定的序列。
+"""
+
+from typing import NamedTuple, Optional, Union
+
+import numpy as np
+
+from src.tools import kernels, kernels_numba
+
+# 每次处理的最大元素个数，按列分块以限制前缀和占用的内存
+_CHUNK_ELEMENTS = 1 << 22
+
+# pandas 把方差不超过该值的窗口视为常数，偏度和峰度为 NaN
+_MOMENT_VARIANCE_EPSILON = 1e-14
+
+Window = Union[int, np.ndarray]
+
+
+class RollingMoments(NamedTuple):
+    """rolling_moments 的结果，未请求的高阶矩为 None"""
+    count: np.ndarray
+    mean: np.ndarray
+    std: Optional[np.ndarray] = None
+    skew: Optional[np.ndarray] = None
+    kurt: Optional[np.ndarray] = None
+
+
+def _van_herk_extreme(values: np.ndarray, window: int, use_max: bool) -> np.ndarray:
+    """每个位置之前 window 个值（含当前，忽略 NaN）的极值，全部缺失时为 ±inf"""
+    n, m = values.shape
+    fill = -np.inf if use_max else np.inf
+    ufunc = np.maximum if use_max else np.minimum
+
+    # 顶部补 window - 1 行使开头的部分窗口也完整，底部补齐到 window 的整数倍
+    blocks = -(-(n + window - 1) // window)
+    padded = np.full((blocks * window, m), fill)
+    padded[window - 1:window - 1 + n] = np.where(np.isnan(values), fill, values)
+
+    shaped = padded.reshape(blocks, window, m)
+    prefix = ufunc.accumulate(shaped, axis=1).reshape(-1, m)
+    suffix = ufunc.accumulate(shaped[:, ::-1], axis=1)[:, ::-1].reshape(-1, m)
+
+    # 窗口 [i, i + window - 1] 最多跨两个块：前一块的后缀与后一块的前缀
+    return ufunc(suffix[:n], prefix[window - 1:window - 1 + n])
+
+
+def _rolling_extreme(values: np.ndarray, window: int, min_periods: Optional[int],
+                     use_max: bool) -> np.ndarray:
+    min_periods = window if min_periods is None else min_periods
+    values2d, restore = kernels._as_2d(values)
+    if kernels.get_backend() == "numba":
+        return restore(kernels_numba.rolling_extreme(
+            np.ascontiguousarray(values2d), window, min_periods, use_max))
+
+    result = _van_herk_extreme(values2d, window, use_max)
+    counts = _window_counts(~np.isnan(values2d), window)
+    return restore(np.where(counts >= max(min_periods, 1), result, np.nan))
+
+
+def _window_counts(valid: np.ndarray, window: int) -> np.ndarray:
+    prefix = np.concatenate([np.zeros((1, valid.shape[1])), np.cumsum(valid, axis=0)])
+    return prefix[1:] - prefix[np.maximum(np.arange(len(valid)) + 1 - window, 0)]
+
+
+def rolling_min(values: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    """等价于 rolling(window, min_periods).min()，耗时与窗口长度无关"""
+    return _rolling_extreme(values, window, min_periods, use_max=False)
+
+
+def rolling_max(values: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    """等价于 rolling(window, min_periods).max()，耗时与窗口长度无关"""
+    return _rolling_extreme(values, window, min_periods, use_max=True)
+
+
+def _power_sums(x: np.ndarray, windows: np.ndarray, order: int):
+    """
+    对 (n, m) 的 x 和每列的窗口长度 windows，一次遍历求出每个窗口的
+    (有效值个数, [中心化后 1..order 次幂的和], 中心, 窗口内是否全部相同, 最近的有效值)
+    """
+    n, m = x.shape
+    valid = ~np.isnan(x)
+    columns = np.arange(m)
+
+    # 以每列第一个有效值为中心，减少前缀和相减时的精度损失
+    first = np.argmax(valid, axis=0)
+    center = np.where(valid.any(axis=0), x[first, columns], 0.0)
+    centered = np.where(valid, x - center, 0.0)
+
+    steps = np.arange(n)[:, None]
+    lo = np.maximum(steps - windows[None, :] + 1, 0)
+
+    powers = [valid.astype(float)]
+    for _ in range(order):
+        powers.append(powers[-1] * centered)
+    stacked = np.stack(powers)  # (order + 1, n, m)
+    prefix = np.concatenate([np.zeros((order + 1, 1, m)), np.cumsum(stacked, axis=1)], axis=1)
+    sums = prefix[:, 1:] - np.take_along_axis(prefix, np.broadcast_to(lo, (order + 1, n, m)), axis=1)
+
+    # 窗口内的有效值全部相同：最后一次取值变化不晚于窗口内第一个有效值
+    last_valid = np.maximum.accumulate(np.where(valid, steps, -1), axis=0)
+    filled = np.where(last_valid >= 0, x[np.maximum(last_valid, 0), columns], np.nan)
+    changed = np.zeros_like(valid)
+    changed[1:] = valid[1:] & (last_valid[:-1] >= 0) & (x[1:] != filled[:-1])
+    last_change = np.maximum.accumulate(np.where(changed, steps, -1), axis=0)
+    next_valid = np.minimum.accumulate(np.where(valid, steps, n)[::-1], axis=0)[::-1]
+    counts = sums[0]
+    uniform = (counts > 0) & (last_change <= np.take_along_axis(next_valid, lo, axis=0))
+    return counts, sums[1:], center, uniform, filled
+
+
+def _moments_block(x: np.ndarray, windows: np.ndarray, min_periods: np.ndarray, order: int):
+    counts, sums, center, uniform, filled = _power_sums(x, windows, order)
+    enough = counts >= np.maximum(min_periods, 1)
+    result = {"count": counts}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = sums[0] / counts
+        result["mean"] = np.where(enough, np.where(uniform, filled, mean + center), np.nan)
+        if order >= 2:
+            s2 = sums[1] / counts
+            m2 = np.maximum(s2 - mean * mean, 0.0)
+            variance = m2 * counts / (counts - 1)
+            std = np.where(counts > 1, np.sqrt(np.where(uniform, 0.0, variance)), np.nan)
+            result["std"] = np.where(enough, std, np.nan)
+        if order >= 3:
+            s3 = sums[2] / counts
+            m3 = s3 - 3 * mean * s2 + 2 * mean ** 3
+            skew = np.sqrt(counts * (counts - 1)) * m3 / ((counts - 2) * m2 ** 1.5)
+            skew = np.where(m2 <= _MOMENT_VARIANCE_EPSILON, np.nan, skew)
+            skew = np.where(uniform, 0.0, skew)
+            result["skew"] = np.where(enough & (counts >= 3), skew, np.nan)
+        if order >= 4:
+            s4 = sums[3] / counts
+            m4 = s4 - 4 * mean * s3 + 6 * mean ** 2 * s2 - 3 * mean ** 4
+            kurt = ((counts * counts - 1) * m4 / (m2 * m2) - 3 * (counts - 1) ** 2) / \
+                ((counts - 2) * (counts - 3))
+            kurt = np.where(m2 <= _MOMENT_VARIANCE_EPSILON, np.nan, kurt)
+            kurt = np.where(uniform, -3.0, kurt)
+            result["kurt"] = np.where(enough & (counts >= 4), kurt, np.nan)
+    return result
+
+
+def rolling_moments(values: np.ndarray, window: Window, min_periods: Window = None,
+                    order: int = 4) -> RollingMoments:
+    """
+    一次遍历求滚动窗口的有效值个数、均值、标准差（ddof=1）、偏度和峰度
+
+    Args:
+        values: (n,) 或 (n, m) 数组，沿第 0 维滚动
+        window: 窗口长度；也可以是长度为 m 的数组，每列使用各自的窗口，
+                此时一维的 values 被广播到每一列
+        min_periods: 窗口内最少的有效值个数（整数或每列一个），默认等于 window
+        order: 需要的最高阶矩，1 只算均值，2 加上标准差，3 加上偏度，4 加上峰度
+
+    Returns:
+        RollingMoments，各字段等价于 pandas rolling 的 mean/std/skew/kurt
+    """
+    if order not in (1, 2, 3, 4):
+        raise ValueError(f"order must be between 1 and 4, got {order}")
+    values = np.asarray(values, dtype=float)
+    per_column = np.ndim(window) > 0
+    windows = np.asarray(window, dtype=np.int64).reshape(-1)
+    min_periods = windows if min_periods is None else \
+        np.asarray(min_periods, dtype=np.int64).reshape(-1)
+
+    if per_column and values.ndim == 1:
+        values2d = np.broadcast_to(values[:, None], (len(values), len(windows)))
+        restore = lambda result: result  # noqa: E731
+    else:
+        values2d, restore = kernels._as_2d(values)
+    n, m = values2d.shape
+    windows = np.broadcast_to(windows, (m,))
+    min_periods = np.broadcast_to(min_periods, (m,))
+
+    fields = RollingMoments._fields[:order + 1]
+    result = {name: np.empty((n, m)) for name in fields}
+    step = max(1, _CHUNK_ELEMENTS // max(1, n * (order + 2)))
+    for start in range(0, m, step):
+        block = slice(start, start + step)
+        for name, value in _moments_block(values2d[:, block], windows[block],
+                                          min_periods[block], order).items():
+            result[name][:, block] = value
+    return RollingMoments(**{name: restore(value) for name, value in result.items()})
+
+
+def rolling_sum(values: np.ndarray, window: Window, min_periods: Window = None) -> np.ndarray:
+    """等价于 rolling(window, min_periods).sum()，窗口长度可以每列一个"""
+    moments = rolling_moments(values, window, min_periods, order=1)
+    with np.errstate(invalid="ignore"):
+        return moments.mean * moments.count
@@ -0,0 +1,103 @@
+"""
+全市场实时行情快照缓存 - 进程内共享，带过期时间和股票代码索引
+
+ak.stock_zh_a_spot_em() 每次都会下载全部A股（约5000行）的行情表，
+这里缓存最近一次快照，过期后只允许一个线程刷新，其余线程等待并复用结果。
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+from src.tools.data_provider import get_data_provider
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('spot_cache')
+
+DEFAULT_SPOT_CACHE_TTL = 60  # 秒
+
+
+class SpotSnapshotCache:
+    """全市场行情快照缓存"""
+
+    def __init__(self, fetcher: Optional[Callable[[], pd.DataFrame]] = None,
+                 ttl: Optional[float] = None, code_column: str = "代码"):
+        """
+        Args:
+            fetcher: 下载全市场行情的函数，默认使用当前数据源的 stock_zh_a_spot_em
+            ttl: 快照有效期（秒），默认读取环境变量 SPOT_CACHE_TTL
+            code_column: 股票代码所在列
+        """
+        self._fetcher = fetcher or (
+            lambda: get_data_provider().stock_zh_a_spot_em())
+        self.ttl = float(ttl if ttl is not None else os.getenv(
+            "SPOT_CACHE_TTL", DEFAULT_SPOT_CACHE_TTL))
+        self.code_column = code_column
+        self._refresh_lock = threading.Lock()
+        # (快照, 代码->行号索引, 获取时间) 作为一个整体替换，读取时无需加锁
+        self._entry = None
+
+    def get_snapshot(self, force_refresh: bool = False) -> pd.DataFrame:
+        """获取全市场行情快照，过期时刷新"""
+        return self._get_entry(force_refresh)[0]
+
+    def get_quote(self, symbol: str) -> Optional[pd.Series]:
+        """
+        按股票代码查询行情
+
+        Returns:
+            对应行的 Series，快照中没有该代码时返回 None
+        """
+        snapshot, index, _ = self._get_entry()
+        position = index.get(symbol)
+        if position is None:
+            return None
+        return snapshot.iloc[position]
+
+    def invalidate(self):
+        """使当前快照失效，下次访问时重新下载"""
+        self._entry = None
+
+    def _is_fresh(self, entry) -> bool:
+        return entry is not None and time.monotonic() - entry[2] < self.ttl
+
+    def _get_entry(self, force_refresh: bool = False):
+        entry = self._entry
+        if not force_refresh and self._is_fresh(entry):
+            return entry
+
+        with self._refresh_lock:
+            # 等待锁期间其他线程可能已经完成刷新
+            current = self._entry
+            if current is not None and (
+                    current is not entry or (not force_refresh and self._is_fresh(current))):
+                return current
+
+            try:
+                logger.info("Fetching full-market real-time quotes...")
+                snapshot = self._fetcher()
+            except Exception as e:
+                if self._entry is not None:
+                    logger.warning(
+                        f"Failed to refresh real-time quotes, using stale snapshot: {e}")
+                    return self._entry
+                raise
+
+            if snapshot is None:
+                snapshot = pd.DataFrame()
+            snapshot = snapshot.reset_index(drop=True)
+            index: Dict[str, int] = {}
+            if self.code_column in snapshot.columns:
+                index = {str(code): i for i, code in enumerate(
+                    snapshot[self.code_column])}
+
+            self._entry = (snapshot, index, time.monotonic())
+            logger.info(f"✓ Real-time quotes cached ({len(snapshot)} symbols)")
+            return self._entry
+
+
+# 进程内共享的默认快照缓存
+spot_cache = SpotSnapshotCache()
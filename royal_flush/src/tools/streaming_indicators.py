@@ -0,0 +1,458 @@
+"""
+增量技术指标 - 每来一根新K线以 O(1) 更新指标，状态可以保存和恢复
+
+计算方式逐步复现 pandas 的 ewm().mean()、rolling().mean() 和 rolling().std()，
+与 src/agents/technicals.py 中 calculate_* 函数在整段历史上的结果一致
+（只有浮点舍入差异，见 src/tools/test_streaming_indicators.py）。
+
+用法：
+    technicals = StreamingTechnicals()
+    technicals.update_frame(history_df)       # 用历史数据预热
+    values = technicals.update(bar)           # 之后每天只处理一根新K线
+    saved = technicals.state_dict()           # 可 JSON 序列化
+    StreamingTechnicals.from_state_dict(saved)
+"""
+
+import math
+from collections import deque
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import pandas as pd
+
+NAN = float("nan")
+
+
+def _is_nan(value: float) -> bool:
+    return value != value
+
+
+def _divide(numerator: float, denominator: float) -> float:
+    """按浮点数组的语义相除：除以0得到 inf 或 NaN，而不是抛出异常"""
+    if denominator == 0:
+        if numerator == 0 or _is_nan(numerator):
+            return NAN
+        return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+    return numerator / denominator
+
+
+class StreamingIndicator:
+    """增量指标基类，state_dict 包含参数和全部中间状态"""
+
+    def state_dict(self) -> Dict[str, Any]:
+        state = {}
+        for name, value in vars(self).items():
+            if isinstance(value, StreamingIndicator):
+                state[name] = value.state_dict()
+            elif isinstance(value, deque):
+                state[name] = list(value)
+            else:
+                state[name] = value
+        return {"type": type(self).__name__, "state": state}
+
+    def load_state_dict(self, data: Mapping[str, Any]):
+        if data.get("type") != type(self).__name__:
+            raise ValueError(
+                f"State of {data.get('type')} cannot be loaded into {type(self).__name__}")
+        for name, value in data["state"].items():
+            current = getattr(self, name)
+            if isinstance(current, StreamingIndicator):
+                current.load_state_dict(value)
+            elif isinstance(current, deque):
+                setattr(self, name, deque(value, maxlen=current.maxlen))
+            else:
+                setattr(self, name, value)
+
+    @classmethod
+    def from_state_dict(cls, data: Mapping[str, Any]):
+        indicator = cls()
+        indicator.load_state_dict(data)
+        return indicator
+
+
+class EMA(StreamingIndicator):
+    """
+    指数移动平均，等价于 series.ewm(span=span, adjust=adjust, min_periods=min_periods).mean()
+    （ignore_na=False，NaN 输入同样会使旧权重衰减）
+    """
+
+    def __init__(self, span: float = 12, adjust: bool = False, min_periods: int = 0):
+        self.span = span
+        self.adjust = adjust
+        self.min_periods = max(int(min_periods), 1)
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def update(self, value: float) -> float:
+        com = (self.span - 1) / 2.0
+        alpha = 1.0 / (1.0 + com)
+        old_wt_factor = 1.0 - alpha
+        new_wt = 1.0 if self.adjust else alpha
+
+        is_observation = not _is_nan(value)
+        self.nobs += int(is_observation)
+        if not _is_nan(self.weighted):
+            self.old_wt *= old_wt_factor
+            if is_observation:
+                if self.weighted != value:
+                    self.weighted = ((self.old_wt * self.weighted) + (new_wt * value)) / \
+                        (self.old_wt + new_wt)
+                if self.adjust:
+                    self.old_wt += new_wt
+                else:
+                    self.old_wt = 1.0
+        elif is_observation:
+            self.weighted = value
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.weighted if self.nobs >= self.min_periods else NAN
+
+
+class RollingMean(StreamingIndicator):
+    """
+    滑动平均，等价于 series.rolling(window, min_periods=min_periods).mean()，
+    与 pandas 一样使用补偿求和
+    """
+
+    def __init__(self, window: int = 14, min_periods: Optional[int] = None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque(maxlen=window)
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.consecutive_same = 0
+        self.prev_value = NAN
+
+    def update(self, value: float) -> float:
+        if len(self.values) == self.window:
+            removed = self.values[0]
+            if self.window == 1:
+                self._reset(value)
+            elif not _is_nan(removed):
+                self.nobs -= 1
+                y = -removed - self.compensation_remove
+                t = self.sum_x + y
+                self.compensation_remove = t - self.sum_x - y
+                self.sum_x = t
+                if math.copysign(1.0, removed) < 0:
+                    self.neg_ct -= 1
+        elif not self.values:
+            self._reset(value)
+        self.values.append(value)
+
+        if not _is_nan(value):
+            self.nobs += 1
+            y = value - self.compensation_add
+            t = self.sum_x + y
+            self.compensation_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, value) < 0:
+                self.neg_ct += 1
+            if value == self.prev_value:
+                self.consecutive_same += 1
+            else:
+                self.consecutive_same = 1
+            self.prev_value = value
+        return self.value
+
+    def _reset(self, first_value: float):
+        self.nobs = self.neg_ct = self.consecutive_same = 0
+        self.sum_x = self.compensation_add = self.compensation_remove = 0.0
+        self.prev_value = first_value
+
+    @property
+    def value(self) -> float:
+        if self.nobs < self.min_periods or self.nobs == 0:
+            return NAN
+        result = self.sum_x / self.nobs
+        if self.consecutive_same >= self.nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.0
+        return result
+
+
+class RollingStd(StreamingIndicator):
+    """
+    滑动标准差，与 pandas 一样使用补偿的 Welford 算法。窗口内取值全部相同时结果精确为 0
+    （pandas 在长时间停牌后会留下约 1e-7 的舍入误差）
+    """
+
+    def __init__(self, window: int = 20, min_periods: Optional[int] = None, ddof: int = 1):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.ddof = ddof
+        self.values = deque(maxlen=window)
+        self.nobs = 0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.consecutive_same = 0
+        self.prev_value = NAN
+
+    def update(self, value: float) -> float:
+        if len(self.values) == self.window:
+            removed = self.values[0]
+            if self.window == 1:
+                self._reset(value)
+            elif not _is_nan(removed):
+                self.nobs -= 1
+                if self.nobs:
+                    prev_mean = self.mean_x - self.compensation_remove
+                    y = removed - self.compensation_remove
+                    t = y - self.mean_x
+                    self.compensation_remove = t + self.mean_x - y
+                    self.mean_x -= t / self.nobs
+                    self.ssqdm_x -= (removed - prev_mean) * \
+                        (removed - self.mean_x)
+                else:
+                    self.mean_x = 0.0
+                    self.ssqdm_x = 0.0
+        elif not self.values:
+            self._reset(value)
+        self.values.append(value)
+
+        if not _is_nan(value):
+            if value == self.prev_value:
+                self.consecutive_same += 1
+            else:
+                self.consecutive_same = 1
+            self.prev_value = value
+            self.nobs += 1
+            prev_mean = self.mean_x - self.compensation_add
+            y = value - self.compensation_add
+            t = y - self.mean_x
+            self.compensation_add = t + self.mean_x - y
+            self.mean_x += t / self.nobs
+            self.ssqdm_x += (value - prev_mean) * (value - self.mean_x)
+        return self.value
+
+    def _reset(self, first_value: float):
+        self.nobs = self.consecutive_same = 0
+        self.mean_x = self.ssqdm_x = 0.0
+        self.compensation_add = self.compensation_remove = 0.0
+        self.prev_value = first_value
+
+    @property
+    def value(self) -> float:
+        if self.nobs < self.min_periods or self.nobs <= self.ddof:
+            return NAN
+        if self.nobs == 1 or self.consecutive_same >= self.nobs:
+            return 0.0
+        variance = self.ssqdm_x / (self.nobs - self.ddof)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+
+class MACD(StreamingIndicator):
+    """MACD，对应 calculate_macd，返回 (macd_line, signal_line)"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast_ema = EMA(fast)
+        self.slow_ema = EMA(slow)
+        self.signal_ema = EMA(signal)
+        self.macd_line = NAN
+
+    def update(self, close: float) -> Tuple[float, float]:
+        self.macd_line = self.fast_ema.update(close) - self.slow_ema.update(close)
+        return self.macd_line, self.signal_ema.update(self.macd_line)
+
+    @property
+    def value(self) -> Tuple[float, float]:
+        return self.macd_line, self.signal_ema.value
+
+
+class RSI(StreamingIndicator):
+    """RSI（简单移动平均版本），对应 calculate_rsi"""
+
+    def __init__(self, period: int = 14):
+        self.avg_gain = RollingMean(period)
+        self.avg_loss = RollingMean(period)
+        self.prev_close = NAN
+
+    def update(self, close: float) -> float:
+        delta = close - self.prev_close
+        # 第一根K线以及 NaN 的涨跌按 0 处理
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        self.prev_close = close
+        self.avg_gain.update(gain)
+        self.avg_loss.update(loss)
+        return self.value
+
+    @property
+    def value(self) -> float:
+        rs = _divide(self.avg_gain.value, self.avg_loss.value)
+        return 100 - _divide(100, 1 + rs)
+
+
+class BollingerBands(StreamingIndicator):
+    """布林带，对应 calculate_bollinger_bands，返回 (upper_band, lower_band)"""
+
+    def __init__(self, window: int = 20, num_std: float = 2.0):
+        self.num_std = num_std
+        self.sma = RollingMean(window)
+        self.std = RollingStd(window)
+
+    def update(self, close: float) -> Tuple[float, float]:
+        self.sma.update(close)
+        self.std.update(close)
+        return self.value
+
+    @property
+    def value(self) -> Tuple[float, float]:
+        sma, std = self.sma.value, self.std.value
+        return sma + std * self.num_std, sma - std * self.num_std
+
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    """与 DataFrame.max(axis=1) 相同，忽略 NaN 的分量"""
+    ranges = [r for r in (high - low, abs(high - prev_close), abs(low - prev_close))
+              if not _is_nan(r)]
+    return max(ranges) if ranges else NAN
+
+
+class ATR(StreamingIndicator):
+    """平均真实波幅，对应 calculate_atr"""
+
+    def __init__(self, period: int = 14, min_periods: int = 7):
+        self.mean = RollingMean(period, min_periods=min_periods)
+        self.prev_close = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        true_range = _true_range(high, low, self.prev_close)
+        self.prev_close = close
+        return self.mean.update(true_range)
+
+    @property
+    def value(self) -> float:
+        return self.mean.value
+
+
+class ADX(StreamingIndicator):
+    """平均趋向指数，对应 calculate_adx，返回 (adx, +di, -di)"""
+
+    def __init__(self, period: int = 14):
+        self.plus_dm_ema = EMA(period, adjust=True)
+        self.minus_dm_ema = EMA(period, adjust=True)
+        self.tr_ema = EMA(period, adjust=True)
+        self.dx_ema = EMA(period, adjust=True)
+        self.prev_high = NAN
+        self.prev_low = NAN
+        self.prev_close = NAN
+        self.plus_di = NAN
+        self.minus_di = NAN
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, float, float]:
+        true_range = _true_range(high, low, self.prev_close)
+        up_move = high - self.prev_high
+        down_move = self.prev_low - low
+        plus_dm = up_move if (up_move > down_move and up_move > 0) else 0.0
+        minus_dm = down_move if (
+            down_move > up_move and down_move > 0) else 0.0
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+
+        tr_mean = self.tr_ema.update(true_range)
+        self.plus_di = 100 * _divide(self.plus_dm_ema.update(plus_dm), tr_mean)
+        self.minus_di = 100 * \
+            _divide(self.minus_dm_ema.update(minus_dm), tr_mean)
+        dx = 100 * _divide(abs(self.plus_di - self.minus_di),
+                           self.plus_di + self.minus_di)
+        self.dx_ema.update(dx)
+        return self.value
+
+    @property
+    def value(self) -> Tuple[float, float, float]:
+        return self.dx_ema.value, self.plus_di, self.minus_di
+
+
+class OBV(StreamingIndicator):
+    """能量潮，对应 calculate_obv"""
+
+    def __init__(self):
+        self.obv = 0.0
+        self.prev_close = NAN
+
+    def update(self, close: float, volume: float) -> float:
+        if close > self.prev_close:
+            self.obv += volume
+        elif close < self.prev_close:
+            self.obv -= volume
+        self.prev_close = close
+        return self.obv
+
+    @property
+    def value(self) -> float:
+        return self.obv
+
+
+class StreamingTechnicals(StreamingIndicator):
+    """technical_analyst_agent 使用的全部增量指标，参数与 technicals.py 的默认值一致"""
+
+    def __init__(self):
+        self.macd = MACD()
+        self.rsi = RSI()
+        self.bollinger = BollingerBands()
+        self.atr = ATR()
+        self.adx = ADX()
+        self.obv = OBV()
+        self.last_date = None
+
+    def update(self, bar: Mapping[str, Any]) -> Dict[str, float]:
+        """
+        处理一根新K线
+
+        Args:
+            bar: 包含 high、low、close、volume 的映射，可选 date；
+                 带 date 时拒绝重复或倒序的K线
+
+        Returns:
+            各指标的最新值
+        """
+        date = bar.get("date")
+        if date is not None:
+            date = pd.Timestamp(date)
+            if self.last_date is not None and date <= pd.Timestamp(self.last_date):
+                raise ValueError(
+                    f"Bar for {date.date()} is not after last processed bar {self.last_date}")
+            self.last_date = date.isoformat()
+
+        high, low = float(bar["high"]), float(bar["low"])
+        close, volume = float(bar["close"]), float(bar["volume"])
+        self.macd.update(close)
+        self.rsi.update(close)
+        self.bollinger.update(close)
+        self.atr.update(high, low, close)
+        self.adx.update(high, low, close)
+        self.obv.update(close, volume)
+        return self.values()
+
+    def update_frame(self, prices_df: pd.DataFrame) -> Dict[str, float]:
+        """按顺序处理 DataFrame 中的每一行（用于预热），返回最后的指标值"""
+        for bar in prices_df.to_dict("records"):
+            self.update(bar)
+        return self.values()
+
+    def values(self) -> Dict[str, float]:
+        macd_line, signal_line = self.macd.value
+        upper_band, lower_band = self.bollinger.value
+        adx, plus_di, minus_di = self.adx.value
+        return {
+            "macd": macd_line,
+            "macd_signal": signal_line,
+            "rsi": self.rsi.value,
+            "bollinger_upper": upper_band,
+            "bollinger_lower": lower_band,
+            "atr": self.atr.value,
+            "adx": adx,
+            "+di": plus_di,
+            "-di": minus_di,
+            "obv": self.obv.value,
+        }
@@ -0,0 +1,69 @@
+import sys
+import os
+import threading
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from app.state import ApiState  # noqa: E402
+
+
+class BlockingAnalysis:
+    """阻塞到 release() 为止的分析函数，记录每次实际执行的运行ID"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self._release = threading.Event()
+        self.run_ids = []
+
+    def __call__(self, run_id, **kwargs):
+        self.run_ids.append(run_id)
+        self.started.set()
+        assert self._release.wait(timeout=10)
+        return run_id
+
+    def release(self):
+        self._release.set()
+
+
+def test_identical_requests_attach_to_inflight_run():
+    """输入相同的请求在任务运行期间复用同一个运行ID，任务结束后的请求重新提交"""
+    state = ApiState()
+    analysis = BlockingAnalysis()
+
+    run_id, submitted = state.submit_analysis_task("key-a", "run-1", analysis, ticker="600000")
+    assert (run_id, submitted) == ("run-1", True)
+    assert analysis.started.wait(timeout=10)
+
+    assert state.submit_analysis_task("key-a", "run-2", analysis, ticker="600000") == ("run-1", False)
+    assert state.submit_analysis_task("key-a", "run-3", analysis, ticker="600000") == ("run-1", False)
+    assert state.get_run("run-2") is None and state.get_run("run-3") is None
+
+    analysis.release()
+    assert state.get_analysis_task("run-1").result(timeout=10) == "run-1"
+
+    run_id, submitted = state.submit_analysis_task("key-a", "run-4", analysis, ticker="600000")
+    assert (run_id, submitted) == ("run-4", True)
+    assert state.get_analysis_task("run-4").result(timeout=10) == "run-4"
+    assert analysis.run_ids == ["run-1", "run-4"]
+
+
+def test_different_inputs_are_not_coalesced():
+    """输入不同的请求各自提交，互不复用"""
+    state = ApiState()
+    analysis = BlockingAnalysis()
+    try:
+        assert state.submit_analysis_task("key-a", "run-1", analysis) == ("run-1", True)
+        assert state.submit_analysis_task("key-b", "run-2", analysis) == ("run-2", True)
+    finally:
+        analysis.release()
+    for run_id in ("run-1", "run-2"):
+        assert state.get_analysis_task(run_id).result(timeout=10) == run_id
+    assert sorted(analysis.run_ids) == ["run-1", "run-2"]
+
+
+if __name__ == "__main__":
+    test_identical_requests_attach_to_inflight_run()
+    test_different_inputs_are_not_coalesced()
+    print("分析任务合并测试通过")
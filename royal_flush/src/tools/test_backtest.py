@@ -1,13 +1,17 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 import sys
 import os
+import time
 
 # 添加项目根目录到 Python 路径
 sys.path.append(os.path.dirname(os.path.dirname(
     os.path.dirname(os.path.abspath(__file__)))))
 
+from src.tools.mock_data import generate_mock_bars  # noqa: E402
+
 
 class SimplifiedBacktester:
     def __init__(self, initial_capital=100000):
@@ -193,5 +197,262 @@ def test_backtest():
     performance_df = backtester.analyze_performance(price_data)
 
 
+def test_simulate_trades_matches_execute_trade():
+    """向量化模拟的持仓、现金与逐日 execute_trade 相同，包括现金不足时只买部分的情况"""
+    from src.backtester import simulate_trades
+
+    rng = np.random.default_rng(1)
+    days = 500
+    actions = rng.choice([-1, 0, 1], days, p=[0.3, 0.3, 0.4])
+    quantities = rng.choice([100, 300], days)
+    prices = np.round(rng.uniform(10, 30, days), 2)
+
+    backtester = SimplifiedBacktester(initial_capital=20000)
+    names = {-1: "sell", 0: "hold", 1: "buy"}
+    expected = []
+    for action, quantity, price in zip(actions, quantities, prices):
+        executed = backtester.execute_trade(names[action], quantity, price)
+        expected.append((backtester.portfolio["stock"], backtester.portfolio["cash"],
+                         executed * (1 if action > 0 else -1)))
+
+    stocks, cashes, executed = simulate_trades(actions, quantities, prices, 20000, 0)
+    stock_path, cash_path, executed_path = map(np.array, zip(*expected))
+    assert np.array_equal(stocks, stock_path)
+    assert np.array_equal(executed, executed_path)
+    assert np.allclose(cashes, cash_path, rtol=0, atol=1e-6)
+    assert (executed_path[actions > 0] < quantities[actions > 0]).any()  # 出现过现金不足
+
+
+def test_window_signals_match_agent_strategies():
+    """每个回测日的信号与 technical_analyst_agent 对当日取到的K线求出的组合信号相同"""
+    from src.agents.technicals import (
+        STRATEGY_WEIGHTS,
+        calculate_mean_reversion_signals,
+        calculate_momentum_signals,
+        calculate_stat_arb_signals,
+        calculate_trend_signals,
+        calculate_volatility_signals,
+        weighted_signal_combination,
+    )
+    from src.agents.technicals_batch import analyze_windows
+    from src.backtester import decision_windows
+
+    bars = generate_mock_bars(800, seed=2, start_date="2021-01-04", volatile=True, open_noise=True)
+    bars = bars.drop(index=range(300, 330)).reset_index(drop=True)  # 停牌一个多月
+    dates = pd.bdate_range("2021-01-01", "2024-01-31")
+    yesterday = pd.Timestamp("2023-12-29")
+    starts, ends, traded = decision_windows(bars["date"], dates, yesterday)
+    table = analyze_windows(bars, starts, ends)
+
+    strategies = (calculate_trend_signals, calculate_mean_reversion_signals,
+                  calculate_momentum_signals, calculate_volatility_signals,
+                  calculate_stat_arb_signals)
+    for i in range(0, len(dates), 13):
+        date = dates[i]
+        # 与 run_backtest、market_data_agent 相同的取数规则
+        end = min(date, yesterday)
+        window = bars[(bars["date"] >= date - timedelta(days=30)) & (bars["date"] <= end)]
+        assert traded[i] == (not window.empty)
+        if window.empty:
+            continue
+        if len(window) < 120:
+            window = bars[(bars["date"] >= end - timedelta(days=730)) & (bars["date"] <= end)]
+        assert (starts[i], ends[i]) == (window.index[0], window.index[-1] + 1), date
+        if len(window) < 5:
+            continue
+        signals = dict(zip(STRATEGY_WEIGHTS, (func(window) for func in strategies)))
+        expected = weighted_signal_combination(signals, STRATEGY_WEIGHTS)
+        assert table.loc[i, "signal"] == expected["signal"], date
+        assert np.isclose(table.loc[i, "confidence"], expected["confidence"], atol=1e-9), date
+    assert set(table["signal"]) == {"bullish", "bearish", "neutral"}
+
+
+def benchmark_window_signals(days=250):
+    """一年回测的每日信号：逐日调用策略函数（run_backtest 中每个交易日运行一次工作流）与一次批量计算的耗时对比"""
+    from src.agents.technicals import STRATEGY_OUTPUTS, compute_technicals
+    from src.agents.technicals_batch import analyze_windows
+    from src.backtester import decision_windows
+
+    bars = generate_mock_bars(500 + days, start_date="2021-01-04", volatile=True, open_noise=True)
+    dates = pd.DatetimeIndex(bars["date"].iloc[-days:])
+    starts, ends, _ = decision_windows(bars["date"], dates, dates[-1])
+
+    start = time.perf_counter()
+    for lo, hi in zip(starts, ends):
+        compute_technicals(bars.iloc[lo:hi], list(STRATEGY_OUTPUTS.values()))
+    loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analyze_windows(bars, starts, ends)
+    batch = time.perf_counter() - start
+    print(f"{days} 个回测日: 逐日计算 {loop * 1000:8.1f} ms, 批量计算 {batch * 1000:8.1f} ms, "
+          f"加速比 {loop / batch:.1f}x（逐日回测另有每次调用至少 6 秒的限流等待）")
+
+
+def test_resume_from_checkpoint():
+    """中断后从检查点继续，只对未完成的回测日调用智能体，结果与一次跑完相同"""
+    import json
+    import tempfile
+    from src.backtester import Backtester
+    from src.tools.price_panel import PriceBars
+
+    class InstantBacktester(Backtester):
+        API_CALL_INTERVAL = 0
+        API_CALLS_PER_MINUTE = 10 ** 9
+        API_RETRY_DELAY = 0
+
+    calls = []
+
+    def agent(ticker, start_date, end_date, portfolio, num_of_news, run_id,
+              fail_at=None, error=KeyboardInterrupt):
+        if len(calls) == fail_at:
+            raise error("interrupted")
+        calls.append(end_date)
+        action = ("buy", "sell", "buy", "hold")[pd.Timestamp(end_date).dayofyear % 4]
+        return json.dumps({"action": action, "quantity": 100})
+
+    prices = PriceBars.from_frame(generate_mock_bars(400, seed=3, start_date="2022-01-03",
+                                                     volatile=True, open_noise=True))
+    with tempfile.TemporaryDirectory() as directory:
+        def run(checkpoint, resume=False, checkpoint_every=1, **failure):
+            backtester = InstantBacktester(
+                lambda **kwargs: agent(**kwargs, **failure), "600000",
+                "2023-03-01", "2023-03-31", 100000, 0, fast_path=False, prices=prices,
+                checkpoint_path=os.path.join(directory, checkpoint), resume=resume,
+                checkpoint_every=checkpoint_every)
+            backtester.run_backtest()
+            return backtester
+
+        expected = run("full.json")
+        assert len(calls) == 23 and len(expected.decisions) == 23
+
+        calls.clear()
+        try:
+            run("interrupted.json", fail_at=10)
+            assert False, "agent should have been interrupted"
+        except KeyboardInterrupt:
+            pass
+        with open(os.path.join(directory, "interrupted.json"), encoding="utf-8") as f:
+            assert json.load(f)["last_date"] == calls[-1]
+
+        calls.clear()
+        resumed = run("interrupted.json", resume=True)
+        assert len(calls) == 13
+        assert resumed.portfolio == expected.portfolio
+        assert resumed.portfolio_values == expected.portfolio_values
+        assert resumed.trades == expected.trades and resumed.decisions == expected.decisions
+
+        # 每 5 个回测日保存一次检查点：中断后从最近的检查点开始重跑
+        calls.clear()
+        try:
+            run("sparse.json", checkpoint_every=5, fail_at=8)
+            assert False, "agent should have been interrupted"
+        except KeyboardInterrupt:
+            pass
+        with open(os.path.join(directory, "sparse.json"), encoding="utf-8") as f:
+            assert json.load(f)["last_date"] == calls[4]
+
+        calls.clear()
+        resumed = run("sparse.json", resume=True, checkpoint_every=5)
+        assert len(calls) == 18
+        assert resumed.portfolio_values == expected.portfolio_values
+        assert resumed.trades == expected.trades and resumed.decisions == expected.decisions
+
+        # 智能体重试后仍然失败（如额度耗尽）时回测中止，当日不能按持有记入检查点
+        calls.clear()
+        try:
+            run("failed.json", fail_at=10, error=RuntimeError)
+            assert False, "backtest should stop when the agent keeps failing"
+        except RuntimeError:
+            pass
+        with open(os.path.join(directory, "failed.json"), encoding="utf-8") as f:
+            assert json.load(f)["last_date"] == calls[-1]
+
+        calls.clear()
+        resumed = run("failed.json", resume=True)
+        assert len(calls) == 13
+        assert resumed.portfolio_values == expected.portfolio_values
+        assert resumed.trades == expected.trades and resumed.decisions == expected.decisions
+
+
+def test_decision_cache_replays_across_execution_settings():
+    """只改变初始资金时，第二次回测复用第一次缓存的决策，不再调用智能体"""
+    import json
+    import tempfile
+    from src.backtester import Backtester
+    from src.main import app
+    from src.agents import market_data
+    from src.tools import decision_cache as decision_cache_module
+    from src.tools.decision_cache import _source_files, decision_cache, workflow_fingerprint
+    from src.tools.price_panel import PriceBars
+
+    calls = []
+
+    def agent(ticker, start_date, end_date, portfolio, num_of_news, run_id):
+        calls.append(end_date)
+        action = ("buy", "sell", "buy", "hold")[pd.Timestamp(end_date).dayofyear % 4]
+        return json.dumps({"action": action, "quantity": 100})
+
+    class CachedBacktester(Backtester):
+        API_CALL_INTERVAL = 0
+        API_CALLS_PER_MINUTE = 10 ** 9
+
+        def agent_fingerprint(self):
+            return "test-agent-v1"
+
+    prices = PriceBars.from_frame(generate_mock_bars(400, seed=4, start_date="2022-01-03",
+                                                     volatile=True, open_noise=True))
+    previous_root = decision_cache.root
+    with tempfile.TemporaryDirectory() as directory:
+        decision_cache.root = os.path.join(directory, "decisions")
+        try:
+            def run(initial_capital):
+                backtester = CachedBacktester(
+                    agent, "600000", "2023-03-01", "2023-03-31", initial_capital, 0,
+                    fast_path=False, prices=prices,
+                    checkpoint_path=os.path.join(directory, "checkpoint.json"))
+                backtester.run_backtest()
+                return backtester
+
+            first = run(100000)
+            assert len(calls) == 23
+            second = run(5000)
+            assert len(calls) == 23  # 全部命中缓存
+            assert [d["Decision"] for d in second.decisions] == [d["Decision"] for d in first.decisions]
+            assert second.portfolio["cash"] != first.portfolio["cash"]
+        finally:
+            decision_cache.root = previous_root
+
+    # 模型配置变化时工作流指纹随之变化
+    fingerprint = workflow_fingerprint(app)
+    previous_model = os.environ.get("GEMINI_MODEL")
+    os.environ["GEMINI_MODEL"] = "another-model"
+    try:
+        assert workflow_fingerprint(app) != fingerprint
+    finally:
+        if previous_model is None:
+            del os.environ["GEMINI_MODEL"]
+        else:
+            os.environ["GEMINI_MODEL"] = previous_model
+
+    # 代理间接依赖的工具模块（market_data -> api -> price_store）同样计入指纹
+    sources = {os.path.basename(path) for path in _source_files([market_data])}
+    assert {"market_data.py", "api.py", "price_store.py"} <= sources
+
+    # 源代码之外的变化通过递增版本号使缓存失效
+    decision_cache_module.DECISION_CACHE_VERSION += 1
+    try:
+        assert workflow_fingerprint(app) != fingerprint
+    finally:
+        decision_cache_module.DECISION_CACHE_VERSION -= 1
+    assert workflow_fingerprint(app) == fingerprint
+
+
 if __name__ == "__main__":
     test_backtest()
+    test_simulate_trades_matches_execute_trade()
+    test_window_signals_match_agent_strategies()
+    test_resume_from_checkpoint()
+    test_decision_cache_replays_across_execution_settings()
+    benchmark_window_signals()
+
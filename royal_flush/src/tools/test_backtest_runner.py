@@ -0,0 +1,93 @@
+import sys
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.backtest_runner import (  # noqa: E402
+    run_walk_forward,
+    run_watchlist,
+    walk_forward_segments,
+)
+from src.backtester import Backtester  # noqa: E402
+from src.main import run_hedge_fund  # noqa: E402
+from src.tools.mock_data import generate_mock_bars  # noqa: E402
+from src.tools.price_panel import PriceBars  # noqa: E402
+
+
+def mock_prices(days, seed=0):
+    return PriceBars.from_frame(generate_mock_bars(days, seed, volatile=True, open_noise=True))
+
+
+def run_serial(ticker, start_date, end_date, prices, initial_capital=100000):
+    backtester = Backtester(run_hedge_fund, ticker, start_date, end_date, initial_capital, 0,
+                            fast_path=True, prices=prices)
+    backtester.run_backtest()
+    return pd.DataFrame(backtester.portfolio_values)
+
+
+def test_walk_forward_segments():
+    segments = walk_forward_segments("2023-01-02", "2023-12-29", 4)
+    assert len(segments) == 4
+    assert segments[0][0] == "2023-01-02" and segments[-1][1] == "2023-12-29"
+    for (_, end), (start, _) in zip(segments, segments[1:]):
+        assert pd.Timestamp(start) == pd.Timestamp(end) + pd.offsets.BDay()
+    assert len(walk_forward_segments("2023-01-02", "2023-01-05", 10)) == 2
+
+
+def test_watchlist_matches_serial_backtests():
+    prices = {"600000": mock_prices(900, seed=1), "000002": mock_prices(900, seed=2)}
+    result = run_watchlist(list(prices), "2022-06-01", "2023-05-31", max_workers=2,
+                           fast_path=True, prices=prices)
+    assert not result.failed
+    for ticker, bars in prices.items():
+        expected = run_serial(ticker, "2022-06-01", "2023-05-31", bars)
+        actual = result.equity[result.equity["Ticker"] == ticker]
+        assert (actual["Date"].to_numpy() == expected["Date"].to_numpy()).all()
+        assert np.allclose(actual["Portfolio Value"], expected["Portfolio Value"])
+    assert len(result.trades) and set(result.trades["Ticker"]) == set(prices)
+
+
+def test_walk_forward_chains_segment_returns():
+    """合并后的权益曲线等于各段单独回测的收益率首尾相接"""
+    bars = mock_prices(900, seed=3)
+    result = run_walk_forward("600000", "2022-06-01", "2023-05-31", segments=3,
+                              max_workers=3, fast_path=True, prices={"600000": bars})
+    growth, expected = 1.0, []
+    for start, end in walk_forward_segments("2022-06-01", "2023-05-31", 3):
+        values = run_serial("600000", start, end, bars)["Portfolio Value"] * growth
+        growth = values.iloc[-1] / 100000
+        expected.append(values)
+    expected = pd.concat(expected, ignore_index=True)
+    assert list(result.equity["Segment"].unique()) == [0, 1, 2]
+    assert np.allclose(result.equity["Portfolio Value"], expected)
+    assert np.allclose(result.equity["Daily Return"].iloc[1:],
+                       (expected.pct_change() * 100).iloc[1:])
+
+
+def benchmark_watchlist(tickers=16, workers=4):
+    """股票池逐只串行回测与进程池并行回测的耗时对比（向量化回测，使用模拟K线）"""
+    prices = {f"{600000 + i}": mock_prices(1500, seed=i) for i in range(tickers)}
+    start = time.perf_counter()
+    for ticker, bars in prices.items():
+        run_serial(ticker, "2021-06-01", "2025-05-30", bars)
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    run_watchlist(list(prices), "2021-06-01", "2025-05-30", max_workers=workers,
+                  fast_path=True, prices=prices)
+    parallel = time.perf_counter() - start
+    print(f"{tickers} 只股票 x 4 年: 串行 {serial:6.2f} s, {workers} 个进程 {parallel:6.2f} s")
+
+
+if __name__ == "__main__":
+    test_walk_forward_segments()
+    test_watchlist_matches_serial_backtests()
+    test_walk_forward_chains_segment_returns()
+    benchmark_watchlist()
+    print("OK")
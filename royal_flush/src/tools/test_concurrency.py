@@ -0,0 +1,69 @@
+import sys
+import os
+import contextvars
+import threading
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.concurrency import run_concurrently  # noqa: E402
+
+current_run = contextvars.ContextVar("current_run", default=None)
+
+
+def test_timeout_and_failure_fall_back_to_defaults():
+    """超时或失败的调用得到默认值并记录错误，其余调用正常返回"""
+    release = threading.Event()
+
+    def slow():
+        release.wait(timeout=10)
+        return "late"
+
+    def broken():
+        raise ValueError("upstream error")
+
+    try:
+        start = time.monotonic()
+        results, errors = run_concurrently(
+            {"fast": lambda: "ok", "slow": slow, "broken": broken, "no_default": slow},
+            timeout={"fast": 1.0, "slow": 0.2, "broken": 1.0, "no_default": 0.2},
+            defaults={"slow": {}, "broken": []},
+        )
+        elapsed = time.monotonic() - start
+    finally:
+        release.set()
+
+    assert results == {"fast": "ok", "slow": {}, "broken": [], "no_default": None}
+    assert set(errors) == {"slow", "broken", "no_default"}
+    assert "timed out" in errors["slow"] and errors["broken"] == "upstream error"
+    # 超时从提交时计算，两个慢调用并发等待，不等待它们结束
+    assert elapsed < 1.0
+
+
+def test_context_variables_reach_workers():
+    """调用在提交时上下文的副本中执行，工作线程中的修改不影响调用方"""
+    token = current_run.set("run-42")
+    try:
+        def read_and_overwrite():
+            value = current_run.get()
+            current_run.set("changed-in-worker")
+            return value
+
+        results, errors = run_concurrently(
+            {"a": read_and_overwrite, "b": read_and_overwrite}, timeout=5)
+        assert errors == {}
+        assert results == {"a": "run-42", "b": "run-42"}
+        assert current_run.get() == "run-42"
+    finally:
+        current_run.reset(token)
+
+    results, _ = run_concurrently({"a": current_run.get}, timeout=5)
+    assert results == {"a": None}
+
+
+if __name__ == "__main__":
+    test_timeout_and_failure_fall_back_to_defaults()
+    test_context_variables_reach_workers()
+    print("并发工具测试通过")
@@ -0,0 +1,103 @@
+import sys
+import os
+import tempfile
+
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.tools.data_provider import (  # noqa: E402
+    DataProvider,
+    FixtureNotFoundError,
+    RecordingProvider,
+    ReplayProvider,
+)
+from src.tools.mock_data import generate_mock_bars  # noqa: E402
+
+
+class StubUpstream(DataProvider):
+    """按 akshare 列名返回模拟数据的上游数据源，记录调用次数"""
+
+    def __init__(self):
+        bars = generate_mock_bars(60, start_date="2024-01-01")
+        self.hist = pd.DataFrame({
+            "日期": bars["date"].dt.strftime("%Y-%m-%d"),
+            "开盘": bars["open"],
+            "收盘": bars["close"],
+            "成交量": bars["volume"],
+        })
+        self.calls = []
+
+    def _call(self, method, **kwargs):
+        self.calls.append(method)
+        if method == "stock_zh_a_hist":
+            dates = self.hist["日期"].str.replace("-", "")
+            mask = (dates >= kwargs["start_date"]) & (dates <= kwargs["end_date"])
+            return self.hist[mask].reset_index(drop=True)
+        if method == "stock_news_em":
+            return pd.DataFrame({"新闻标题": [f"{kwargs['symbol']} 公告"], "发布时间": ["2024-03-01"]})
+        return pd.DataFrame({"代码": ["600000"], "最新价": [10.5]})
+
+
+def record_calls(provider):
+    return [
+        provider.stock_zh_a_hist("600000", start_date="20240101", end_date="20240229", adjust="qfq"),
+        provider.stock_zh_a_spot_em(),
+        provider.stock_news_em("600000"),
+    ]
+
+
+def test_replay_returns_recorded_frames():
+    """录制到 DATA_FIXTURE_DIR 的调用在回放时得到相同的结果，且不访问上游"""
+    upstream = StubUpstream()
+    original = os.environ.get("DATA_FIXTURE_DIR")
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["DATA_FIXTURE_DIR"] = root
+        try:
+            recorded = record_calls(RecordingProvider(upstream))
+            replay = ReplayProvider()
+            replayed = record_calls(replay)
+        finally:
+            if original is None:
+                del os.environ["DATA_FIXTURE_DIR"]
+            else:
+                os.environ["DATA_FIXTURE_DIR"] = original
+
+        assert upstream.calls == ["stock_zh_a_hist", "stock_zh_a_spot_em", "stock_news_em"]
+        for expected, actual in zip(recorded, replayed):
+            pd.testing.assert_frame_equal(expected, actual)
+
+        # 回放返回副本，修改结果不影响后续回放
+        replayed[1].loc[0, "最新价"] = 0.0
+        pd.testing.assert_frame_equal(replay.stock_zh_a_spot_em(), recorded[1])
+
+        # 区间落在录制结果之内的日线请求从录制结果中截取
+        sliced = replay.stock_zh_a_hist("600000", start_date="20240115", end_date="20240131",
+                                        adjust="qfq")
+        expected = upstream.hist[(upstream.hist["日期"] >= "2024-01-15")
+                                 & (upstream.hist["日期"] <= "2024-01-31")]
+        pd.testing.assert_frame_equal(sliced, expected.reset_index(drop=True))
+
+
+def test_unrecorded_call_raises():
+    """回放时没有录制过的调用抛出 FixtureNotFoundError"""
+    with tempfile.TemporaryDirectory() as root:
+        record_calls(RecordingProvider(StubUpstream(), root))
+        replay = ReplayProvider(root)
+        for call in (lambda: replay.stock_news_em("000001"),
+                     lambda: replay.stock_zh_a_hist("600000", start_date="20231201",
+                                                    end_date="20240131", adjust="qfq"),
+                     lambda: replay.stock_financial_analysis_indicator("600000", "2023")):
+            try:
+                call()
+                raise AssertionError("expected FixtureNotFoundError")
+            except FixtureNotFoundError:
+                pass
+
+
+if __name__ == "__main__":
+    test_replay_returns_recorded_frames()
+    test_unrecorded_call_raises()
+    print("数据源录制回放测试通过")
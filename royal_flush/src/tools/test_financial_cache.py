@@ -0,0 +1,105 @@
+import sys
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.tools.financial_cache import (  # noqa: E402
+    FinancialReportCache,
+    next_report_period,
+)
+from src.utils.file_utils import read_json, write_json_atomic  # noqa: E402
+
+
+class StubReportFetcher:
+    """返回指定报告期的新浪格式报表，记录获取次数"""
+
+    def __init__(self, periods):
+        self.periods = list(periods)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return pd.DataFrame({
+            "报告日": self.periods,
+            "营业总收入": [1.0e9 + i for i in range(len(self.periods))],
+        })
+
+
+def meta(latest_period, fetched_at):
+    return {"latest_period": latest_period, "fetched_at": fetched_at.isoformat(timespec="seconds")}
+
+
+def test_next_report_period():
+    """报告期按季度末递进，年报之后进入下一年的一季报"""
+    assert next_report_period(date(2024, 3, 31)) == date(2024, 6, 30)
+    assert next_report_period(date(2024, 6, 30)) == date(2024, 9, 30)
+    assert next_report_period(date(2024, 9, 30)) == date(2024, 12, 31)
+    assert next_report_period(date(2024, 12, 31)) == date(2025, 3, 31)
+    assert next_report_period(date(2024, 5, 15)) == date(2024, 6, 30)
+    assert next_report_period(date(2024, 1, 1)) == date(2024, 3, 31)
+
+
+def test_validity_follows_report_calendar():
+    """下一个报告期结束（含当天）之前缓存有效，之后只在重新检查间隔内有效"""
+    cache = FinancialReportCache(root=tempfile.gettempdir())
+    long_ago = datetime.now() - timedelta(days=30)
+    boundaries = [
+        ("2024-03-31", date(2024, 6, 30)),
+        ("2024-06-30", date(2024, 9, 30)),
+        ("2024-09-30", date(2024, 12, 31)),
+        ("2024-12-31", date(2025, 3, 31)),
+    ]
+    for latest, upcoming in boundaries:
+        entry = meta(latest, long_ago)
+        assert cache._is_valid(entry, today=upcoming - timedelta(days=1))
+        assert cache._is_valid(entry, today=upcoming)
+        assert not cache._is_valid(entry, today=upcoming + timedelta(days=1))
+
+    # 年报发布前跨年的日期仍然有效
+    assert cache._is_valid(meta("2024-12-31", long_ago), today=date(2025, 1, 15))
+
+    # 披露窗口内刚获取过的缓存在重新检查间隔内有效
+    assert cache._is_valid(meta("2024-03-31", datetime.now()), today=date(2024, 8, 1))
+    # 无法判断报告期时只按重新检查间隔
+    assert cache._is_valid(meta(None, datetime.now()), today=date(2024, 8, 1))
+    assert not cache._is_valid(meta(None, long_ago), today=date(2024, 8, 1))
+
+
+def test_get_report_refetches_stale_entry():
+    """缓存有效时不访问数据源，过期后重新获取一次并更新缓存"""
+    with tempfile.TemporaryDirectory() as root:
+        cache = FinancialReportCache(root=root)
+        upcoming = next_report_period(date.today())
+        fetcher = StubReportFetcher([upcoming.strftime("%Y%m%d")])
+
+        first = cache.get_report("600000", "利润表", fetcher)
+        second = cache.get_report("600000", "利润表", fetcher)
+        assert fetcher.calls == 1
+        pd.testing.assert_frame_equal(first, second)
+
+        # 把缓存改成一年前获取的旧报告期，下次访问时重新获取
+        meta_path = cache._paths("600000", "利润表")[1]
+        stale = read_json(meta_path)
+        stale.update(meta((date.today() - timedelta(days=365)).isoformat(),
+                          datetime.now() - timedelta(days=2)))
+        write_json_atomic(meta_path, stale)
+
+        cache.get_report("600000", "利润表", fetcher)
+        assert fetcher.calls == 2
+        assert read_json(meta_path)["latest_period"] == upcoming.isoformat()
+
+        cache.get_report("600000", "利润表", fetcher)
+        assert fetcher.calls == 2
+
+
+if __name__ == "__main__":
+    test_next_report_period()
+    test_validity_follows_report_calendar()
+    test_get_report_refetches_stale_entry()
+    print("财务报表缓存测试通过")
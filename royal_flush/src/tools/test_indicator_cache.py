@@ -0,0 +1,92 @@
+import sys
+import os
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.agents.technicals import (  # noqa: E402
+    calculate_atr,
+    calculate_macd,
+    calculate_returns,
+    compute_technicals,
+    technical_indicators,
+)
+from src.tools.indicator_cache import (  # noqa: E402
+    active_indicator_cache,
+    run_indicator_cache,
+)
+from src.tools.api import get_price_history  # noqa: E402
+from src.tools.mock_data import generate_mock_bars, stub_price_source  # noqa: E402
+
+
+def test_indicators_computed_once_per_run():
+    """同一运行中相同K线区间的指标只计算一次，不同区间分别计算"""
+    prices_df = generate_mock_bars(120)
+
+    with run_indicator_cache("test-run", symbol="000001") as cache:
+        first = calculate_atr(prices_df)
+        second = calculate_atr(prices_df)
+        assert np.shares_memory(first.to_numpy(), second.to_numpy())
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        shorter = calculate_atr(prices_df.iloc[:-1])
+        assert cache.misses == 2
+        assert np.array_equal(shorter.to_numpy(), first.to_numpy()[:-1], equal_nan=True)
+
+        # 缓存的结果不能被调用方原地修改
+        returns = calculate_returns(prices_df)
+        assert not returns.to_numpy().flags.writeable
+
+    # 运行结束后缓存被释放，之后直接计算
+    assert active_indicator_cache() is None
+    assert np.array_equal(calculate_atr(prices_df).to_numpy(), first.to_numpy(), equal_nan=True)
+
+
+def test_technical_graph_computes_shared_intermediates_once():
+    """依赖图只计算请求输出所需的节点，共用的中间结果与 calculate_* 共用缓存"""
+    prices_df = generate_mock_bars(200)
+    assert technical_indicators.resolve(['macd', 'trend_signals']) == \
+        ['ema_12', 'ema_26', 'macd', 'ema_8', 'ema_21', 'ema_55', 'true_range', 'adx', 'trend_signals']
+
+    with run_indicator_cache("test-run", symbol="000001") as cache:
+        values = compute_technicals(prices_df, ['macd', 'trend_signals', 'volatility_signals'])
+        assert len(cache) == 12 and cache.hits == 0  # true_range 被 ADX 和 ATR 共用，只计算一次
+        macd_line, signal_line = calculate_macd(prices_df)
+        assert cache.hits == 1
+        assert np.shares_memory(macd_line.to_numpy(), values['macd'])
+
+    # 不在运行中时直接计算，结果相同
+    assert compute_technicals(prices_df, ['trend_signals'])['trend_signals'] == values['trend_signals']
+
+
+def test_price_history_shares_read_only_arrays_with_technicals():
+    """数据层与代理定义相同的指标共用缓存中的只读数组，定义不同的同名指标分别计算"""
+    bars = generate_mock_bars(300, seed=5, start_date="2023-01-02")
+    with stub_price_source(bars), run_indicator_cache("test-run", symbol="600000") as cache:
+        df = get_price_history("600000", "2023-01-02", "2024-02-23",
+                               indicators=["atr_ratio", "historical_volatility", "hurst_exponent"])
+        assert len(df) == 300 and len(cache) == 6
+
+        # 收益率两边定义相同，代理直接读到数据层缓存的数组
+        returns = calculate_returns(df)
+        assert (cache.hits, cache.misses) == (1, 6)
+        assert not returns.to_numpy().flags.writeable
+        assert np.allclose(returns.to_numpy()[1:], df["close"].pct_change().to_numpy()[1:])
+
+        # 数据层的 ATR 要求满 14 天，代理的 ATR 只要求 7 天，不能共用
+        atr = calculate_atr(df)
+        assert cache.misses == 7
+        assert atr.notna().sum() == (df["atr_ratio"].notna().sum() + 7)
+
+    # 返回的 DataFrame 不与缓存共享内存，可以修改
+    df.loc[0, "historical_volatility"] = 0.0
+
+
+if __name__ == "__main__":
+    test_indicators_computed_once_per_run()
+    test_technical_graph_computes_shared_intermediates_once()
+    test_price_history_shares_read_only_arrays_with_technicals()
+    print("OK")
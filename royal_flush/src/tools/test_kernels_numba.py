@@ -0,0 +1,118 @@
+import sys
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.tools import kernels, rolling_stats  # noqa: E402
+from src.tools.kernels_numba import HAS_NUMBA  # noqa: E402
+from src.tools.mock_data import generate_mock_close  # noqa: E402
+
+# 两种后端的最大允许差异（只有浮点运算顺序不同）
+BACKEND_TOLERANCE = 1e-9
+
+requires_numba = pytest.mark.skipif(not HAS_NUMBA, reason="numba is not installed")
+
+
+@contextmanager
+def backend(name):
+    previous = kernels.set_backend(name)
+    try:
+        yield
+    finally:
+        kernels.set_backend(previous)
+
+
+def on_both_backends(func, *args, **kwargs):
+    with backend("numpy"):
+        expected = func(*args, **kwargs)
+    with backend("numba"):
+        actual = func(*args, **kwargs)
+    return expected, actual
+
+
+def assert_close(expected, actual):
+    assert expected.shape == actual.shape
+    assert np.array_equal(np.isnan(expected), np.isnan(actual))
+    mask = ~np.isnan(expected)
+    assert np.allclose(actual[mask], expected[mask], rtol=BACKEND_TOLERANCE, atol=BACKEND_TOLERANCE)
+
+
+def generate_mock_panel(days, symbols, seed=0):
+    """按分取整的模拟收盘价和成交量，含上市前的空白、停牌缺失值以及价格不变的区间"""
+    close = generate_mock_close(days, symbols, seed)
+    rng = np.random.default_rng(seed)
+    close[100:115, 0] = close[100, 0]
+    close[:30, 1] = np.nan
+    close[rng.random((days, symbols)) < 0.02] = np.nan
+    volume = rng.integers(1_000, 100_000, (days, symbols)).astype(float)
+    return close, volume
+
+
+@requires_numba
+def test_recursive_kernels_match_numpy():
+    close, volume = generate_mock_panel(300, 6, seed=1)
+    for adjust in (False, True):
+        for span in (8, 26):
+            assert_close(*on_both_backends(kernels.ewm_mean, close, span, adjust=adjust))
+    assert_close(*on_both_backends(kernels.obv, close, volume))
+    assert_close(*on_both_backends(kernels.ewm_mean, close[:, 0], 12))  # 一维输入
+    spans = np.array([2, 5, 8, 13, 21, 34])  # 每列各自的 span
+    assert_close(*on_both_backends(kernels.ewm_mean, close, spans, adjust=True))
+    with backend("numpy"):
+        per_column = np.column_stack([kernels.ewm_mean(close[:, j], span)
+                                      for j, span in enumerate(spans)])
+        assert_close(per_column, kernels.ewm_mean(close, spans))
+
+
+@requires_numba
+def test_rolling_extremes_match_numpy():
+    close, _ = generate_mock_panel(300, 6, seed=2)
+    for window, min_periods in ((120, None), (20, 5), (1, None)):
+        assert_close(*on_both_backends(rolling_stats.rolling_min, close, window, min_periods))
+        assert_close(*on_both_backends(rolling_stats.rolling_max, close, window, min_periods))
+
+
+@requires_numba
+def test_rolling_hurst_matches_numpy():
+    close, _ = generate_mock_panel(400, 3, seed=3)
+    for j in range(close.shape[1]):
+        assert_close(*on_both_backends(kernels.rolling_hurst_exponent, close[:, j]))
+    assert_close(*on_both_backends(kernels.rolling_hurst_exponent, close[:80, 0]))
+
+
+def benchmark_backends(days=2500, symbols=500):
+    close, volume = generate_mock_panel(days, symbols)
+    cases = {
+        "ewm_mean(adjust=True)": lambda: kernels.ewm_mean(close, 14, adjust=True),
+        "obv": lambda: kernels.obv(close, volume),
+        "rolling_max(120)": lambda: rolling_stats.rolling_max(close, 120),
+        "rolling_hurst_exponent": lambda: kernels.rolling_hurst_exponent(close[:, 0]),
+    }
+    for name, func in cases.items():
+        timings = {}
+        for backend_name in kernels.BACKENDS:
+            with backend(backend_name):
+                func()  # 预热（numba 首次调用需要编译）
+                start = time.perf_counter()
+                func()
+                timings[backend_name] = time.perf_counter() - start
+        print(f"{name:<24} numpy {timings['numpy'] * 1000:8.1f} ms   "
+              f"numba {timings['numba'] * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    if not HAS_NUMBA:
+        print("numba is not installed, skipping")
+        sys.exit(0)
+    test_recursive_kernels_match_numpy()
+    test_rolling_extremes_match_numpy()
+    test_rolling_hurst_matches_numpy()
+    benchmark_backends()
+    print("OK")
@@ -0,0 +1,66 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.tools import api  # noqa: E402
+from src.tools.api import get_price_history_batch  # noqa: E402
+from src.tools.mock_data import generate_mock_bars, stub_price_source  # noqa: E402
+
+
+def test_batch_aligns_symbols_on_union_of_dates():
+    """各股票日期区间不同时按日期并集对齐，缺少的日期为 NaN，获取失败的股票记录在 failed_symbols"""
+    bars = {
+        "600000": generate_mock_bars(80, seed=1, start_date="2024-01-01"),
+        "000001": generate_mock_bars(60, seed=2, start_date="2024-02-15"),
+    }
+    with stub_price_source(bars):
+        panel = get_price_history_batch(
+            ["600000", "000001", "300750", "600000"], "2024-01-01", "2024-06-28")
+
+    assert panel.symbols == ["600000", "000001", "300750"]
+    assert panel.failed_symbols == ["300750"]
+
+    expected_dates = np.union1d(*(b["date"].to_numpy(dtype="datetime64[ns]") for b in bars.values()))
+    assert np.array_equal(panel.dates, expected_dates)
+    assert panel.shape == (len(expected_dates), 3)
+
+    for j, symbol in enumerate(["600000", "000001"]):
+        present = np.isin(panel.dates, bars[symbol]["date"].to_numpy(dtype="datetime64[ns]"))
+        for name in ("open", "high", "low", "close", "volume"):
+            column = panel.get(name)[:, j]
+            assert np.array_equal(column[present], bars[symbol][name].to_numpy(float))
+            assert np.isnan(column[~present]).all()
+        assert (~present).any()
+    assert np.isnan(panel.close[:, 2]).all()
+
+    frame = panel.to_frame("000001")
+    assert list(frame["date"]) == list(bars["000001"]["date"])
+
+
+def test_rate_limit_falls_back_to_default_on_invalid_values():
+    """AKSHARE_RATE_LIMIT 不是正数时使用默认值，不影响模块导入"""
+    original = os.environ.get("AKSHARE_RATE_LIMIT")
+    try:
+        for value, expected in (("2.5", 2.5), ("0", None), ("-3", None), ("fast", None),
+                                ("nan", None), ("inf", None)):
+            os.environ["AKSHARE_RATE_LIMIT"] = value
+            assert api._batch_rate_limit() == (expected or api.DEFAULT_AKSHARE_RATE_LIMIT)
+        del os.environ["AKSHARE_RATE_LIMIT"]
+        assert api._batch_rate_limit() == api.DEFAULT_AKSHARE_RATE_LIMIT
+    finally:
+        if original is None:
+            os.environ.pop("AKSHARE_RATE_LIMIT", None)
+        else:
+            os.environ["AKSHARE_RATE_LIMIT"] = original
+
+
+if __name__ == "__main__":
+    test_batch_aligns_symbols_on_union_of_dates()
+    test_rate_limit_falls_back_to_default_on_invalid_values()
+    print("批量行情面板测试通过")
@@ -0,0 +1,109 @@
+import sys
+import os
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.tools.mock_data import generate_mock_bars  # noqa: E402
+from src.tools.price_store import PriceStore  # noqa: E402
+from src.utils.file_utils import read_json  # noqa: E402
+
+
+class StubProvider:
+    """按请求区间返回模拟日线的数据源，记录每次请求的区间；scale 模拟除权后前复权价格整体变化"""
+
+    def __init__(self, days=300, seed=0):
+        self.bars = generate_mock_bars(days, seed, start_date="2023-01-02")
+        self.scale = 1.0
+        self.calls = []
+
+    def __call__(self, start_date, end_date):
+        self.calls.append((start_date, end_date))
+        return self.expected(start_date, end_date)
+
+    def expected(self, start_date, end_date):
+        """数据源当前在该区间上的数据，不计入请求记录"""
+        mask = (self.bars["date"] >= start_date) & (self.bars["date"] <= end_date)
+        df = self.bars.loc[mask].copy()
+        df[["open", "high", "low", "close"]] *= self.scale
+        return df.reset_index(drop=True)
+
+
+def read_meta(store, symbol="600000", adjust="qfq"):
+    return read_json(os.path.join(store._partition_dir(symbol, adjust), "meta.json"))
+
+
+def assert_bars_equal(expected, actual):
+    assert list(actual["date"]) == list(expected["date"])
+    for col in ("open", "high", "low", "close", "volume"):
+        assert np.allclose(actual[col].to_numpy(float), expected[col].to_numpy(float))
+
+
+def test_leading_and_trailing_gaps_fetch_only_missing_range():
+    """请求区间超出已存储区间时只拉取前后缺口，各多取一根已存储的K线用于校验"""
+    provider = StubProvider()
+    with tempfile.TemporaryDirectory() as root:
+        store = PriceStore(root)
+        store.get_bars("600000", datetime(2023, 4, 3), datetime(2023, 6, 30), "qfq", provider)
+        assert provider.calls == [(datetime(2023, 4, 3), datetime(2023, 6, 30))]
+
+        # 前缺口：从新的开始日期取到已存储的第一根K线
+        provider.calls.clear()
+        bars = store.get_bars("600000", datetime(2023, 2, 1), datetime(2023, 6, 30), "qfq", provider)
+        assert provider.calls == [(datetime(2023, 2, 1), datetime(2023, 4, 3))]
+        assert_bars_equal(provider.expected(datetime(2023, 2, 1), datetime(2023, 6, 30)), bars)
+        assert read_meta(store)["covered_start"] == "2023-02-01"
+
+        # 后缺口：从已存储的最后一根K线取到新的结束日期
+        provider.calls.clear()
+        bars = store.get_bars("600000", datetime(2023, 3, 1), datetime(2023, 9, 29), "qfq", provider)
+        assert provider.calls == [(datetime(2023, 6, 30), datetime(2023, 9, 29))]
+        assert_bars_equal(provider.expected(datetime(2023, 3, 1), datetime(2023, 9, 29)), bars)
+        meta = read_meta(store)
+        assert (meta["covered_start"], meta["covered_end"]) == ("2023-02-01", "2023-09-29")
+        assert meta["rows"] == len(provider.expected(datetime(2023, 2, 1), datetime(2023, 9, 29)))
+
+        # 已覆盖的区间直接读取本地数据
+        provider.calls.clear()
+        store.get_bars("600000", datetime(2023, 5, 1), datetime(2023, 8, 31), "qfq", provider)
+        assert provider.calls == []
+
+
+def test_adjustment_change_refetches_full_range():
+    """重叠的K线价格与已存储的不一致（前复权基准变化）时整体重新拉取并覆盖"""
+    provider = StubProvider(seed=1)
+    with tempfile.TemporaryDirectory() as root:
+        store = PriceStore(root)
+        store.get_bars("600000", datetime(2023, 3, 1), datetime(2023, 6, 30), "qfq", provider)
+
+        provider.scale = 0.9
+        provider.calls.clear()
+        bars = store.get_bars("600000", datetime(2023, 3, 1), datetime(2023, 9, 29), "qfq", provider)
+        assert provider.calls == [(datetime(2023, 6, 30), datetime(2023, 9, 29)),
+                                  (datetime(2023, 3, 1), datetime(2023, 9, 29))]
+        assert_bars_equal(provider.expected(datetime(2023, 3, 1), datetime(2023, 9, 29)), bars)
+
+        # 覆盖后的本地数据全部是新的复权价格，不再重复拉取
+        provider.calls.clear()
+        bars = store.get_bars("600000", datetime(2023, 3, 1), datetime(2023, 5, 31), "qfq", provider)
+        assert provider.calls == []
+        assert_bars_equal(provider.expected(datetime(2023, 3, 1), datetime(2023, 5, 31)), bars)
+
+        # 前缺口上的不一致同样触发整体重新拉取
+        provider.scale = 1.1
+        provider.calls.clear()
+        bars = store.get_bars("600000", datetime(2023, 1, 2), datetime(2023, 9, 29), "qfq", provider)
+        assert provider.calls == [(datetime(2023, 1, 2), datetime(2023, 3, 1)),
+                                  (datetime(2023, 1, 2), datetime(2023, 9, 29))]
+        assert_bars_equal(provider.expected(datetime(2023, 1, 2), datetime(2023, 9, 29)), bars)
+
+
+if __name__ == "__main__":
+    test_leading_and_trailing_gaps_fetch_only_missing_range()
+    test_adjustment_change_refetches_full_range()
+    print("本地行情存储测试通过")
@@ -0,0 +1,93 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.tools.api import get_resampled_price_history  # noqa: E402
+from src.tools.mock_data import generate_mock_bars, stub_price_source  # noqa: E402
+from src.tools.resampler import BarResampler, resample_bars, timeframe_cache  # noqa: E402
+
+
+def generate_mock_daily(days, seed=0):
+    """模拟日线，去掉部分交易日模拟节假日和停牌"""
+    df = generate_mock_bars(days, seed, start_date="2023-01-02", open_noise=True)
+    rng = np.random.default_rng(seed)
+    df["amount"] = rng.uniform(1e6, 1e8, days)
+    return df[rng.random(days) > 0.1].reset_index(drop=True)
+
+
+def reference_resample(daily, rule):
+    """pandas resample 的结果，日期替换为周期内最后一个交易日"""
+    indexed = daily.set_index("date", drop=False)
+    bars = indexed.resample(rule).agg({"date": "max", "open": "first", "high": "max", "low": "min",
+                                       "close": "last", "volume": "sum", "amount": "sum"})
+    return bars.dropna(subset=["close"]).reset_index(drop=True)[
+        ["date", "open", "high", "low", "close", "volume", "amount"]]
+
+
+def test_resample_matches_pandas():
+    daily = generate_mock_daily(400, seed=1)
+    for period, rule in (("weekly", "W-SUN"), ("monthly", "ME")):
+        expected = reference_resample(daily, rule)
+        actual = resample_bars(daily, period)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_incremental_update_matches_full_resample():
+    """逐段追加日线（包括周期中途）与一次性合成的结果相同"""
+    daily = generate_mock_daily(300, seed=2)
+    for period in ("weekly", "monthly"):
+        resampler = BarResampler(period)
+        for end in (37, 38, 120, 121, 122, 260, len(daily)):
+            bars = resampler.update(daily.iloc[:end])
+            expected = resample_bars(daily.iloc[:end], period)
+            pd.testing.assert_frame_equal(bars, expected, check_dtype=False)
+
+        # 前复权价格整体调整后重建
+        adjusted = daily.assign(**{c: daily[c] * 0.9 for c in ("open", "high", "low", "close")})
+        pd.testing.assert_frame_equal(resampler.update(adjusted), resample_bars(adjusted, period),
+                                      check_dtype=False)
+
+
+def test_update_with_new_part_only():
+    """只传入新增部分时须从已合成的最后一根日线开始，不相接的日线整体重建"""
+    daily = generate_mock_daily(300, seed=3)
+    for period in ("weekly", "monthly"):
+        resampler = BarResampler(period)
+        resampler.update(daily.iloc[:100])
+        bars = resampler.update(daily.iloc[99:200])
+        pd.testing.assert_frame_equal(bars, resample_bars(daily.iloc[:200], period), check_dtype=False)
+
+        # 跳过一段日线后，已合成的K线不能与之拼接
+        bars = resampler.update(daily.iloc[250:])
+        pd.testing.assert_frame_equal(bars, resample_bars(daily.iloc[250:], period), check_dtype=False)
+
+
+def test_resampled_history_with_disjoint_ranges():
+    """先后请求不相接的区间，再请求覆盖两者的区间，结果中间没有缺失的周期"""
+    daily = generate_mock_bars(400, seed=4, start_date="2024-01-01", open_noise=True)
+    timeframe_cache.clear("600000")
+    try:
+        with stub_price_source(daily):
+            get_resampled_price_history("600000", "monthly", "2024-01-01", "2024-03-31")
+            get_resampled_price_history("600000", "monthly", "2024-06-01", "2024-09-30")
+            bars = get_resampled_price_history("600000", "monthly", "2024-01-01", "2024-09-30")
+    finally:
+        timeframe_cache.clear("600000")
+
+    assert list(bars["date"].dt.month) == list(range(1, 10))
+    expected = resample_bars(daily[daily["date"] <= "2024-09-30"], "monthly")
+    pd.testing.assert_frame_equal(bars, expected, check_dtype=False)
+
+
+if __name__ == "__main__":
+    test_resample_matches_pandas()
+    test_incremental_update_matches_full_resample()
+    test_update_with_new_part_only()
+    test_resampled_history_with_disjoint_ranges()
+    print("OK")
@@ -0,0 +1,121 @@
+import sys
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.tools import kernels, rolling_stats  # noqa: E402
+from src.tools.kernels_numba import HAS_NUMBA  # noqa: E402
+from src.tools.mock_data import generate_mock_close  # noqa: E402
+
+TOLERANCE = 1e-9
+# 偏度、峰度由幂和相减得到，很短的窗口内方差远小于均值时会放大舍入误差
+HIGHER_MOMENT_TOLERANCE = 1e-6
+
+
+def generate_mock_returns(days, symbols, seed=0):
+    """模拟日收益率面板，含上市前的空白、停牌缺失值以及收益率为 0 的停牌区间"""
+    close = generate_mock_close(days + 1, symbols, seed)
+    returns = close[1:] / close[:-1] - 1
+    rng = np.random.default_rng(seed)
+    returns[100:130, 0] = 0.0
+    returns[:40, 1] = np.nan
+    returns[rng.random((days, symbols)) < 0.02] = np.nan
+    return returns
+
+
+def pandas_rolling(values, window, min_periods, name):
+    """pandas rolling 的结果，作为参考实现"""
+    result = getattr(pd.DataFrame(values).rolling(window, min_periods=min_periods), name)()
+    return result.to_numpy().reshape(np.shape(values))
+
+
+def assert_close(expected, actual, tolerance=TOLERANCE):
+    assert expected.shape == actual.shape
+    assert np.array_equal(np.isnan(expected), np.isnan(actual))
+    mask = ~np.isnan(expected)
+    assert np.allclose(actual[mask], expected[mask], rtol=tolerance, atol=tolerance)
+
+
+def test_rolling_extremes_match_pandas():
+    values = generate_mock_returns(300, 5, seed=1)
+    backends = ("numpy", "numba") if HAS_NUMBA else ("numpy",)
+    for backend in backends:
+        previous = kernels.set_backend(backend)
+        try:
+            for window, min_periods in ((120, None), (20, 5), (7, 1), (1, None), (400, 10)):
+                for name in ("min", "max"):
+                    expected = pandas_rolling(values, window, min_periods, name)
+                    actual = getattr(rolling_stats, f"rolling_{name}")
+                    assert_close(expected, actual(values, window, min_periods))
+                    assert_close(expected[:, 2], actual(values[:, 2], window, min_periods))
+        finally:
+            kernels.set_backend(previous)
+
+
+def test_rolling_moments_match_reference():
+    values = generate_mock_returns(300, 5, seed=2)
+    for window, min_periods in ((42, 21), (20, None), (5, 1), (3, None)):
+        moments = rolling_stats.rolling_moments(values, window, min_periods)
+        assert_close(kernels.rolling_mean(values, window, min_periods), moments.mean)
+        assert_close(kernels.rolling_std(values, window, min_periods), moments.std)
+        assert_close(pandas_rolling(values, window, min_periods, "skew"), moments.skew,
+                     HIGHER_MOMENT_TOLERANCE)
+        assert_close(pandas_rolling(values, window, min_periods, "kurt"), moments.kurt,
+                     HIGHER_MOMENT_TOLERANCE)
+        assert_close(kernels.rolling_sum(values, window, min_periods),
+                     rolling_stats.rolling_sum(values, window, min_periods))
+
+    # 停牌区间内窗口取值全部相同：标准差、偏度精确为 0
+    moments = rolling_stats.rolling_moments(values[:, 0], 20)
+    assert (moments.std[120:130] == 0).all() and (moments.skew[120:130] == 0).all()
+    assert rolling_stats.rolling_moments(values, 20, order=2).skew is None
+
+
+def test_per_column_windows():
+    values = generate_mock_returns(200, 2, seed=3)[:, 0]
+    windows = np.array([5, 21, 63])
+    moments = rolling_stats.rolling_moments(values, windows, windows // 2)
+    for j, window in enumerate(windows):
+        assert_close(kernels.rolling_std(values, window, window // 2), moments.std[:, j])
+        assert_close(pandas_rolling(values, window, window // 2, "skew"), moments.skew[:, j],
+                     HIGHER_MOMENT_TOLERANCE)
+
+
+def benchmark_rolling_stats(days=2520, symbols=5000, window=120):
+    """10 年日线 × 全市场股票：逐窗口的实现（pandas、kernels）与 O(n) 实现的耗时对比"""
+    values = generate_mock_returns(days, symbols)
+    cases = {
+        "rolling_max": (lambda: pandas_rolling(values, window, None, "max"),
+                        lambda: rolling_stats.rolling_max(values, window)),
+        "mean/std": (lambda: [f(values, window) for f in (kernels.rolling_mean, kernels.rolling_std)],
+                     lambda: rolling_stats.rolling_moments(values, window, order=2)),
+        "mean/std/skew/kurt": (lambda: [pandas_rolling(values, window, None, name)
+                                        for name in ("mean", "std", "skew", "kurt")],
+                               lambda: rolling_stats.rolling_moments(values, window)),
+    }
+    previous = kernels.set_backend("numpy")
+    try:
+        for name, (baseline, candidate) in cases.items():
+            timings = []
+            for func in (baseline, candidate):
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+            print(f"{name:<20} {days}x{symbols} window={window}: 逐窗口 {timings[0]:6.2f} s, "
+                  f"rolling_stats {timings[1]:6.2f} s, 加速比 {timings[0] / timings[1]:.1f}x")
+    finally:
+        kernels.set_backend(previous)
+
+
+if __name__ == "__main__":
+    test_rolling_extremes_match_pandas()
+    test_rolling_moments_match_reference()
+    test_per_column_windows()
+    benchmark_rolling_stats()
+    print("OK")
@@ -0,0 +1,105 @@
+import sys
+import os
+import threading
+import time
+
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.tools.spot_cache import SpotSnapshotCache  # noqa: E402
+
+
+class StubSpotFetcher:
+    """模拟全市场行情下载，记录下载次数；fail 为 True 时下载抛出异常"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            version = self.calls
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("spot quotes unavailable")
+        return pd.DataFrame({
+            "代码": ["600000", "000001", "300750"],
+            "最新价": [10.0 + version, 12.0 + version, 180.0 + version],
+        }, index=[7, 8, 9])
+
+
+def test_concurrent_readers_share_one_download():
+    """快照过期时并发请求只下载一次，其余线程复用同一份快照"""
+    fetcher = StubSpotFetcher(delay=0.1)
+    cache = SpotSnapshotCache(fetcher, ttl=60)
+    barrier = threading.Barrier(8)
+    snapshots = []
+
+    def read():
+        barrier.wait()
+        snapshots.append(cache.get_snapshot())
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert fetcher.calls == 1
+    assert len(snapshots) == 8 and all(s is snapshots[0] for s in snapshots)
+
+
+def test_expired_snapshot_is_downloaded_again():
+    """有效期内复用快照，过期后重新下载一次"""
+    fetcher = StubSpotFetcher()
+    cache = SpotSnapshotCache(fetcher, ttl=0.2)
+    first = cache.get_snapshot()
+    assert cache.get_snapshot() is first
+    assert fetcher.calls == 1
+
+    time.sleep(0.3)
+    second = cache.get_snapshot()
+    assert fetcher.calls == 2
+    assert second is not first and second["最新价"].iloc[0] == 12.0
+    assert cache.get_snapshot() is second
+
+
+def test_failed_refresh_returns_stale_snapshot():
+    """刷新失败时返回过期的快照；没有任何快照时抛出异常"""
+    fetcher = StubSpotFetcher()
+    cache = SpotSnapshotCache(fetcher, ttl=60)
+    first = cache.get_snapshot()
+
+    fetcher.fail = True
+    assert cache.get_snapshot(force_refresh=True) is first
+    assert fetcher.calls == 2
+
+    empty = SpotSnapshotCache(fetcher, ttl=60)
+    try:
+        empty.get_snapshot()
+        raise AssertionError("expected ConnectionError")
+    except ConnectionError:
+        pass
+
+
+def test_quote_lookup_by_code():
+    """按股票代码索引查询行情，快照重置行号后按位置取行"""
+    cache = SpotSnapshotCache(StubSpotFetcher(), ttl=60)
+    quote = cache.get_quote("000001")
+    assert quote["代码"] == "000001" and quote["最新价"] == 13.0
+    assert cache.get_quote("300750")["最新价"] == 181.0
+    assert cache.get_quote("688981") is None
+
+
+if __name__ == "__main__":
+    test_concurrent_readers_share_one_download()
+    test_expired_snapshot_is_downloaded_again()
+    test_failed_refresh_returns_stale_snapshot()
+    test_quote_lookup_by_code()
+    print("实时行情快照缓存测试通过")
@@ -0,0 +1,90 @@
+import json
+import sys
+import os
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.agents.technicals import (  # noqa: E402
+    calculate_adx,
+    calculate_atr,
+    calculate_bollinger_bands,
+    calculate_macd,
+    calculate_obv,
+    calculate_rsi,
+)
+from src.tools import mock_data  # noqa: E402
+from src.tools.streaming_indicators import StreamingTechnicals  # noqa: E402
+
+# 增量计算与整段重算的最大允许差异（只有浮点舍入不同）
+STREAMING_TOLERANCE = 1e-8
+
+
+def generate_mock_bars(days, seed=0):
+    """含一段价格不变的停牌区间"""
+    return mock_data.generate_mock_bars(days, seed, flat=(100, 110))
+
+
+def reference_values(prices_df):
+    """technicals.py 对整段历史重算得到的各指标序列"""
+    macd_line, signal_line = calculate_macd(prices_df)
+    upper_band, lower_band = calculate_bollinger_bands(prices_df)
+    adx = calculate_adx(prices_df.copy())
+    return {
+        "macd": macd_line,
+        "macd_signal": signal_line,
+        "rsi": calculate_rsi(prices_df),
+        "bollinger_upper": upper_band,
+        "bollinger_lower": lower_band,
+        "atr": calculate_atr(prices_df),
+        "adx": adx["adx"],
+        "+di": adx["+di"],
+        "-di": adx["-di"],
+        "obv": calculate_obv(prices_df.copy()),
+    }
+
+
+def assert_matches(expected, actual):
+    for name, series in expected.items():
+        expected_values = series.to_numpy(dtype=float)
+        actual_values = np.asarray(actual[name], dtype=float)
+        assert np.array_equal(np.isnan(expected_values),
+                              np.isnan(actual_values)), name
+        mask = ~np.isnan(expected_values)
+        assert np.allclose(actual_values[mask], expected_values[mask],
+                           rtol=0, atol=STREAMING_TOLERANCE), name
+
+
+def test_streaming_matches_full_recompute():
+    """逐根更新的结果与整段重算一致"""
+    prices_df = generate_mock_bars(300, seed=1)
+    technicals = StreamingTechnicals()
+    rows = [technicals.update(bar) for bar in prices_df.to_dict("records")]
+    actual = {name: [row[name] for row in rows] for name in rows[0]}
+    assert_matches(reference_values(prices_df), actual)
+
+
+def test_state_round_trip():
+    """保存状态后恢复，继续更新的结果与不中断时相同"""
+    prices_df = generate_mock_bars(200, seed=2)
+    head, tail = prices_df.iloc[:150], prices_df.iloc[150:]
+
+    uninterrupted = StreamingTechnicals()
+    uninterrupted.update_frame(prices_df)
+
+    first = StreamingTechnicals()
+    first.update_frame(head)
+    saved = json.loads(json.dumps(first.state_dict()))
+    restored = StreamingTechnicals.from_state_dict(saved)
+    restored.update_frame(tail)
+
+    assert restored.values() == uninterrupted.values()
+
+
+if __name__ == "__main__":
+    test_streaming_matches_full_recompute()
+    test_state_round_trip()
+    print("OK")
@@ -0,0 +1,111 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.agents.technicals import (  # noqa: E402
+    STRATEGY_WEIGHTS,
+    calculate_bollinger_bands,
+    calculate_macd,
+    calculate_mean_reversion_signals,
+    calculate_momentum_signals,
+    calculate_obv,
+    calculate_rsi,
+    calculate_stat_arb_signals,
+    calculate_trend_signals,
+    calculate_volatility_signals,
+    weighted_signal_combination,
+)
+from src.agents.technicals_batch import analyze_panel  # noqa: E402
+from src.tools.mock_data import generate_mock_bars  # noqa: E402
+from src.tools.price_panel import PricePanel  # noqa: E402
+
+
+def generate_mock_frames(symbols, days, seed=0):
+    """生成长度不同、带停牌日的多只股票日线数据"""
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for i, symbol in enumerate(symbols):
+        df = generate_mock_bars(days, seed * 100 + i, start_date="2022-01-03",
+                                drift=rng.normal(0, 0.002))
+        # 不同的上市时间和随机停牌日
+        df = df.iloc[i * 7 % 90:]
+        frames[symbol] = df[rng.random(len(df)) > 0.03].reset_index(drop=True)
+    return frames
+
+
+def reference_row(prices_df):
+    """对单只股票用 technicals.py 的逐股实现计算信号"""
+    strategies = {
+        'trend': calculate_trend_signals(prices_df),
+        'mean_reversion': calculate_mean_reversion_signals(prices_df),
+        'momentum': calculate_momentum_signals(prices_df),
+        'volatility': calculate_volatility_signals(prices_df),
+        'stat_arb': calculate_stat_arb_signals(prices_df),
+    }
+    row = {f'{name}_signal': s['signal'] for name, s in strategies.items()}
+    row.update({f'{name}_confidence': s['confidence'] for name, s in strategies.items()})
+    combined = weighted_signal_combination(strategies, STRATEGY_WEIGHTS)
+    row['signal'], row['confidence'] = combined['signal'], combined['confidence']
+
+    macd_line, signal_line = calculate_macd(prices_df)
+    rsi = calculate_rsi(prices_df).iloc[-1]
+    upper_band, lower_band = calculate_bollinger_bands(prices_df)
+    obv_slope = calculate_obv(prices_df).diff().iloc[-5:].mean()
+    price = prices_df['close'].iloc[-1]
+
+    def label(bullish, bearish):
+        return 'bullish' if bullish else 'bearish' if bearish else 'neutral'
+
+    row['macd'] = label(
+        macd_line.iloc[-2] < signal_line.iloc[-2] and macd_line.iloc[-1] > signal_line.iloc[-1],
+        macd_line.iloc[-2] > signal_line.iloc[-2] and macd_line.iloc[-1] < signal_line.iloc[-1])
+    row['rsi'] = label(rsi < 30, rsi > 70)
+    row['bollinger'] = label(price < lower_band.iloc[-1], price > upper_band.iloc[-1])
+    row['obv'] = label(obv_slope > 0, obv_slope < 0)
+    return row
+
+
+def test_panel_matches_single_symbol_analysis():
+    symbols = [f"{600000 + i}" for i in range(12)]
+    frames = generate_mock_frames(symbols, 260, seed=3)
+    panel = PricePanel.from_frames(frames, symbols + ["000000"])
+    table = analyze_panel(panel)
+
+    assert list(table.index) == symbols  # 没有数据的股票被跳过
+    for symbol in symbols:
+        prices_df = panel.to_frame(symbol)
+        expected = reference_row(prices_df)
+        actual = table.loc[symbol]
+        assert actual['bars'] == len(prices_df)
+        assert actual['last_date'] == prices_df['date'].iloc[-1]
+        for name, value in expected.items():
+            if isinstance(value, str):
+                assert actual[name] == value, (symbol, name)
+            else:
+                assert np.isclose(actual[name], value, rtol=1e-9, atol=1e-12, equal_nan=True), \
+                    (symbol, name, actual[name], value)
+
+
+def benchmark_panel(num_symbols=5000, days=250):
+    """整个股票池的批量分析耗时"""
+    symbols = [f"{i:06d}" for i in range(num_symbols)]
+    frames = generate_mock_frames(symbols, days)
+    panel = PricePanel.from_frames(frames, symbols)
+
+    start = time.perf_counter()
+    table = analyze_panel(panel)
+    elapsed = time.perf_counter() - start
+    print(f"{len(table)} symbols x {days} days: {elapsed:.2f}s")
+    print(table['signal'].value_counts().to_string())
+
+
+if __name__ == "__main__":
+    test_panel_matches_single_symbol_analysis()
+    benchmark_panel()
+    print("OK")
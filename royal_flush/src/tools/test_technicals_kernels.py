@@ -0,0 +1,587 @@
+import time
+import warnings
+import sys
+import os
+import math
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.agents import technicals  # noqa: E402
+from src.tools import mock_data  # noqa: E402
+
+# 数组内核与原 pandas 实现的最大允许差异
+KERNEL_TOLERANCE = 1e-8
+
+
+##### 原 pandas 实现，作为对照基准 #####
+
+def calculate_macd(prices_df: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
+    ema_12 = prices_df['close'].ewm(span=12, adjust=False).mean()
+    ema_26 = prices_df['close'].ewm(span=26, adjust=False).mean()
+    macd_line = ema_12 - ema_26
+    signal_line = macd_line.ewm(span=9, adjust=False).mean()
+    return macd_line, signal_line
+
+
+def calculate_rsi(prices_df: pd.DataFrame, period: int = 14) -> pd.Series:
+    delta = prices_df['close'].diff()
+    gain = (delta.where(delta > 0, 0)).fillna(0)
+    loss = (-delta.where(delta < 0, 0)).fillna(0)
+    avg_gain = gain.rolling(window=period).mean()
+    avg_loss = loss.rolling(window=period).mean()
+    rs = avg_gain / avg_loss
+    rsi = 100 - (100 / (1 + rs))
+    return rsi
+
+
+def calculate_bollinger_bands(
+    prices_df: pd.DataFrame,
+    window: int = 20
+) -> tuple[pd.Series, pd.Series]:
+    sma = prices_df['close'].rolling(window).mean()
+    std_dev = prices_df['close'].rolling(window).std()
+    upper_band = sma + (std_dev * 2)
+    lower_band = sma - (std_dev * 2)
+    return upper_band, lower_band
+
+
+def calculate_ema(df: pd.DataFrame, window: int) -> pd.Series:
+    """
+    Calculate Exponential Moving Average
+
+    Args:
+        df: DataFrame with price data
+        window: EMA period
+
+    Returns:
+        pd.Series: EMA values
+    """
+    return df['close'].ewm(span=window, adjust=False).mean()
+
+
+def calculate_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+    """
+    Calculate Average Directional Index (ADX)
+
+    Args:
+        df: DataFrame with OHLC data
+        period: Period for calculations
+
+    Returns:
+        DataFrame with ADX values
+    """
+    # Calculate True Range
+    df['high_low'] = df['high'] - df['low']
+    df['high_close'] = abs(df['high'] - df['close'].shift())
+    df['low_close'] = abs(df['low'] - df['close'].shift())
+    df['tr'] = df[['high_low', 'high_close', 'low_close']].max(axis=1)
+
+    # Calculate Directional Movement
+    df['up_move'] = df['high'] - df['high'].shift()
+    df['down_move'] = df['low'].shift() - df['low']
+
+    df['plus_dm'] = np.where(
+        (df['up_move'] > df['down_move']) & (df['up_move'] > 0),
+        df['up_move'],
+        0
+    )
+    df['minus_dm'] = np.where(
+        (df['down_move'] > df['up_move']) & (df['down_move'] > 0),
+        df['down_move'],
+        0
+    )
+
+    # Calculate ADX
+    df['+di'] = 100 * (df['plus_dm'].ewm(span=period).mean() /
+                       df['tr'].ewm(span=period).mean())
+    df['-di'] = 100 * (df['minus_dm'].ewm(span=period).mean() /
+                       df['tr'].ewm(span=period).mean())
+    df['dx'] = 100 * abs(df['+di'] - df['-di']) / (df['+di'] + df['-di'])
+    df['adx'] = df['dx'].ewm(span=period).mean()
+
+    return df[['adx', '+di', '-di']]
+
+
+def calculate_ichimoku(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    """
+    Calculate Ichimoku Cloud indicators
+
+    Args:
+        df: DataFrame with OHLC data
+
+    Returns:
+        Dictionary containing Ichimoku components
+    """
+    # Tenkan-sen (Conversion Line): (9-period high + 9-period low)/2
+    period9_high = df['high'].rolling(window=9).max()
+    period9_low = df['low'].rolling(window=9).min()
+    tenkan_sen = (period9_high + period9_low) / 2
+
+    # Kijun-sen (Base Line): (26-period high + 26-period low)/2
+    period26_high = df['high'].rolling(window=26).max()
+    period26_low = df['low'].rolling(window=26).min()
+    kijun_sen = (period26_high + period26_low) / 2
+
+    # Senkou Span A (Leading Span A): (Conversion Line + Base Line)/2
+    senkou_span_a = ((tenkan_sen + kijun_sen) / 2).shift(26)
+
+    # Senkou Span B (Leading Span B): (52-period high + 52-period low)/2
+    period52_high = df['high'].rolling(window=52).max()
+    period52_low = df['low'].rolling(window=52).min()
+    senkou_span_b = ((period52_high + period52_low) / 2).shift(26)
+
+    # Chikou Span (Lagging Span): Close shifted back 26 periods
+    chikou_span = df['close'].shift(-26)
+
+    return {
+        'tenkan_sen': tenkan_sen,
+        'kijun_sen': kijun_sen,
+        'senkou_span_a': senkou_span_a,
+        'senkou_span_b': senkou_span_b,
+        'chikou_span': chikou_span
+    }
+
+
+def calculate_atr(df: pd.DataFrame, period: int = 14, min_periods: int = 7) -> pd.Series:
+    """
+    Optimized ATR calculation with minimum periods parameter
+
+    Args:
+        df: DataFrame with OHLC data
+        period: Period for ATR calculation
+        min_periods: Minimum number of periods required
+
+    Returns:
+        pd.Series: ATR values
+    """
+    high_low = df['high'] - df['low']
+    high_close = abs(df['high'] - df['close'].shift())
+    low_close = abs(df['low'] - df['close'].shift())
+
+    ranges = pd.concat([high_low, high_close, low_close], axis=1)
+    true_range = ranges.max(axis=1)
+
+    return true_range.rolling(period, min_periods=min_periods).mean()
+
+
+def calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 10) -> float:
+    """
+    Optimized Hurst exponent calculation with shorter lookback and better error handling
+
+    Args:
+        price_series: Array-like price data
+        max_lag: Maximum lag for R/S calculation (reduced from 20 to 10)
+
+    Returns:
+        float: Hurst exponent
+    """
+    try:
+        # 使用对数收益率而不是价格
+        returns = np.log(price_series / price_series.shift(1)).dropna()
+
+        # 如果数据不足，返回0.5（随机游走）
+        if len(returns) < max_lag * 2:
+            return 0.5
+
+        lags = range(2, max_lag)
+        # 使用更稳定的计算方法
+        tau = [np.sqrt(np.std(np.subtract(returns[lag:], returns[:-lag])))
+               for lag in lags]
+
+        # 添加小的常数避免log(0)
+        tau = [max(1e-8, t) for t in tau]
+
+        # 使用对数回归计算Hurst指数
+        reg = np.polyfit(np.log(lags), np.log(tau), 1)
+        h = reg[0]
+
+        # 限制Hurst指数在合理范围内
+        return max(0.0, min(1.0, h))
+
+    except (ValueError, RuntimeWarning, np.linalg.LinAlgError):
+        # 如果计算失败，返回0.5表示随机游走
+        return 0.5
+
+
+def calculate_obv(prices_df: pd.DataFrame) -> pd.Series:
+    obv = [0]
+    for i in range(1, len(prices_df)):
+        if prices_df['close'].iloc[i] > prices_df['close'].iloc[i - 1]:
+            obv.append(obv[-1] + prices_df['volume'].iloc[i])
+        elif prices_df['close'].iloc[i] < prices_df['close'].iloc[i - 1]:
+            obv.append(obv[-1] - prices_df['volume'].iloc[i])
+        else:
+            obv.append(obv[-1])
+    prices_df['OBV'] = obv
+    return prices_df['OBV']
+
+
+def calculate_trend_signals(prices_df):
+    """
+    Advanced trend following strategy using multiple timeframes and indicators
+    """
+    # Calculate EMAs for multiple timeframes
+    ema_8 = calculate_ema(prices_df, 8)
+    ema_21 = calculate_ema(prices_df, 21)
+    ema_55 = calculate_ema(prices_df, 55)
+
+    # Calculate ADX for trend strength
+    adx = calculate_adx(prices_df, 14)
+
+    # Calculate Ichimoku Cloud
+    ichimoku = calculate_ichimoku(prices_df)
+
+    # Determine trend direction and strength
+    short_trend = ema_8 > ema_21
+    medium_trend = ema_21 > ema_55
+
+    # Combine signals with confidence weighting
+    trend_strength = adx['adx'].iloc[-1] / 100.0
+
+    if short_trend.iloc[-1] and medium_trend.iloc[-1]:
+        signal = 'bullish'
+        confidence = trend_strength
+    elif not short_trend.iloc[-1] and not medium_trend.iloc[-1]:
+        signal = 'bearish'
+        confidence = trend_strength
+    else:
+        signal = 'neutral'
+        confidence = 0.5
+
+    return {
+        'signal': signal,
+        'confidence': confidence,
+        'metrics': {
+            'adx': float(adx['adx'].iloc[-1]),
+            'trend_strength': float(trend_strength),
+            # 'ichimoku': ichimoku
+        }
+    }
+
+
+def calculate_mean_reversion_signals(prices_df):
+    """
+    Mean reversion strategy using statistical measures and Bollinger Bands
+    """
+    # Calculate z-score of price relative to moving average
+    ma_50 = prices_df['close'].rolling(window=50).mean()
+    std_50 = prices_df['close'].rolling(window=50).std()
+    z_score = (prices_df['close'] - ma_50) / std_50
+
+    # Calculate Bollinger Bands
+    bb_upper, bb_lower = calculate_bollinger_bands(prices_df)
+
+    # Calculate RSI with multiple timeframes
+    rsi_14 = calculate_rsi(prices_df, 14)
+    rsi_28 = calculate_rsi(prices_df, 28)
+
+    # Mean reversion signals
+    extreme_z_score = abs(z_score.iloc[-1]) > 2
+    price_vs_bb = (prices_df['close'].iloc[-1] - bb_lower.iloc[-1]
+                   ) / (bb_upper.iloc[-1] - bb_lower.iloc[-1])
+
+    # Combine signals
+    if z_score.iloc[-1] < -2 and price_vs_bb < 0.2:
+        signal = 'bullish'
+        confidence = min(abs(z_score.iloc[-1]) / 4, 1.0)
+    elif z_score.iloc[-1] > 2 and price_vs_bb > 0.8:
+        signal = 'bearish'
+        confidence = min(abs(z_score.iloc[-1]) / 4, 1.0)
+    else:
+        signal = 'neutral'
+        confidence = 0.5
+
+    return {
+        'signal': signal,
+        'confidence': confidence,
+        'metrics': {
+            'z_score': float(z_score.iloc[-1]),
+            'price_vs_bb': float(price_vs_bb),
+            'rsi_14': float(rsi_14.iloc[-1]),
+            'rsi_28': float(rsi_28.iloc[-1])
+        }
+    }
+
+
+def calculate_momentum_signals(prices_df):
+    """
+    Multi-factor momentum strategy with conservative settings
+    """
+    # Price momentum with adjusted min_periods
+    returns = prices_df['close'].pct_change()
+    mom_1m = returns.rolling(21, min_periods=5).sum()  # 短期动量允许较少数据点
+    mom_3m = returns.rolling(63, min_periods=42).sum()  # 中期动量要求更多数据点
+    mom_6m = returns.rolling(126, min_periods=63).sum()  # 长期动量保持严格要求
+
+    # Volume momentum
+    volume_ma = prices_df['volume'].rolling(21, min_periods=10).mean()
+    volume_momentum = prices_df['volume'] / volume_ma
+
+    # 处理NaN值
+    mom_1m = mom_1m.fillna(0)  # 短期动量可以用0填充
+    mom_3m = mom_3m.fillna(mom_1m)  # 中期动量可以用短期动量填充
+    mom_6m = mom_6m.fillna(mom_3m)  # 长期动量可以用中期动量填充
+
+    # Calculate momentum score with more weight on longer timeframes
+    momentum_score = (
+        0.2 * mom_1m +  # 降低短期权重
+        0.3 * mom_3m +
+        0.5 * mom_6m    # 增加长期权重
+    ).iloc[-1]
+
+    # Volume confirmation
+    volume_confirmation = volume_momentum.iloc[-1] > 1.0
+
+    if momentum_score > 0.05 and volume_confirmation:
+        signal = 'bullish'
+        confidence = min(abs(momentum_score) * 5, 1.0)
+    elif momentum_score < -0.05 and volume_confirmation:
+        signal = 'bearish'
+        confidence = min(abs(momentum_score) * 5, 1.0)
+    else:
+        signal = 'neutral'
+        confidence = 0.5
+
+    return {
+        'signal': signal,
+        'confidence': confidence,
+        'metrics': {
+            'momentum_1m': float(mom_1m.iloc[-1]),
+            'momentum_3m': float(mom_3m.iloc[-1]),
+            'momentum_6m': float(mom_6m.iloc[-1]),
+            'volume_momentum': float(volume_momentum.iloc[-1])
+        }
+    }
+
+
+def calculate_volatility_signals(prices_df):
+    """
+    Optimized volatility calculation with shorter lookback periods
+    """
+    returns = prices_df['close'].pct_change()
+
+    # 使用更短的周期和最小周期要求计算历史波动率
+    hist_vol = returns.rolling(21, min_periods=10).std() * math.sqrt(252)
+
+    # 使用更短的周期计算波动率均值，并允许更少的数据点
+    vol_ma = hist_vol.rolling(42, min_periods=21).mean()
+    vol_regime = hist_vol / vol_ma
+
+    # 使用更灵活的标准差计算
+    vol_std = hist_vol.rolling(42, min_periods=21).std()
+    vol_z_score = (hist_vol - vol_ma) / vol_std.replace(0, np.nan)
+
+    # ATR计算优化
+    atr = calculate_atr(prices_df, period=14, min_periods=7)
+    atr_ratio = atr / prices_df['close']
+
+    # 如果关键指标为NaN，使用替代值而不是直接返回中性信号
+    if pd.isna(vol_regime.iloc[-1]):
+        vol_regime.iloc[-1] = 1.0  # 假设处于正常波动率区间
+    if pd.isna(vol_z_score.iloc[-1]):
+        vol_z_score.iloc[-1] = 0.0  # 假设处于均值位置
+
+    # Generate signal based on volatility regime
+    current_vol_regime = vol_regime.iloc[-1]
+    vol_z = vol_z_score.iloc[-1]
+
+    if current_vol_regime < 0.8 and vol_z < -1:
+        signal = 'bullish'  # Low vol regime, potential for expansion
+        confidence = min(abs(vol_z) / 3, 1.0)
+    elif current_vol_regime > 1.2 and vol_z > 1:
+        signal = 'bearish'  # High vol regime, potential for contraction
+        confidence = min(abs(vol_z) / 3, 1.0)
+    else:
+        signal = 'neutral'
+        confidence = 0.5
+
+    return {
+        'signal': signal,
+        'confidence': confidence,
+        'metrics': {
+            'historical_volatility': float(hist_vol.iloc[-1]),
+            'volatility_regime': float(current_vol_regime),
+            'volatility_z_score': float(vol_z),
+            'atr_ratio': float(atr_ratio.iloc[-1])
+        }
+    }
+
+
+def calculate_stat_arb_signals(prices_df):
+    """
+    Optimized statistical arbitrage signals with shorter lookback periods
+    """
+    # Calculate price distribution statistics
+    returns = prices_df['close'].pct_change()
+
+    # 使用更短的周期计算偏度和峰度
+    skew = returns.rolling(42, min_periods=21).skew()
+    kurt = returns.rolling(42, min_periods=21).kurt()
+
+    # 优化Hurst指数计算
+    hurst = calculate_hurst_exponent(prices_df['close'], max_lag=10)
+
+    # 处理NaN值
+    if pd.isna(skew.iloc[-1]):
+        skew.iloc[-1] = 0.0  # 假设正态分布
+    if pd.isna(kurt.iloc[-1]):
+        kurt.iloc[-1] = 3.0  # 假设正态分布
+
+    # Generate signal based on statistical properties
+    if hurst < 0.4 and skew.iloc[-1] > 1:
+        signal = 'bullish'
+        confidence = (0.5 - hurst) * 2
+    elif hurst < 0.4 and skew.iloc[-1] < -1:
+        signal = 'bearish'
+        confidence = (0.5 - hurst) * 2
+    else:
+        signal = 'neutral'
+        confidence = 0.5
+
+    return {
+        'signal': signal,
+        'confidence': confidence,
+        'metrics': {
+            'hurst_exponent': float(hurst),
+            'skewness': float(skew.iloc[-1]),
+            'kurtosis': float(kurt.iloc[-1])
+        }
+    }
+
+
+##### 测试 #####
+
+def generate_mock_bars(days, seed=0):
+    """含一段价格不变的停牌区间"""
+    return mock_data.generate_mock_bars(days, seed, flat=(40, 52))
+
+
+def assert_close(expected, actual, name):
+    expected = np.asarray(expected, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    assert np.array_equal(np.isnan(expected), np.isnan(actual)), name
+    mask = ~np.isnan(expected)
+    assert np.allclose(actual[mask], expected[mask],
+                       rtol=0, atol=KERNEL_TOLERANCE), name
+
+
+def indicator_pairs(prices_df):
+    """(名称, 原实现结果, 数组内核结果)"""
+    pairs = [
+        ("macd", calculate_macd(prices_df), technicals.calculate_macd(prices_df)),
+        ("rsi", calculate_rsi(prices_df), technicals.calculate_rsi(prices_df)),
+        ("rsi_28", calculate_rsi(prices_df, 28),
+         technicals.calculate_rsi(prices_df, 28)),
+        ("bollinger", calculate_bollinger_bands(prices_df),
+         technicals.calculate_bollinger_bands(prices_df)),
+        ("ema", calculate_ema(prices_df, 21), technicals.calculate_ema(prices_df, 21)),
+        ("atr", calculate_atr(prices_df), technicals.calculate_atr(prices_df)),
+        ("obv", calculate_obv(prices_df.copy()), technicals.calculate_obv(prices_df)),
+    ]
+    expected_adx = calculate_adx(prices_df.copy())
+    actual_adx = technicals.calculate_adx(prices_df)
+    pairs += [(f"adx[{col}]", expected_adx[col], actual_adx[col])
+              for col in ("adx", "+di", "-di")]
+    expected_ichimoku = calculate_ichimoku(prices_df)
+    actual_ichimoku = technicals.calculate_ichimoku(prices_df)
+    pairs += [(f"ichimoku[{key}]", expected_ichimoku[key], actual_ichimoku[key])
+              for key in expected_ichimoku]
+    return pairs
+
+
+def test_indicators_match_reference():
+    """各指标的数组内核与原 pandas 实现一致"""
+    for days, seed in ((60, 1), (300, 2), (1000, 3)):
+        prices_df = generate_mock_bars(days, seed)
+        for name, expected, actual in indicator_pairs(prices_df):
+            if isinstance(expected, tuple):
+                for e, a in zip(expected, actual):
+                    assert_close(e, a, name)
+            else:
+                assert_close(expected, actual, name)
+        assert technicals.calculate_hurst_exponent(prices_df["close"]) == \
+            calculate_hurst_exponent(prices_df["close"])
+
+
+def test_indicators_do_not_mutate_input():
+    """calculate_adx / calculate_obv 不再向调用方的 DataFrame 写入临时列"""
+    prices_df = generate_mock_bars(200)
+    original = prices_df.copy()
+    technicals.calculate_adx(prices_df)
+    technicals.calculate_obv(prices_df)
+    pd.testing.assert_frame_equal(prices_df, original)
+
+
+STRATEGIES = [
+    ("trend", calculate_trend_signals, technicals.calculate_trend_signals),
+    ("mean_reversion", calculate_mean_reversion_signals,
+     technicals.calculate_mean_reversion_signals),
+    ("momentum", calculate_momentum_signals, technicals.calculate_momentum_signals),
+    ("volatility", calculate_volatility_signals,
+     technicals.calculate_volatility_signals),
+    ("stat_arb", calculate_stat_arb_signals, technicals.calculate_stat_arb_signals),
+]
+
+
+def test_strategy_signals_match_reference():
+    """五个策略在每个交易日给出与原实现相同的信号和指标"""
+    prices_df = generate_mock_bars(400, seed=4)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for end in range(30, len(prices_df) + 1, 7):
+            window = prices_df.iloc[:end]
+            for name, reference, kernel in STRATEGIES:
+                expected = reference(window.copy())
+                actual = kernel(window)
+                assert actual["signal"] == expected["signal"], (name, end)
+                assert_close([expected["confidence"]], [actual["confidence"]], name)
+                for metric, value in expected["metrics"].items():
+                    assert_close([value], [actual["metrics"][metric]],
+                                 f"{name}.{metric}")
+
+
+def run_reference(prices_df):
+    prices_df = prices_df.copy()
+    calculate_macd(prices_df)
+    calculate_rsi(prices_df)
+    calculate_bollinger_bands(prices_df)
+    calculate_obv(prices_df)
+    for _, reference, _ in STRATEGIES:
+        reference(prices_df)
+
+
+def run_kernels(prices_df):
+    technicals.calculate_macd(prices_df)
+    technicals.calculate_rsi(prices_df)
+    technicals.calculate_bollinger_bands(prices_df)
+    technicals.calculate_obv(prices_df)
+    technicals.compute_technicals(prices_df, list(technicals.STRATEGY_OUTPUTS.values()))
+
+
+def benchmark_technicals(days=(250, 750, 2500), repeat=5):
+    """对比 technical_analyst_agent 的全部指标计算在两种实现下的耗时"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for n in days:
+            prices_df = generate_mock_bars(n)
+            timings = []
+            for func in (run_reference, run_kernels):
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    func(prices_df)
+                timings.append((time.perf_counter() - start) / repeat)
+            print(f"{n:5d} 个交易日: pandas {timings[0] * 1000:7.1f} ms, "
+                  f"数组内核 {timings[1] * 1000:6.1f} ms, 加速比 {timings[0] / timings[1]:.1f}x")
+
+
+if __name__ == "__main__":
+    test_indicators_match_reference()
+    test_indicators_do_not_mutate_input()
+    test_strategy_signals_match_reference()
+    benchmark_technicals()
@@ -0,0 +1,164 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+from src.agents.technicals import (  # noqa: E402
+    STRATEGY_WEIGHTS,
+    calculate_adx,
+    calculate_atr,
+    calculate_bollinger_bands,
+    calculate_macd,
+    calculate_mean_reversion_signals,
+    calculate_momentum_signals,
+    calculate_rsi,
+    calculate_stat_arb_signals,
+    calculate_trend_signals,
+    calculate_volatility_signals,
+    weighted_signal_combination,
+)
+from src.agents.technicals_sweep import (  # noqa: E402
+    parameter_grid,
+    signal_history,
+    sweep_indicator,
+    sweep_strategy,
+)
+from src.tools import kernels  # noqa: E402
+from src.tools.mock_data import generate_mock_bars  # noqa: E402
+
+STRATEGY_FUNCTIONS = {
+    "trend": calculate_trend_signals,
+    "mean_reversion": calculate_mean_reversion_signals,
+    "momentum": calculate_momentum_signals,
+    "volatility": calculate_volatility_signals,
+    "stat_arb": calculate_stat_arb_signals,
+}
+SIGNAL_CODES = {"bearish": -1, "neutral": 0, "bullish": 1}
+
+
+def generate_mock_prices(days, seed=0):
+    """含价格不变的停牌区间和较大的波动，使各策略都出现非中性信号"""
+    return generate_mock_bars(days, seed, start_date="2021-01-04", volatile=True, flat=(150, 170))
+
+
+def assert_close(expected, actual):
+    expected, actual = np.asarray(expected, dtype=float), np.asarray(actual, dtype=float)
+    assert np.array_equal(np.isnan(expected), np.isnan(actual))
+    mask = ~np.isnan(expected)
+    assert np.allclose(actual[mask], expected[mask], rtol=1e-7, atol=1e-9)
+
+
+def test_parameter_grid():
+    grid = parameter_grid(window=[10, 20], num_std=2.0, other=range(3))
+    assert list(grid.columns) == ["window", "num_std", "other"]
+    assert len(grid) == 6 and (grid["num_std"] == 2.0).all()
+
+
+def test_indicator_sweeps_match_single_runs():
+    prices = generate_mock_prices(300, seed=1)
+    result = sweep_indicator(prices, "rsi", period=[5, 14, 40])
+    for row, period in enumerate(result.params["period"]):
+        assert_close(calculate_rsi(prices, period), result.values["rsi"][row])
+
+    result = sweep_indicator(prices, "bollinger", window=[10, 20, 60], num_std=[1.5, 2.0])
+    for row, params in result.params.iterrows():
+        upper, lower = calculate_bollinger_bands(prices, int(params["window"]))
+        std_dev = (upper - lower) / 4  # calculate_bollinger_bands 固定为 2 倍标准差
+        assert_close((upper + lower) / 2 + std_dev * params["num_std"], result.values["upper"][row])
+
+    result = sweep_indicator(prices, "ema", span=[5, 21, 55])
+    for row, span in enumerate(result.params["span"]):
+        assert_close(kernels.ewm_mean(prices["close"].to_numpy(), span), result.values["ema"][row])
+
+    macd_line, signal_line = calculate_macd(prices)
+    result = sweep_indicator(prices, "macd", fast=[5, 12])
+    default_row = result.params["fast"].eq(12).idxmax()
+    assert_close(macd_line, result.values["macd"][default_row])
+    assert_close(signal_line, result.values["signal"][default_row])
+
+    assert_close(calculate_atr(prices), sweep_indicator(prices, "atr").values["atr"][0])
+    assert_close(calculate_adx(prices)["adx"], sweep_indicator(prices, "adx").values["adx"][0])
+
+
+def test_default_strategy_sweeps_match_agent_signals():
+    """默认参数下，每个日期的信号与只用截至该日数据运行 calculate_*_signals 的结果相同"""
+    prices = generate_mock_prices(420, seed=2)
+    checked_dates = range(30, len(prices), 3)
+    for name, func in STRATEGY_FUNCTIONS.items():
+        result = sweep_strategy(prices, name)
+        assert len(result.params) == 1 and result.values["signal"].shape == (1, len(prices))
+        signals, confidences = result.values["signal"][0], result.values["confidence"][0]
+        non_neutral = 0
+        for end in checked_dates:
+            expected = func(prices.iloc[:end + 1])
+            assert signals[end] == SIGNAL_CODES[expected["signal"]], (name, end)
+            assert np.isclose(confidences[end], expected["confidence"], atol=1e-9), (name, end)
+            non_neutral += signals[end] != 0
+        assert non_neutral > 0, name
+
+
+def test_grid_rows_match_single_parameter_sweeps():
+    """整组网格一次计算的结果与逐组参数单独计算的结果相同"""
+    prices = generate_mock_prices(300, seed=3)
+    result = sweep_strategy(prices, "mean_reversion", z_window=[20, 50, 80], bb_std=[1.5, 2.5])
+    for row, params in result.params.iterrows():
+        single = sweep_strategy(prices, "mean_reversion", **params.to_dict())
+        assert np.array_equal(single.values["signal"][0], result.values["signal"][row])
+    assert result.to_frame("signal").shape == (6, len(prices))
+
+
+def test_signal_history_matches_agent_ensemble():
+    prices = generate_mock_prices(400, seed=4)
+    history = signal_history(prices)
+    assert len(history) == len(prices) and (history.index == prices["date"]).all()
+    for end in range(60, len(prices), 11):
+        window = prices.iloc[:end + 1]
+        signals = {name: func(window) for name, func in STRATEGY_FUNCTIONS.items()}
+        expected = weighted_signal_combination(signals, STRATEGY_WEIGHTS)
+        row = history.iloc[end]
+        assert row["signal"] == SIGNAL_CODES[expected["signal"]], end
+        assert np.isclose(row["confidence"], expected["confidence"], atol=1e-9), end
+        for name, signal in signals.items():
+            assert row[f"{name}_signal"] == SIGNAL_CODES[signal["signal"]], (name, end)
+
+
+def benchmark_sweep(days=2500):
+    prices = generate_mock_prices(days)
+    grids = {
+        "rsi": dict(period=range(5, 41)),
+        "bollinger": dict(window=range(10, 61, 5), num_std=[1.5, 2.0, 2.5, 3.0]),
+        "trend": dict(fast=range(5, 16), medium=range(15, 36, 5), slow=range(40, 101, 20)),
+        "momentum": dict(short=range(10, 31, 5), medium=range(42, 85, 21), long=range(84, 169, 42)),
+    }
+    for name, axes in grids.items():
+        run = sweep_indicator if name in ("rsi", "bollinger") else sweep_strategy
+        start = time.perf_counter()
+        result = run(prices, name, **axes)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<10} {len(result.params):4d} combinations x {days} days: {elapsed * 1000:8.1f} ms")
+
+    start = time.perf_counter()
+    signal_history(prices)
+    print(f"signal_history {days} days: {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    # 对照：逐组参数调用代理使用的 calculate_rsi
+    start = time.perf_counter()
+    for period in grids["rsi"]["period"]:
+        calculate_rsi(prices, period)
+    print(f"rsi loop   {len(grids['rsi']['period']):4d} calls: "
+          f"{(time.perf_counter() - start) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    test_parameter_grid()
+    test_indicator_sweeps_match_single_runs()
+    test_default_strategy_sweeps_match_agent_signals()
+    test_grid_rows_match_single_parameter_sweeps()
+    test_signal_history_matches_agent_ensemble()
+    benchmark_sweep()
+    print("OK")
@@ -0,0 +1,69 @@
+"""
+并发工具 - 在线程池中并发执行相互独立的 I/O 调用
+"""
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from src.utils.logging_config import setup_logger
+
+logger = setup_logger('concurrency')
+
+
+def run_concurrently(
+    tasks: Dict[str, Callable[[], Any]],
+    timeout: Union[float, Dict[str, float]],
+    defaults: Optional[Dict[str, Any]] = None,
+    max_workers: Optional[int] = None,
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    并发执行多个无参数调用，单个调用失败或超时不影响其他调用
+
+    Args:
+        tasks: 名称 -> 无参数调用（可用 functools.partial 绑定参数）
+        timeout: 每个调用的超时时间（秒），从提交时开始计算；
+                 也可以传入 名称 -> 超时时间 的字典
+        defaults: 调用失败或超时时使用的默认值，未指定时为 None
+        max_workers: 线程数，默认等于调用个数
+
+    Returns:
+        (results, errors)：results 包含每个名称的结果或默认值，
+        errors 记录失败或超时调用的错误信息
+    """
+    defaults = defaults or {}
+    results: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    if not tasks:
+        return results, errors
+
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers or len(tasks), thread_name_prefix="gather")
+    submitted_at = time.monotonic()
+    # 每个调用在提交时上下文的副本中执行（如当前运行的指标缓存）
+    futures = {name: executor.submit(contextvars.copy_context().run, task)
+               for name, task in tasks.items()}
+
+    try:
+        for name, future in futures.items():
+            limit = timeout.get(name) if isinstance(timeout, dict) else timeout
+            remaining = None
+            if limit is not None:
+                remaining = max(0.0, submitted_at + limit - time.monotonic())
+            try:
+                results[name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                future.cancel()
+                errors[name] = f"timed out after {limit}s"
+                logger.warning(f"{name} timed out after {limit}s")
+                results[name] = defaults.get(name)
+            except Exception as e:
+                errors[name] = str(e)
+                logger.error(f"{name} failed: {e}")
+                results[name] = defaults.get(name)
+    finally:
+        # 超时的调用无法被中断，不等待它们结束
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results, errors
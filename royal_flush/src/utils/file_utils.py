@@ -0,0 +1,49 @@
+"""
+文件工具 - 本地缓存文件的原子写入
+"""
+
+import os
+import json
+import tempfile
+from typing import Any, Callable
+
+
+def atomic_write(path: str, write_func: Callable[[str], None]) -> None:
+    """
+    原子地写入文件：先写入同目录下的临时文件，再用 os.replace 替换目标文件，
+    避免并发读取或进程崩溃时读到写了一半的文件
+
+    Args:
+        path: 目标文件路径
+        write_func: 接收临时文件路径并完成写入的函数
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        write_func(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """原子地写入JSON文件"""
+    def _write(tmp_path: str):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    atomic_write(path, _write)
+
+
+def read_json(path: str, default: Any = None) -> Any:
+    """读取JSON文件，文件不存在或损坏时返回默认值"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
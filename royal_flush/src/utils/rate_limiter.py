@@ -0,0 +1,45 @@
+"""
+限流工具 - 线程安全的令牌桶，用于控制对外部数据源的请求频率
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """令牌桶限流器，多个线程共享同一个实例时整体请求频率不超过 rate"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: 每秒允许的请求数
+            burst: 允许的瞬时突发请求数
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """获取一个令牌，令牌不足时阻塞等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False